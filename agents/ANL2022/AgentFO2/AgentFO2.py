@@ -33,6 +33,8 @@ from tudelft_utilities_logging.ReportToLogger import ReportToLogger
 from tudelft.utilities.immutablelist.ImmutableList import ImmutableList
 from decimal import Decimal
 
+from agents.common.agent_storage import AgentStorage
+
 
 
 class AgentFO2(DefaultParty):
@@ -48,6 +50,7 @@ class AgentFO2(DefaultParty):
         self.other: str = None
         self.settings: Settings = None
         self.storage_dir: str = None
+        self.storage: AgentStorage = None
         self.allbid:BidsWithUtility = None
 
         self.pre_opponent_bid_hamming=None
@@ -87,6 +90,8 @@ class AgentFO2(DefaultParty):
 
             self.parameters = self.settings.getParameters()
             self.storage_dir = self.parameters.get("storage_dir")
+            if self.storage_dir is not None:
+                self.storage = AgentStorage(self.storage_dir, "AgentFO2")
 
             # the profile contains the preferences of the agent over the domain
             profile_connection = ProfileConnectionFactory.create(
@@ -109,17 +114,17 @@ class AgentFO2(DefaultParty):
                 self.other = str(actor).split("_")[-2]
 
                 # read data
-                if self.read_data and os.path.exists(f"{self.storage_dir}/{self.other}.csv"):
-                    with open(f"{self.storage_dir}/{self.other}.csv","r") as f:
-                        reader=csv.reader(f)
-                        l=[row for row in reader]
-                        l=[[float(v) for v in row] for row in l]
-                    self.pre_opponent_utility_log=l[0]
-                    self.pre_opponent_bid_hamming=l[1]
-                    self.which_pre_accept=l[2]
-                    self.pre_strategy=l[3]
-                    self.accept_utilgoal=max(0.8,self.which_pre_accept[1])
-                    self.opponent_strategy_search()
+                if self.read_data and self.storage is not None:
+                    # the csv files of earlier versions of this agent are imported once
+                    self.storage.import_file("opponent_data", self.other, os.path.join(self.storage_dir, f"{self.other}.csv"), self.read_csv)
+                    l=self.storage.get("opponent_data", self.other)
+                    if l is not None:
+                        self.pre_opponent_utility_log=l[0]
+                        self.pre_opponent_bid_hamming=l[1]
+                        self.which_pre_accept=l[2]
+                        self.pre_strategy=l[3]
+                        self.accept_utilgoal=max(0.8,self.which_pre_accept[1])
+                        self.opponent_strategy_search()
                 self.read_data=False
 
                 # process action done by opponent
@@ -132,6 +137,8 @@ class AgentFO2(DefaultParty):
         # Finished will be send if the negotiation has ended (through agreement or deadline)
         elif isinstance(data, Finished):
             self.save_data()
+            if self.storage is not None:
+                self.storage.close()
             # terminate the agent MUST BE CALLED
             self.logger.log(logging.INFO, "party is terminating:")
             super().terminate()
@@ -298,13 +305,22 @@ class AgentFO2(DefaultParty):
         Taking too much time might result in your agent being killed, so use it for storage only.
         """
 
-        with open(f"{self.storage_dir}/{self.other}.csv", "w") as f:
-            writer=csv.writer(f)
-            writer.writerow(self.opponent_utility_log)
-            writer.writerow(self.opponent_bid_hamming)
-            writer.writerow(self.which_accept)
-            writer.writerow([self.opponent_strategy,self.min])
+        if self.storage is None:
+            return
+        # rows of numbers, stored as floats like the values that are read back
+        rows=[
+            self.opponent_utility_log,
+            self.opponent_bid_hamming,
+            self.which_accept,
+            [self.opponent_strategy,self.min],
+        ]
+        self.storage.put("opponent_data", self.other, [[float(v) for v in row] for row in rows])
 
+    @staticmethod
+    def read_csv(file_path: str) -> list:
+        with open(file_path,"r") as f:
+            reader=csv.reader(f)
+            return [[float(v) for v in row] for row in reader]
 
     def accept_condition(self, bid: Bid) -> bool:
         if bid is None:
@@ -359,7 +359,9 @@ class LuckyAgent2022(DefaultParty):
         newutilspace = self.profile
         if not newutilspace == self._utilspace:
             self._utilspace = cast(LinearAdditive, newutilspace)
-            self._extendedspace = ExtendedUtilSpace(self._utilspace)
+            self._extendedspace = ExtendedUtilSpace(
+                self._utilspace, self.settings.getProfile().getURI()
+            )
         return self._utilspace
 
     def save_data(self):
@@ -86,7 +86,9 @@ class Pinar_Agent(DefaultParty):
             if not self.sorted_bids:
                 self.sorted_bids = sorted(all_bids, key=lambda x: self.profile.getUtility(x),
                                           reverse=True)
-            self.agent_brain.fill_domain_and_profile(self.domain, self.profile)
+            self.agent_brain.fill_domain_and_profile(self.domain, self.profile,
+                                                     self.parameters.get("background_training") != False,
+                                                     self.getReporter())
 
             profile_connection.close()
 
@@ -116,8 +118,7 @@ class Pinar_Agent(DefaultParty):
         elif isinstance(data, Finished):
             self.save_data()
             # terminate the agent MUST BE CALLED
-            self.logger.log(logging.INFO, "party is terminating:")
-            super().terminate()
+            self.terminate()
         else:
             self.logger.log(logging.WARNING, "Ignoring unknown info " + str(data))
 
@@ -152,6 +153,13 @@ class Pinar_Agent(DefaultParty):
         """
         return "Precious Intelligent Negotiation Agreement Robot(Pinar) that empowered by LightGBM tries to find opponent weak side"
 
+    def terminate(self):
+        # also called if the session ends without Finished (e.g. an error), so that
+        # the training thread does not outlive the session
+        self.logger.log(logging.INFO, "party is terminating:")
+        super().terminate()
+        self.agent_brain.close()
+
     def opponent_action(self, action):
         """Process an action that was received from the opponent.
 
@@ -1,11 +1,38 @@
 import json
 import random
+import numpy as np
 import pandas as pd
 import lightgbm as lgb
 
 from geniusweb.bidspace.AllBidsList import AllBidsList
 from geniusweb.issuevalue.Bid import Bid
 
+from agents.common.background_trainer import BackgroundTrainer
+from agents.common.bidspace import BidSpace
+
+
+class _RowBuffer:
+    """Preallocated 2D array that grows by doubling, so appending a row is amortised O(1)"""
+
+    def __init__(self, num_columns, dtype, capacity=64):
+        self._data = np.empty((capacity, num_columns), dtype=dtype)
+        self._size = 0
+
+    def append(self, row):
+        if self._size == len(self._data):
+            grown = np.empty((2 * len(self._data), self._data.shape[1]), dtype=self._data.dtype)
+            grown[:self._size] = self._data
+            self._data = grown
+        self._data[self._size] = row
+        self._size += 1
+
+    @property
+    def array(self):
+        return self._data[:self._size]
+
+    def __len__(self):
+        return self._size
+
 
 class Pinar_Agent_Brain:
     def __init__(self):
@@ -26,15 +53,25 @@ class Pinar_Agent_Brain:
         self.param = None
 
         self.lgb_model = None
+        # models are trained in the background, lgb_model is the last one swapped in
+        self.trainer = None
+        self.model_version = 0
 
-        self.X = pd.DataFrame()
-        self.Y = pd.DataFrame()
+        self.X = None
+        self.Y = None
 
         self.domain = None
         self.profile = None
         self.issue_name_list = None
         self.temEnumDict = None
 
+        # integer encoded features of every bid of the domain, by bid index of the
+        # bid space, and the bid indices of sorted_bids_agent
+        self.bidspace = None
+        self.bid_features = None
+        self.sorted_bids_agent_index = None
+        self.prediction_cache = {}
+
         self.offers = []
         self.offers_unique = []
         self.offers_unique_sorted = None
@@ -71,31 +108,33 @@ class Pinar_Agent_Brain:
                                                    reverse=True)
 
     def add_opponent_offer_to_self_x_and_self_y(self, bid, progress_time):
-        bid_value_array = self.get_bid_value_array_for_data_frame_usage(bid)
-        df = pd.DataFrame(bid_value_array)
-        df = self.enumerate(df)
-        self.X = pd.concat([self.X, df])
+        self.X.append(self.get_bid_features(bid))
         if progress_time < 0.81:
             val = (float(0.99) - (float(0.14) * (float(progress_time))))
             """Y tarafına öyle bir değişken atamalıyım ki adamın utilitisi olmalı (kendi utilitime göre olsa daha mantıklı olabilir gibi şimdilik)"""
-            new = pd.DataFrame([val])
-            self.Y = pd.concat([self.Y, new])
+            self.Y.append(val)
 
-    def fill_domain_and_profile(self, domain, profile):
+    def fill_domain_and_profile(self, domain, profile, background_training=True, reporter=None):
         self.domain = domain
         self.profile = profile
         self.reservationBid = self.profile.getReservationBid()
         if self.reservationBid is not None:
             self.reservationBid_utility = self.profile.getUtility(self.reservationBid)
-        self.issue_name_list = self.domain.getIssues()
-        self.X = pd.DataFrame()
-        self.Y = pd.DataFrame()
+        self.issue_name_list = list(self.domain.getIssues())
+        self.X = _RowBuffer(len(self.issue_name_list), np.int32)
+        self.Y = _RowBuffer(1, np.float64)
         self.temEnumDict = self.enumerate_enum_dict()
         self.all_bid_list = AllBidsList(domain)
+        self.bidspace = BidSpace(domain)
+        self.bid_features = self.encode_bid_space()
+        self.prediction_cache = {}
+        self.trainer = BackgroundTrainer(self.fit_lgb_model, synchronous=not background_training, reporter=reporter)
+        self.model_version = 0
 
         self.sorted_bids_agent = sorted(self.all_bid_list,
                                         key=lambda x: self.profile.getUtility(x),
                                         reverse=True)
+        self.sorted_bids_agent_index = self.bidspace.encode(self.sorted_bids_agent) @ self.bidspace.strides
         self.calculate_percantage_and_number()
         self.add_agent_first_n_bid_to_machine_learning_with_low_utility(self.sorted_bids_agent)
 
@@ -121,26 +160,26 @@ class Pinar_Agent_Brain:
         self.goal_of_utility = self.get_goal_of_negoation_utility(float(self.percentage_of_greater_than85)) + float(
             0.01)
         numb_goal_util = 0
-        self.sorted_bids_agent_df = pd.DataFrame()
-        self.sorted_bids_agent_that_greater_than_065_df = pd.DataFrame()
-        for i in self.sorted_bids_agent:
+        # positions in sorted_bids_agent, the feature frames are built once afterwards
+        goal_of_utility_positions = []
+        greater_than_065_positions = []
+        for position, i in enumerate(self.sorted_bids_agent):
             utility = float(self.profile.getUtility(i))
             if utility > float(self.goal_of_utility):
                 numb_goal_util = numb_goal_util + 1
             if utility > (float(self.goal_of_utility) - float(0.1)):
                 self.sorted_bids_agent_that_greater_than_goal_of_utility.append(i)
-                df_temp = pd.DataFrame(self.get_bid_value_array_for_data_frame_usage(i))
-                df_temp = self.enumerate(df_temp)
-                self.sorted_bids_agent_df = pd.concat([self.sorted_bids_agent_df, df_temp])
+                goal_of_utility_positions.append(position)
             if utility > 0.65:
                 self.sorted_bids_agent_that_greater_than_065.append(i)
-                df_temp = pd.DataFrame(self.get_bid_value_array_for_data_frame_usage(i))
-                df_temp = self.enumerate(df_temp)
-                self.sorted_bids_agent_that_greater_than_065_df = pd.concat(
-                    [self.sorted_bids_agent_that_greater_than_065_df, df_temp])
+                greater_than_065_positions.append(position)
             else:
                 break
         self.number_of_goal_of_utility = numb_goal_util
+        self.sorted_bids_agent_df = self.features_to_df(
+            self.sorted_bids_agent_index[goal_of_utility_positions])
+        self.sorted_bids_agent_that_greater_than_065_df = self.features_to_df(
+            self.sorted_bids_agent_index[greater_than_065_positions])
 
     def evaluate_opponent_utility_for_all_my_important_bid(self, progress_time):
         self.eva_util_val_acc_to_lgb_m_with_max_bids_for_agent = []
@@ -159,16 +198,18 @@ class Pinar_Agent_Brain:
         length = len(self.offers_unique)
         if length >= 1 and (length % 2) == 0:
             self.train_machine_learning_model()
+            self.update_model(progress_time)
+
+    def update_model(self, progress_time):
+        # swap in the model of the trainer once it is ready, until then the last model is used
+        model, version = self.trainer.latest()
+        if version != self.model_version:
+            self.lgb_model = model
+            self.model_version = version
+            self.prediction_cache = {}
             self.evaluate_opponent_utility_for_all_my_important_bid(progress_time)
 
     def train_machine_learning_model(self):
-        issue_list = []
-        for issue in self.domain.getIssues():
-            issue_list.append(issue)
-        for col in issue_list:
-            self.X[col] = self.X[col].astype('int')
-        self.Y = self.Y.astype('float')
-        train_data = lgb.Dataset(self.X, label=self.Y, feature_name=issue_list)
         if self.param is None:
             self.param = {
                 'objective': 'cross_entropy',
@@ -181,12 +222,25 @@ class Pinar_Agent_Brain:
                 'min_data': 1,
                 'verbose': -1
             }
-        self.lgb_model = lgb.train(self.param, train_data)
+        self.trainer.submit(self.param, self.X.array.copy(), self.Y.array[:, 0].copy(), list(self.issue_name_list))
+
+    @staticmethod
+    def fit_lgb_model(param, x, y, issue_list):
+        train_data = lgb.Dataset(x, label=y, feature_name=issue_list)
+        return lgb.train(param, train_data)
+
+    def close(self):
+        if self.trainer is not None:
+            self.trainer.close()
 
     def call_model_lgb(self, bid):
         if self.lgb_model:
-            prediction = self.lgb_model.predict(self._bid_for_model_prediction_to_df(bid))
-            return float(prediction[0])
+            # is_acceptable asks for the same bid up to five times
+            index = self.bidspace.index(bid)
+            if index not in self.prediction_cache:
+                prediction = self.lgb_model.predict(self.bid_features[index:index + 1])
+                self.prediction_cache[index] = float(prediction[0])
+            return self.prediction_cache[index]
         else:
             return float(1)
 
@@ -201,6 +255,12 @@ class Pinar_Agent_Brain:
         df_temp = self.enumerate(df_temp)
         return df_temp
 
+    def get_bid_features(self, bid):
+        return self.bid_features[self.bidspace.index(bid)]
+
+    def features_to_df(self, bid_indices):
+        return pd.DataFrame(self.bid_features[bid_indices], columns=self.issue_name_list)
+
     def enumerate_enum_dict(self):
         issue_enums_dict = {}
         for issue in self.domain.getIssues():
@@ -208,6 +268,17 @@ class Pinar_Agent_Brain:
             issue_enums_dict[issue] = temp_enums
         return issue_enums_dict
 
+    def encode_bid_space(self):
+        # same codes as enumerate, looked up for all bids at once: per issue a table
+        # from the value index of the bid space to the code of temEnumDict
+        columns = []
+        for issue in self.issue_name_list:
+            issue_index = self.bidspace.issues.index(issue)
+            codes = np.array([self.temEnumDict[issue][value] for value in self.bidspace.values[issue_index]],
+                             dtype=np.int32)
+            columns.append(codes[self.bidspace.matrix[:, issue_index]])
+        return np.stack(columns, axis=1)
+
     def enumerate(self, df):
         for issue in self.domain.getIssues():
             df[issue] = df[issue].map(self.temEnumDict[issue])
@@ -215,21 +286,16 @@ class Pinar_Agent_Brain:
 
     def model_feature_importance(self):
         if self.lgb_model is not None:
-            df = pd.DataFrame({'Value': self.lgb_model.feature_importance(), 'Feature': self.X.columns})
+            df = pd.DataFrame({'Value': self.lgb_model.feature_importance(), 'Feature': self.issue_name_list})
             result = df.to_json(orient="split")
             parsed = json.loads(result)
             return parsed
         return ""
 
     def util_add_agent_first_n_bid_to_machine_learning_with_low_utility(self, bid, ratio):
-        bid_value_array = self.get_bid_value_array_for_data_frame_usage(bid)
-        df = pd.DataFrame(bid_value_array)
-        df = self.enumerate(df)
-        self.X = pd.concat([self.X, df])
+        self.X.append(self.get_bid_features(bid))
         util = float(float(0.2) + (float(ratio) * float(0.35)))
-        new = pd.DataFrame([util])
-
-        self.Y = pd.concat([self.Y, new])
+        self.Y.append(util)
 
     def add_agent_first_n_bid_to_machine_learning_with_low_utility(self, sorted_bids_agent):
 
@@ -254,6 +320,7 @@ class Pinar_Agent_Brain:
             self.util_add_agent_first_n_bid_to_machine_learning_with_low_utility(bid, float(float(i) / float(bid_number)))
 
     def is_acceptable(self, bid: Bid, progress):
+        self.update_model(progress)
         util = float(self.profile.getUtility(bid))
         if util >= float(self.reservationBid_utility):
             if util >= 0.94:
@@ -278,6 +345,7 @@ class Pinar_Agent_Brain:
 
     def find_bid(self, progress_time):
         progress_time = float(progress_time)
+        self.update_model(progress_time)
         if float(self.my_offered_number_of_time_from_ai) < float(len(self.eva_util_val_acc_to_lgb_m_with_max_bids_for_agent)) * float(2) \
                 and ((0 < progress_time < 0.17) or (0.23 < progress_time < 0.37) or (0.45 < progress_time < 0.93) or (
                 0.97 < progress_time <= 0.985)) and self.lgb_model is not None \
@@ -212,7 +212,9 @@ class AgentFish(DefaultParty):
         newutilspace = self.profile
         if not newutilspace == self.utilspace:
             self.utilspace = cast(LinearAdditive, newutilspace)
-            self.extendedspace = ExtendedUtilSpace(self.utilspace)
+            self.extendedspace = ExtendedUtilSpace(
+                self.utilspace, self.settings.getProfile().getURI()
+            )
         return self.utilspace
 
     def makeBid(self) -> Bid:
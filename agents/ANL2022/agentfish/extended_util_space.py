@@ -1,12 +1,10 @@
-from geniusweb.bidspace.BidsWithUtility import BidsWithUtility
 from geniusweb.bidspace.Interval import Interval
-from geniusweb.bidspace.IssueInfo import IssueInfo
 from geniusweb.issuevalue.Bid import Bid
-from geniusweb.issuevalue.Value import Value
 from geniusweb.profile.utilityspace.LinearAdditive import LinearAdditive
 from tudelft.utilities.immutablelist.ImmutableList import ImmutableList
 from decimal import Decimal
-from typing import List
+
+from agents.common.util_space_cache import get_util_space_data
 
 
 class ExtendedUtilSpace:
@@ -15,11 +13,14 @@ class ExtendedUtilSpace:
     class may change in the future, use at your own risk.
     """
 
-    def __init__(self, space: LinearAdditive):
+    def __init__(self, space: LinearAdditive, profile_uri=None):
         self._utilspace = space
-        self._bidutils = BidsWithUtility.create(self._utilspace)
+        # bids, range and tolerance are shared between sessions with the same profile
+        data = get_util_space_data(self._utilspace, profile_uri)
+        self._bidutils = data.bidutils
+        self._range = data.range
         self._computeMinMax()
-        self._tolerance = self._computeTolerance()
+        self._tolerance = data.tolerance
 
     def _computeMinMax(self):
         """
@@ -28,9 +29,9 @@ class ExtendedUtilSpace:
         TODO this is simplistic, very expensive method and may cause us to run
         out of time on large domains.
         <p>
-        Assumes that utilspace and bidutils have been set properly.
+        Assumes that utilspace and range have been set properly.
         """
-        range = self._bidutils.getRange()
+        range = self._range
         self._minUtil = Decimal("0.7")*range.getMax()
         self._maxUtil = range.getMax()
 
@@ -40,28 +41,6 @@ class ExtendedUtilSpace:
             if rv > self._minUtil:
                 self._minUtil = rv
 
-    def _computeTolerance(self) -> Decimal:
-        """
-        Tolerance is the Interval we need when searching bids. When we are close
-        to the maximum utility, this value has to be the distance between the
-        best and one-but-best utility.
-
-        @return the minimum tolerance required, which is the minimum difference
-                between the weighted utility of the best and one-but-best issue
-                value.
-        """
-        tolerance = Decimal(1)
-        for iss in self._bidutils.getInfo():
-            if iss.getValues().size() > 1:
-                # we have at least 2 values.
-                values: List[Decimal] = []
-                for val in iss.getValues():
-                    values.append(iss.getWeightedUtil(val))
-                values.sort()
-                values.reverse()
-                tolerance = min(tolerance, values[0] - values[1])
-        return tolerance
-
     def getMin(self) -> Decimal:
         return self._minUtil
 
@@ -77,7 +77,9 @@ class ChargingBoul(DefaultParty):
                 self.storage_dir = self.parameters.get("storage_dir")
                 self.util_space = self.profile_int.getProfile()
                 self.domain = self.util_space.getDomain()
-                self.extended_space = ExtendedUtilSpace(self.util_space)
+                self.extended_space = ExtendedUtilSpace(
+                    self.util_space, self.settings.getProfile().getURI()
+                )
                 self.detect_strategy()
             elif isinstance(info, ActionDone):
                 other_act: Action = info.getAction()
@@ -1,30 +1,19 @@
 from decimal import Decimal
-from geniusweb.bidspace.BidsWithUtility import BidsWithUtility
 from geniusweb.bidspace.Interval import Interval
 from geniusweb.issuevalue.Bid import Bid
 from geniusweb.profile.utilityspace.LinearAdditive import LinearAdditive
 from tudelft.utilities.immutablelist.ImmutableList import ImmutableList
-from typing import List
+
+from agents.common.util_space_cache import get_util_space_data
 
 
 class ExtendedUtilSpace:
-    def __init__(self, space: LinearAdditive):
+    def __init__(self, space: LinearAdditive, profile_uri=None):
         self.util_space = space
-        self.bid_utils = BidsWithUtility.create(self.util_space)
-        self.tolerance = self.compute_tolerance()
-
-    def compute_tolerance(self) -> Decimal:
-        tolerance = Decimal(1)
-        for iss in self.bid_utils.getInfo():
-            if iss.getValues().size() > 1:
-                # we have at least 2 values.
-                values: List[Decimal] = []
-                for val in iss.getValues():
-                    values.append(iss.getWeightedUtil(val))
-                values.sort()
-                values.reverse()
-                tolerance = min(tolerance, values[0] - values[1])
-        return tolerance
+        # bids and tolerance are shared between sessions with the same profile
+        data = get_util_space_data(self.util_space, profile_uri)
+        self.bid_utils = data.bidutils
+        self.tolerance = data.tolerance
 
     def getBids(self, utilityGoal: Decimal, time: float) -> ImmutableList[Bid]:
         return self.bid_utils.getBids(
@@ -32,6 +32,7 @@ from geniusweb.profileconnection.ProfileConnectionFactory import (
 from geniusweb.progress.ProgressTime import ProgressTime
 from geniusweb.references.Parameters import Parameters
 from tudelft_utilities_logging.ReportToLogger import ReportToLogger
+from agents.common.agent_storage import AgentStorage
 from .utils.logger import Logger
 
 from .utils.opponent_model import OpponentModel
@@ -63,6 +64,7 @@ class DreamTeam109Agent(DefaultParty):
         self.other_name: str = None
         self.settings: Settings = None
         self.storage_dir: str = None
+        self.storage: AgentStorage = None
 
         self.data_dict: DataDict = None
 
@@ -104,6 +106,8 @@ class DreamTeam109Agent(DefaultParty):
 
             self.parameters = self.settings.getParameters()
             self.storage_dir = self.parameters.get("storage_dir")
+            if self.storage_dir is not None:
+                self.storage = AgentStorage(self.storage_dir, "dreamteam109_agent")
 
             # the profile contains the preferences of the agent over the domain
             profile_connection = ProfileConnectionFactory.create(
@@ -150,6 +154,8 @@ class DreamTeam109Agent(DefaultParty):
             
             self.update_data_dict()
             self.save_data()
+            if self.storage is not None:
+                self.storage.close()
 
             # terminate the agent MUST BE CALLED
             self.logger.log(logging.INFO, "party is terminating")
@@ -242,10 +248,22 @@ class DreamTeam109Agent(DefaultParty):
     def get_data_file_path(self) -> str:
         return f"{self.storage_dir}/{self.other_name}.json"
 
+    @staticmethod
+    def read_sessions(file_path: str) -> list:
+        with open(file_path) as f:
+            return json.load(f)["sessions"]
+
     def attempt_load_data(self):
-        if path.exists(self.get_data_file_path()):
-            with open(self.get_data_file_path()) as f:
-                self.data_dict = json.load(f)
+        # every session is a record in the log of the opponent
+        sessions = []
+        if self.storage is not None:
+            # the json file of an earlier version of this agent is imported once
+            self.storage.import_file("sessions", self.other_name, self.get_data_file_path(), self.read_sessions, log=True)
+            sessions = self.storage.records("sessions", self.other_name)
+        if sessions:
+            self.data_dict = {
+                "sessions": sessions
+            }
             self.logger.log(logging.INFO, "Loaded previous data about opponent: " + self.other_name)
             self.logger.log(logging.INFO, "data_dict = " + str(self.data_dict))
         else:
@@ -279,10 +297,9 @@ class DreamTeam109Agent(DefaultParty):
         """
         if self.other_name is None:
             self.logger.log(logging.WARNING, "Opponent name was not set; skipping save data")
-        else:
-            json_data = json.dumps(self.data_dict, sort_keys=True, indent=4)
-            with open(self.get_data_file_path(), "w") as f:
-                f.write(json_data)
+        elif self.storage is not None:
+            # only the session of this negotiation is appended, see update_data_dict
+            self.storage.append("sessions", self.other_name, self.data_dict["sessions"][-1])
             self.logger.log(logging.INFO, "Saved data about opponent: " + self.other_name)
 
     def learn_from_past_sessions(self, sessions: list[SessionData]):
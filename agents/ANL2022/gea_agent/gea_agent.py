@@ -1,5 +1,4 @@
 import logging
-from random import randint
 from time import time
 from typing import cast
 
@@ -8,7 +7,6 @@ from geniusweb.actions.Accept import Accept
 from geniusweb.actions.Action import Action
 from geniusweb.actions.Offer import Offer
 from geniusweb.actions.PartyId import PartyId
-from geniusweb.bidspace.AllBidsList import AllBidsList
 from geniusweb.inform.ActionDone import ActionDone
 from geniusweb.inform.Finished import Finished
 from geniusweb.inform.Inform import Inform
@@ -28,12 +26,13 @@ from geniusweb.progress.ProgressTime import ProgressTime
 from geniusweb.references.Parameters import Parameters
 from tudelft_utilities_logging.ReportToLogger import ReportToLogger
 
+from agents.common.background_trainer import BackgroundTrainer
+from agents.common.bidspace import BidSpace
 from agents.template_agent.utils.opponent_model import OpponentModel
 
 # our imports
 import numpy as np
 from sklearn import tree
-from sklearn.preprocessing import label_binarize
 import random
 
 
@@ -60,15 +59,29 @@ class GEAAgent(DefaultParty):
         self.logger.log(logging.INFO, "party is initialized")
 
         # our parameters
-        # collect negitioation data
+        # collect negitioation data, bids are stored by their index in the bid space
         self.dataX = []
         self.dataY = []
         self.data_len = 0
         self.issue_encoder = {}
 
-        # decision tree and weights
+        # all bids of the domain and their encoding, see init_bid_values
+        self.bidspace: BidSpace = None
+        self.bid_utilities: np.ndarray = None
+        self.bid_features: np.ndarray = None
+
+        # decision tree and weights, the tree is fitted by the trainer in the
+        # background and decision_model is the last tree that was swapped in
         self.decision_model = None
+        self.trainer: BackgroundTrainer = None
         self.tree_depth = 20
+
+        # the tree is refitted on every new sample while fitting is cheap, otherwise
+        # after every `retrain_every` new samples
+        self.retrain_every = 10
+        self.fit_budget_ms = 5.0
+        self.last_fit_ms = 0.0
+        self.fitted_len = 0
         self.orig_opponent_agree_weight = 0.15
         self.opponent_agree_weight = self.orig_opponent_agree_weight
         self.accept_threshold = 0.85  # for heuristic function, not utility.
@@ -121,6 +134,11 @@ class GEAAgent(DefaultParty):
 
             # our code: init issue dictionary
             self.init_bid_values()
+            self.trainer = BackgroundTrainer(
+                self.fit_tree,
+                synchronous=self.parameters.get("background_training") == False,
+                reporter=self.logger,
+            )
 
         # ActionDone informs you of an action (an offer or an accept)
         # that is performed by one of the agents (including yourself).
@@ -144,8 +162,7 @@ class GEAAgent(DefaultParty):
         elif isinstance(data, Finished):
             self.save_data()
             # terminate the agent MUST BE CALLED
-            self.logger.log(logging.INFO, "party is terminating:")
-            super().terminate()
+            self.terminate()
         else:
             self.logger.log(logging.WARNING, "Ignoring unknown info " + str(data))
 
@@ -180,6 +197,14 @@ class GEAAgent(DefaultParty):
         """
         return "Template agent for the ANL 2022 competition"
 
+    def terminate(self):
+        # also called if the session ends without Finished (e.g. an error), so that
+        # the training thread does not outlive the session
+        self.logger.log(logging.INFO, "party is terminating:")
+        super().terminate()
+        if self.trainer is not None:
+            self.trainer.close()
+
     def opponent_action(self, action):
         """Process an action that was received from the opponent.
 
@@ -190,7 +215,7 @@ class GEAAgent(DefaultParty):
         if isinstance(action, Offer):
             # create opponent model if it was not yet initialised
             if self.opponent_model is None:
-                self.opponent_model = OpponentModel(self.domain)
+                self.opponent_model = OpponentModel(self.domain, self.bidspace)
 
             bid = cast(Offer, action).getBid()
 
@@ -203,7 +228,8 @@ class GEAAgent(DefaultParty):
         """This method is called when it is our turn. It should decide upon an action
         to perform and send this action to the opponent.
         """
-            
+        self.update_model()
+
         # check if the last received offer is good enough
         if self.accept_condition(self.last_received_bid):
             # if so, accept the offer
@@ -262,22 +288,17 @@ class GEAAgent(DefaultParty):
         ]
         return any(conditions)
 
-    def find_bid(self) -> Bid:
-        # compose a list of all possible bids
-        domain = self.profile.getDomain()
-        all_bids = AllBidsList(domain)
-
-        best_bid_score = 0.0
-        best_bid = None
+    def find_bid(self, alpha: float = 0.95, eps: float = 0.1) -> Bid:
+        # take 500 random bids and pick the best according to the heuristic score of
+        # score_bid, all candidates are scored at once
+        candidates = np.random.randint(0, self.bidspace.size, 500)
+        progress = self.progress.get(time() * 1000)
 
-        # take 500 attempts to find a bid according to a heuristic score
-        for _ in range(500):
-            bid = all_bids.get(randint(0, all_bids.size() - 1))
-            bid_score = self.score_bid(bid)
-            if bid_score > best_bid_score:
-                best_bid_score, best_bid = bid_score, bid
+        time_pressure = 1.0 - progress ** (1 / eps)
+        scores = alpha * time_pressure * self.bid_utilities[candidates]
+        scores += self.tree_predict_many(candidates) * self.opponent_agree_weight
 
-        return best_bid
+        return self.bidspace.bid(candidates[np.argmax(scores)])
 
     def score_bid(self, bid: Bid, alpha: float = 0.95, eps: float = 0.1) -> float:
         ''' Calculate heuristic score for a bid '''
@@ -296,44 +317,43 @@ class GEAAgent(DefaultParty):
 
     def tree_predict(self, bid: Bid) -> float:
         ''' returns acceptance estimation for the other agent '''
-        bid_data = []
-        bid_issue_values = bid.getIssueValues()
-        domain_issues = list(bid_issue_values.keys())
-        domain_issues.sort()
-        for issue in domain_issues:
-            # encode categorical data
-            issue_encoded = label_binarize([str(bid_issue_values[issue])], classes=self.all_issue_values[issue])
-            # concat current category to X
-            bid_data.extend(issue_encoded.flatten().tolist())
+        return float(self.tree_predict_many([self.bidspace.index(bid)])[0])
 
+    def tree_predict_many(self, bid_indices) -> np.ndarray:
+        ''' returns acceptance estimations for many bids (by bid space index) at once '''
         # if the tree is trained, we can use it to predict opponent reaction
         if self.decision_model is not None:
-            tree_prediction = float(self.decision_model.predict(np.array(bid_data).reshape(1, -1)))
-            return tree_prediction
+            return self.decision_model.predict(self.bid_features[bid_indices]).astype(float)
 
-        return 0  # no knowledge
+        return np.zeros(len(bid_indices))  # no knowledge
 
     def append_data_and_train_tree(self, bid: Bid, opponent_accept: int) -> None:
         ''' appends new bid to negotiation history and retrain model '''
-        bid_data = []
-        bid_issue_values = bid.getIssueValues()
-        domain_issues = list(bid_issue_values.keys())
-        domain_issues.sort()
-        for issue in domain_issues:
-            # encode categorical data
-            issue_encoded = label_binarize([str(bid_issue_values[issue])], classes=self.all_issue_values[issue])
-            # concat current category to X
-            bid_data.extend(issue_encoded.flatten().tolist())
-
         self.data_len += 1
-        self.dataX.append(bid_data)
+        self.dataX.append(self.bidspace.index(bid))
         self.dataY.append(opponent_accept)
 
         # train tree if at least two samples were collected
-
-        if self.data_len > 2:
-            self.decision_model = tree.DecisionTreeClassifier(criterion="entropy", max_depth=self.tree_depth)
-            self.decision_model.fit(self.dataX, self.dataY)
+        if self.data_len > 2 and self.should_retrain():
+            self.trainer.submit(self.bid_features[self.dataX], np.array(self.dataY))
+            self.fitted_len = self.data_len
+            self.update_model()
+
+    def fit_tree(self, features: np.ndarray, labels: np.ndarray):
+        ''' fits a new tree, called by the trainer '''
+        decision_model = tree.DecisionTreeClassifier(criterion="entropy", max_depth=self.tree_depth)
+        return decision_model.fit(features, labels)
+
+    def update_model(self) -> None:
+        ''' use the last tree of the trainer, the previous tree is used until it is ready '''
+        self.decision_model, _ = self.trainer.latest()
+        self.last_fit_ms = self.trainer.last_fit_ms
+
+    def should_retrain(self) -> bool:
+        ''' retrain on every sample while fitting fits in the time budget '''
+        if self.decision_model is None or self.last_fit_ms <= self.fit_budget_ms:
+            return True
+        return self.data_len - self.fitted_len >= self.retrain_every
 
     def init_bid_values(self):
         ''' must be called to binarize labels '''
@@ -344,3 +364,26 @@ class GEAAgent(DefaultParty):
             self.all_issue_values[issue] = []
             for value in domain.getValues(issue):
                 self.all_issue_values[issue].append(str(value))
+
+        # encode all bids of the domain once
+        self.bidspace = BidSpace(domain)
+        self.bid_utilities = self.bidspace.utilities(self.profile)
+        self.bid_features = self.encode_bids(self.bidspace.matrix)
+
+    def encode_bids(self, bid_index_matrix: np.ndarray) -> np.ndarray:
+        ''' one-hot encoding of bids, equal to label_binarize per issue (sorted) '''
+        features = []
+        for column, issue in enumerate(self.bidspace.issues):
+            classes = self.all_issue_values[issue]
+            values = [str(value) for value in self.bidspace.values[column]]
+            # label_binarize encodes two classes as one column (second class is 1),
+            # and a single class as a column of zeros
+            if len(classes) <= 2:
+                table = np.array(
+                    [[len(classes) == 2 and value == classes[1]] for value in values]
+                )
+            else:
+                table = np.array([[value == c for c in classes] for value in values])
+            table = table.reshape(len(values), -1).astype(np.uint8)
+            features.append(table[bid_index_matrix[:, column]])
+        return np.concatenate(features, axis=1)
@@ -2,7 +2,6 @@ import json
 import math
 import os
 from decimal import Decimal
-from os.path import exists
 
 from geniusweb.inform.Agreements import Agreements
 from geniusweb.issuevalue.ValueSet import ValueSet
@@ -38,6 +37,7 @@ from geniusweb.references.Parameters import Parameters
 from numpy import long
 from tudelft_utilities_logging.ReportToLogger import ReportToLogger
 
+from agents.common.agent_storage import AgentStorage
 from .LearnedData import LearnedData
 from .NegotiationData import NegotiationData
 from .Pair import Pair
@@ -64,9 +64,8 @@ class LearningAgent(DefaultParty):
         self.domain: Domain = None
         self.learnedData: LearnedData = None
         self.negotiationData: NegotiationData = None
-        self.learnedDataPath: str = None
-        self.negotiationDataPath: str = None
         self.storage_dir: str = None
+        self.storage: AgentStorage = None
 
         self.opponentName: str = None
 
@@ -153,27 +152,16 @@ class LearningAgent(DefaultParty):
         agreements: Agreements = data.getAgreements()
         self.processAgreements(agreements)
 
-        # Write the negotiation data that we collected to the path provided.
-        if not (self.negotiationDataPath == None or self.negotiationData == None):
+        # Process the negotiation data that we collected in the learned data of the opponent.
+        # This is one transaction, so parallel sessions against the same opponent all count.
+        if not (self.storage == None or self.opponentName == None or self.negotiationData == None):
             try:
-                with open(self.negotiationDataPath, "w") as f:
-                    # w means overwritten
-                    json.dump(self.negotiationData.__dict__, default=lambda o: o.__dict__, indent=5, fp=f)
-
-
+                self.storage.update("learnedData", self.opponentName, self.updateLearnedData)
             except:
-                self.logger.log(logging.ERROR, "Failed to write negotiation data to disk")
-
-        # Write the learned data to the path provided.
-        if not (self.learnedDataPath == None or self.learnedData == None):
-            try:
-                with open(self.learnedDataPath, "w") as f:
-                    # w means overwritten
-                    json.dump(self.learnedData.__dict__, default=lambda o: o.__dict__, indent=9, fp=f)
+                self.logger.log(logging.ERROR, "Failed to write learned data to storage")
 
-
-            except:
-                self.logger.log(logging.ERROR, "Failed to learned data to disk")
+        if self.storage != None:
+            self.storage.close()
 
         self.logger.log(logging.INFO, "party is terminating:")
         super().terminate()
@@ -190,11 +178,7 @@ class LearningAgent(DefaultParty):
                 # The part behind the last _ is always changing, so we must cut it off.
                 self.opponentName = str(actor).rsplit("_", 1)[0]
 
-                # path depend on opponent name
-                self.negotiationDataPath = self.getPath("negotiationData", self.opponentName)
-                self.learnedDataPath = self.getPath("learnedData", self.opponentName)
-
-                # update and load learnedData
+                # load learnedData
                 self.updateAndLoadLearnedData()
 
                 # Add name of the opponent to the negotiation data
@@ -240,6 +224,8 @@ class LearningAgent(DefaultParty):
         self.parameters = settings.getParameters()
 
         self.storage_dir = self.parameters.get("storage_dir")
+        if self.storage_dir != None:
+            self.storage = AgentStorage(self.storage_dir, "learning_agent")
 
         # We are in the negotiation step.
         # Create a new NegotiationData object to store information on this negotiation.
@@ -535,35 +521,50 @@ class LearningAgent(DefaultParty):
             print("Warning: Value wasn't found")
         return v_str
 
-    def getPath(self, dataType: str, opponentName: str):
-        return os.path.join(self.storage_dir, dataType + "_" + opponentName + ".json")
-
     def updateAndLoadLearnedData(self):
-        # we didn't meet this opponent before
-        if exists(self.negotiationDataPath):
-            try:
-                # Load the negotiation data object of a previous negotiation
-                with open(self.negotiationDataPath, "r") as f:
-                    negotiationData: NegotiationData = NegotiationData()
-                    negotiationData.encode(list(json.load(f).values()))
-
-            except:
-                self.logger.log(logging.ERROR, "Negotiation data does not exist")
-
-            if exists(self.learnedDataPath):
-                try:
-                    # Load the negotiation data object of a previous negotiation
-                    with open(self.learnedDataPath, "r") as f:
-                        self.learnedData = LearnedData()
-                        self.learnedData.encode(list(json.load(f).values()))
-
-                except:
-                    self.logger.log(logging.ERROR, "learned data does not exist")
-
-            else:
-                self.learnedData = LearnedData()
+        # the learned data already contains the negotiation data of all previous
+        # negotiations with this opponent, see updateLearnedData
+        if self.storage == None:
+            return
+        try:
+            # the files of earlier versions of this agent are imported once
+            learnedDataPath = self.getPath("learnedData", self.opponentName)
+            self.storage.import_file("learnedData", self.opponentName, learnedDataPath, self.readLearnedDataFile)
+            learnedData = self.storage.get("learnedData", self.opponentName)
+        except:
+            self.logger.log(logging.ERROR, "Failed to read learned data from storage")
+            return
 
-            # Process the negotiation data in our learned Data
-            self.learnedData.update(negotiationData)
+        # we didn't meet this opponent before
+        if learnedData != None:
+            self.learnedData = LearnedData()
+            self.learnedData.encode(list(learnedData.values()))
             self.avgUtil = self.learnedData.getAvgUtility()
             self.stdUtil = self.learnedData.getStdUtility()
+
+    def getPath(self, dataType: str, opponentName: str):
+        return os.path.join(self.storage_dir, dataType + "_" + opponentName + ".json")
+
+    def readLearnedDataFile(self, learnedDataPath: str):
+        # earlier versions processed the negotiation data of the last negotiation in
+        # the learned data when loading it, so it is not yet in the learned data file
+        learnedData = LearnedData()
+        with open(learnedDataPath, "r") as f:
+            learnedData.encode(list(json.load(f).values()))
+
+        negotiationDataPath = self.getPath("negotiationData", self.opponentName)
+        if os.path.exists(negotiationDataPath):
+            negotiationData = NegotiationData()
+            with open(negotiationDataPath, "r") as f:
+                negotiationData.encode(list(json.load(f).values()))
+            learnedData.update(negotiationData)
+
+        return learnedData.__dict__
+
+    def updateLearnedData(self, storedLearnedData: dict):
+        # Process the negotiation data of this negotiation in the stored learned data
+        learnedData = LearnedData()
+        if storedLearnedData != None:
+            learnedData.encode(list(storedLearnedData.values()))
+        learnedData.update(self.negotiationData)
+        return learnedData.__dict__
@@ -33,6 +33,8 @@ from geniusweb.progress.ProgressTime import ProgressTime
 from geniusweb.references.Parameters import Parameters
 from numpy import append
 from tudelft_utilities_logging.ReportToLogger import ReportToLogger
+
+from agents.common.agent_storage import AgentStorage
 from .utils import opponent_model
 
 from .utils.opponent_model import OpponentModel
@@ -59,6 +61,7 @@ class ProcrastinAgent(DefaultParty):
         self.other: str = None
         self.settings: Settings = None
         self.storage_dir: str = None
+        self.storage: AgentStorage = None
         self.strategy_model = None
 
         self.last_received_bid: Bid = None
@@ -135,6 +138,8 @@ class ProcrastinAgent(DefaultParty):
 
             self.parameters = self.settings.getParameters()
             self.storage_dir = self.parameters.get("storage_dir")
+            if self.storage_dir is not None:
+                self.storage = AgentStorage(self.storage_dir, "procrastin_agent")
 
             # the profile contains the preferences of the agent over the domain
             profile_connection = ProfileConnectionFactory.create(
@@ -169,6 +174,8 @@ class ProcrastinAgent(DefaultParty):
         elif isinstance(data, Finished):
             finished = cast(Finished, data)
             self.save_data(finished)
+            if self.storage is not None:
+                self.storage.close()
             # terminate the agent MUST BE CALLED
             self.logger.log(logging.INFO, "party is terminating:")
             super().terminate()
@@ -219,25 +226,36 @@ class ProcrastinAgent(DefaultParty):
     def load_data(self):
         # load_data is called as soon as the opponent is known. 
         # In the very rare case where the opponent never makes an offer, load_data is never called.
-        if not path.exists(f"{self.storage_dir}/{self.other}.json"):
+        self.opponent_data = None
+        if self.storage is not None:
+            # the json files of earlier versions of this agent are imported once
+            self.storage.import_file("opponent_data", self.other, path.join(self.storage_dir, f"{self.other}.json"), self.read_json)
+            # Not first round if there is data
+            self.opponent_data = self.storage.get("opponent_data", self.other)
+        if self.opponent_data is None:
             # First round
-            new_data = {}
-            new_data["count"] = 0
-            new_data["self_accepts"] = 0
-            new_data["did_accept"] = []
-            new_data["opponent_accepts"] = 0
-            new_data["no_accepts"] = 0
-            new_data["beta_values"] = []
-            new_data["time_factor"] = 1.0
-            new_data["alphas"] = []
-            new_data["alpha_achieved"] = []
-            self.opponent_data = new_data
-        else:
-            # Not first round
-            with open(f"{self.storage_dir}/{self.other}.json", "r") as f:
-                self.opponent_data = json.load(f)
+            self.opponent_data = self.new_opponent_data()
         self.time_estimator.update_time_factor(self.opponent_data["time_factor"])
 
+    @staticmethod
+    def read_json(file_path: str) -> dict:
+        with open(file_path, "r") as f:
+            return json.load(f)
+
+    @staticmethod
+    def new_opponent_data() -> dict:
+        new_data = {}
+        new_data["count"] = 0
+        new_data["self_accepts"] = 0
+        new_data["did_accept"] = []
+        new_data["opponent_accepts"] = 0
+        new_data["no_accepts"] = 0
+        new_data["beta_values"] = []
+        new_data["time_factor"] = 1.0
+        new_data["alphas"] = []
+        new_data["alpha_achieved"] = []
+        return new_data
+
     def choose_bid(self) -> Bid:
         if self.bids_sent <= 5: 
             # Action to take before we have a decent estimate at how many turns are left
@@ -324,15 +342,11 @@ class ProcrastinAgent(DefaultParty):
         for learning capabilities. Note that no extensive calculations can be done within this method.
         Taking too much time might result in your agent being killed, so use it for storage only.
         """
+        if self.storage is None or self.other is None:
+            return
+
         agreements = list(finished.getAgreements().getAgreements().items())
-        save = self.opponent_data
-        save["count"] += 1
-        save["test_bid_pool_size"] = len(self.bid_chooser.bid_pool)
-        save["test_time_list_self"] = self.time_estimator.self_times
-        #save["test_time_list_opp"] = self.time_estimator.opp_times_adj
-        save["test_offers_left"] = self.test_bids_left
-        save["self_diff"] = self.time_estimator.self_diff
-        
+
         opp_stuff = {"weights": {}}
         total_weight = 0.0
         for issue in self.domain.getIssues():
@@ -343,43 +357,53 @@ class ProcrastinAgent(DefaultParty):
                 opp_stuff[issue][value.getValue()] = self.opponent_model.issue_estimators[issue].get_value_utility(value)
         for issue in self.domain.getIssues():
             opp_stuff["weights"][issue] = self.opponent_model.issue_estimators[issue].weight / total_weight
-        save["opponent_model"] = opp_stuff
 
         beta = float((self.opp_concession_self_util-self.opp_best_self_util)/(1 - self.opp_best_self_util))
-        
-        save["beta_values"].append(beta)
 
         if not agreements:
             agreement_bid = None
             agreement_party = None
-            save["time_factor"] = self.time_estimator.get_new_time_factor(self.test_bids_left, len(self.bid_chooser.bid_pool))
-            save["did_accept"].append(False)
+            time_factor = self.time_estimator.get_new_time_factor(self.test_bids_left, len(self.bid_chooser.bid_pool))
         else:
             agreement = agreements[0]
             agreement_bid = agreement[1]
             agreement_party = agreement[0]
-            save["did_accept"].append(True)
         if agreement_party is None:
             # No agreement was made (or rarely they accepted our first bid)
-            save["no_accepts"] += 1
+            accepts = "no_accepts"
         elif self.extract_name(agreement_party) == self.extract_name(self.me):
             # We sent the agreement
-            save["self_accepts"] += 1
+            accepts = "self_accepts"
         elif (self.other is not None) and self.extract_name(agreement_party) == self.other:
             # They accepted
-            save["opponent_accepts"] += 1
+            accepts = "opponent_accepts"
         else:
             # Only way I can imagine getting here is if we offered 
             # the first bid and the opponent accepted.
-            save["other_accepts"] = save.get("other_accepts", 0) + 1
-            pass
-        
+            accepts = "other_accepts"
+
         if agreement_bid is None:
             alpha_achieved = 0.0
         else:
             alpha_achieved = (float(self.profile.getUtility(agreement_bid)) - self.opp_best_self_util) / (1.0 - self.opp_best_self_util)
-        save["alphas"].append(self.alpha)
-        save["alpha_achieved"].append(alpha_achieved)
 
-        with open(f"{self.storage_dir}/{self.other}.json", "w") as f:
-            json.dump(save, f)
\ No newline at end of file
+        def update(save: dict) -> dict:
+            # the stored data is read again within the transaction, so that sessions
+            # against the same opponent that run in parallel are all counted
+            save["count"] += 1
+            save["test_bid_pool_size"] = len(self.bid_chooser.bid_pool)
+            save["test_time_list_self"] = self.time_estimator.self_times
+            #save["test_time_list_opp"] = self.time_estimator.opp_times_adj
+            save["test_offers_left"] = self.test_bids_left
+            save["self_diff"] = self.time_estimator.self_diff
+            save["opponent_model"] = opp_stuff
+            save["beta_values"].append(beta)
+            if not agreements:
+                save["time_factor"] = time_factor
+            save["did_accept"].append(bool(agreements))
+            save[accepts] = save.get(accepts, 0) + 1
+            save["alphas"].append(self.alpha)
+            save["alpha_achieved"].append(alpha_achieved)
+            return save
+
+        self.storage.update("opponent_data", self.other, update, self.new_opponent_data())
\ No newline at end of file
@@ -41,6 +41,8 @@ from geniusweb.progress.ProgressTime import ProgressTime
 from geniusweb.references.Parameters import Parameters
 from tudelft_utilities_logging.ReportToLogger import ReportToLogger
 
+from agents.common.bid_scoring import find_best_random_bid
+from agents.common.bidspace import BidSpace
 from agents.template_agent.utils.opponent_model import OpponentModel
 
 
@@ -49,6 +51,8 @@ class SmartAgent(DefaultParty):
         super().__init__()
 
         self.all_bid_list = None
+        self.bidspace: BidSpace = None
+        self.utilities = None
         self.logger: ReportToLogger = self.getReporter()
 
         self.domain: Domain = None
@@ -132,6 +136,8 @@ class SmartAgent(DefaultParty):
                 )
                 self.profile = profile_connection.getProfile()
                 self.domain = self.profile.getDomain()
+                self.bidspace = BidSpace(self.domain)
+                self.utilities = self.bidspace.utilities(self.profile)
 
                 if str(self.settings.getProtocol().getURI()) == "Learn":
                     self.learn()
@@ -286,7 +292,7 @@ class SmartAgent(DefaultParty):
         if isinstance(action, Offer):
             # create opponent model if it was not yet initialised
             if self.opponent_model is None:
-                self.opponent_model = OpponentModel(self.domain)
+                self.opponent_model = OpponentModel(self.domain, self.bidspace)
 
             bid = cast(Offer, action).getBid()
             # update opponent model with bid
@@ -437,21 +443,12 @@ class SmartAgent(DefaultParty):
         return self.utilitySpace.getUtility(bid) >= self.utilThreshold
 
     def find_bid(self) -> Bid:
-        # compose a list of all possible bids
-        domain = self.profile.getDomain()
-        all_bids = AllBidsList(domain)
-
-        best_bid_score = 0.0
-        best_bid = None
-
-        # take 500 attempts to find a bid according to a heuristic score
-        for _ in range(500):
-            bid = all_bids.get(randint(0, all_bids.size() - 1))
-            bid_score = self.score_bid(bid)
-            if bid_score > best_bid_score:
-                best_bid_score, best_bid = bid_score, bid
-
-        return best_bid
+        # take 500 random bids and pick the best according to a heuristic score,
+        # see score_bid. The candidates are scored all at once.
+        progress = self.progress.get(time() * 1000)
+        return find_best_random_bid(
+            self.bidspace, self.utilities, self.opponent_model, progress
+        )
 
     def score_bid(self, bid: Bid, alpha: float = 0.95, eps: float = 0.1) -> float:
         """Calculate heuristic score for a bid
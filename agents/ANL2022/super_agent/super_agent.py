@@ -1,6 +1,6 @@
 import logging
 import math
-import os.path
+import os
 import random
 import pickle
 from time import time
@@ -32,6 +32,8 @@ from geniusweb.profileconnection.ProfileConnectionFactory import (
 )
 from geniusweb.progress.ProgressRounds import ProgressRounds
 
+from agents.common.agent_storage import AgentStorage
+
 from .utils.utils import get_ms_current_time
 from .utils.pair import Pair
 from .utils.persistent_data import PersistentData
@@ -59,13 +61,9 @@ class SuperAgent(DefaultParty):
 
         self._best_offer_bid: Bid = None
         self._profile = None
-        self._persistent_path: str = None
         self._persistent_data: PersistentData = None
         # NeogtiationData
         self._negotiation_data: NegotiationData = None
-        self._data_paths_raw: List[str] = []
-        # self._data_paths: List[str] = []
-        self._negotiation_data_paths: List[str] = []
         self._opponent_name = None
         self._freq_map = defaultdict()
         self._avg_utility = 0.95
@@ -87,34 +85,54 @@ class SuperAgent(DefaultParty):
         self._sorted_bid_list: List = None
         self._len_sorted_bid_list: int = 0
         self._storage_dir: str = None
+        self._storage: AgentStorage = None
 
     def create_empty_negotiation_data(self, opponent_name):
         self._negotiation_data = NegotiationData(opponent_name=opponent_name)
 
     def initialize_negotiation_data(self, opponent_name):
-        self._negotiation_data_paths = []
-        data_path_raw = os.path.join(self._storage_dir, f"negotiation_data_{opponent_name}.log")
-        self._negotiation_data_paths.append(data_path_raw)
-        if self._negotiation_data is not None and os.path.exists(data_path_raw):
-            # print("non-empty NegotiationData")
-            with open(data_path_raw, "rb") as negotiation_data_file:
-                self._negotiation_data: NegotiationData = pickle.load(negotiation_data_file)
-        else:
-            # print("empty NegotiationData")
-            self.create_empty_negotiation_data(opponent_name=opponent_name)
+        # the negotiation data of previous sessions is only read when learning
+        self.create_empty_negotiation_data(opponent_name=opponent_name)
 
     def initialize_persistent_data(self, opponent_name):
-        self._persistent_path = os.path.join(self._storage_dir, f"persistent_data_{opponent_name}.log")
-        if self._persistent_path is not None and os.path.exists(self._persistent_path):
-            # json load
+        self.import_files(opponent_name)
+        persistent_data = self.load_persistent_data(opponent_name)
+        if persistent_data is not None:
             # print("non-empty PersistentData")
-            with open(self._persistent_path, "rb") as persistent_file:
-                self._persistent_data: PersistentData = pickle.load(persistent_file)
+            self._persistent_data: PersistentData = persistent_data
             self._avg_utility = self._persistent_data.get_avg_utility()
             self._std_utility = self._persistent_data.get_std_utility()
         else:
             self._persistent_data: PersistentData = PersistentData()
 
+    def load_persistent_data(self, opponent_name):
+        # the aggregates are stored as a record, storages of earlier versions hold a pickle
+        persistent_data = self._storage.get("persistent_data", opponent_name)
+        if isinstance(persistent_data, bytes):
+            return pickle.loads(persistent_data)
+        if persistent_data is not None:
+            return PersistentData.from_record(persistent_data)
+        return None
+
+    def import_files(self, opponent_name):
+        # the files of earlier versions of this agent are imported once. The negotiation
+        # data of the last session was not yet processed in the persistent data, so it
+        # becomes the first record of the log, see learn
+        def read_persistent_data(path):
+            with open(path, "rb") as f:
+                return pickle.load(f).to_record()
+
+        def read_negotiation_data(path):
+            with open(path, "rb") as f:
+                return [pickle.load(f).to_record()]
+
+        self._storage.import_file("persistent_data", opponent_name,
+                                  os.path.join(self._storage_dir, f"persistent_data_{opponent_name}.log"),
+                                  read_persistent_data)
+        self._storage.import_file("negotiation_data", opponent_name,
+                                  os.path.join(self._storage_dir, f"negotiation_data_{opponent_name}.log"),
+                                  read_negotiation_data, log=True)
+
     def first_better_then(self, utility):
         idx = None
         try:
@@ -160,7 +178,7 @@ class SuperAgent(DefaultParty):
         return None
 
     def initialize_storage(self, opponent_name):
-        if self._storage_dir is not None:
+        if self._storage is not None:
             self.initialize_persistent_data(opponent_name=opponent_name)
             self.initialize_negotiation_data(opponent_name=opponent_name)
         else:
@@ -181,6 +199,7 @@ class SuperAgent(DefaultParty):
             if "storage_dir" in self._parameters.getParameters():
                 self.getReporter().log(logging.INFO, "storage_dir is on parameters")
                 self._storage_dir = self._parameters.get("storage_dir")
+                self._storage = AgentStorage(self._storage_dir, "super_agent")
 
             try:
                 self._profile_interface: ProfileInterface = ProfileConnectionFactory.create(
@@ -256,14 +275,6 @@ class SuperAgent(DefaultParty):
             agreements: Agreements = finished_info.getAgreements()
             self.process_agreements(agreements)
             self.learn()
-            if self._negotiation_data_paths is not None and len(
-                    self._negotiation_data_paths) > 0 and self._negotiation_data is not None:
-                for negotiation_path in self._negotiation_data_paths:
-                    try:
-                        with open(negotiation_path, "wb") as negotiation_file:
-                            pickle.dump(self._negotiation_data, negotiation_file)
-                    except Exception as e:
-                        self.getReporter().log(logging.WARNING, "Error in {}".format(str(e)))
             self.terminate()
         else:
             self.getReporter().log(
@@ -287,6 +298,8 @@ class SuperAgent(DefaultParty):
         super().terminate()
         if self._profile_interface is not None:
             self._profile_interface.close()
+        if self._storage is not None:
+            self._storage.close()
 
     def value_to_str(self, v: Value, p: Pair) -> str:
         v_str = ""
@@ -462,20 +475,31 @@ class SuperAgent(DefaultParty):
 
     def learn(self):
         self.getReporter().log(logging.INFO, "party is learning")
-        # probably have to shift to self._negotiation_data_paths
-        for path in self._negotiation_data_paths:
-            try:
-                with open(path, "rb") as f:
-                    nego_data = pickle.load(f)
-                self._persistent_data.update(nego_data)
-            except Exception as e:
-                print("error in learn function - persistent data update, error:{}", str(e))
-
+        if self._storage is None or self._opponent_name is None:
+            return
+        # the negotiation data of every session is appended to a log per opponent, and
+        # the persistent data is a fold over that log: only the records appended since
+        # the last update are read and processed. This is one transaction, so that the
+        # records of parallel sessions against the same opponent are processed once.
+        # The persistent data is stored as a record of aggregates that does not grow
+        # with the number of sessions.
         try:
-            with open(self._persistent_path, "wb") as pers_file:
-                pickle.dump(self._persistent_data, pers_file)
+            with self._storage.transaction():
+                persistent_data = self.load_persistent_data(self._opponent_name)
+                if persistent_data is not None:
+                    self._persistent_data = persistent_data
+                processed = self._storage.get("negotiation_data_processed", self._opponent_name, 0)
+                new_records = self._storage.new_records("negotiation_data", self._opponent_name, processed)
+                for record_id, record in new_records:
+                    self._persistent_data.update(NegotiationData.from_record(record))
+                    processed = record_id
+                if new_records:
+                    self._storage.put("persistent_data", self._opponent_name, self._persistent_data.to_record())
+                    self._storage.put("negotiation_data_processed", self._opponent_name, processed)
+                if self._negotiation_data is not None:
+                    self._storage.append("negotiation_data", self._opponent_name, self._negotiation_data.to_record())
         except Exception as e:
-            print("error in persistent path dump:{}", str(e))
+            self.getReporter().log(logging.WARNING, "Error in {}".format(str(e)))
 
     def process_agreements(self, agreements: Agreements):
         # Check if we reached an agreement (walking away or passing the deadline
@@ -48,3 +48,17 @@ class NegotiationData:
 
     def get_opponent_util_by_time(self):
         return self._opponent_util_by_time
+
+    def to_record(self) -> dict:
+        # arguments of the constructor, as JSON serialisable values
+        return {
+            "max_received_util": float(self._max_received_util),
+            "agreement_util": float(self._agreement_util),
+            "opponent_name": self._opponent_name,
+            "opponent_util": float(self._opponent_util),
+            "opponent_util_by_time": [float(util) for util in self._opponent_util_by_time],
+        }
+
+    @classmethod
+    def from_record(cls, record: dict):
+        return cls(**record)
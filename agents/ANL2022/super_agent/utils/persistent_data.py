@@ -1,11 +1,17 @@
 from abc import ABC
 from collections import defaultdict
+from decimal import Decimal
 from typing import List
 from .negotiation_data import NegotiationData
 import math
 
 
 class PersistentData(ABC):
+    # aggregates over all negotiations, as stored by to_record
+    RECORD_FIELDS = ["avg_utility", "negotiations", "std_utility", "sum_results", "sum_squared_results",
+                     "avg_max_utility_opponent", "opponent_encounters", "avg_opponent_utility", "opponent_alpha",
+                     "opponent_utility_by_time"]
+
     def __init__(self):
         self._t_split: int = 40
         self._t_phase: float = 0.2
@@ -22,7 +28,9 @@ class PersistentData(ABC):
         self._opponent_encounters = defaultdict()
 
         self._std_utility: float = 0.0
-        self._nego_results: List[float] = []
+        # sums of the agreement utilities and their squares, for the standard deviation
+        self._sum_results: float = 0.0
+        self._sum_squared_results: float = 0.0
 
         self._avg_opponent_utility = defaultdict()
         self._opponent_alpha = defaultdict()
@@ -35,12 +43,13 @@ class PersistentData(ABC):
 
         self._negotiations += 1
 
-        self._nego_results.append(negotiation_data.get_agreement_util())
-        self._std_utility = 0.0
-
-        for util in self._nego_results:
-            self._std_utility += math.pow(util - self._avg_utility, 2)
-        self._std_utility = math.sqrt(self._std_utility / self._negotiations)
+        # standard deviation of the agreement utilities around the new average
+        agreement_util = negotiation_data.get_agreement_util()
+        self._sum_results += agreement_util
+        self._sum_squared_results += math.pow(agreement_util, 2)
+        variance = (self._sum_squared_results - 2 * self._avg_utility * self._sum_results) / self._negotiations + \
+            math.pow(self._avg_utility, 2)
+        self._std_utility = math.sqrt(max(variance, 0.0))
 
         opponent = negotiation_data.get_opponent_name()
 
@@ -79,6 +88,27 @@ class PersistentData(ABC):
         self._opponent_utility_by_time[opponent] = opponent_time_util
         self._opponent_alpha[opponent] = self._calc_alpha(opponent)
 
+    def to_record(self) -> dict:
+        # JSON serialisable, the size does not grow with the number of negotiations
+        return {field: getattr(self, f"_{field}") for field in PersistentData.RECORD_FIELDS}
+
+    @classmethod
+    def from_record(cls, record: dict):
+        persistent_data = cls()
+        for field, value in record.items():
+            setattr(persistent_data, f"_{field}", defaultdict(None, value) if isinstance(value, dict) else value)
+        return persistent_data
+
+    def __setstate__(self, state: dict):
+        # pickles of earlier versions keep all agreement utilities instead of their sums,
+        # and can hold Decimal utilities
+        state = _to_float(state)
+        nego_results = state.pop("_nego_results", None)
+        self.__dict__.update(state)
+        if nego_results is not None:
+            self._sum_results = sum(nego_results, 0.0)
+            self._sum_squared_results = sum((math.pow(util, 2) for util in nego_results), 0.0)
+
     def _known_opponent(self, opponent: str):
         return opponent in self._opponent_encounters
 
@@ -145,3 +175,15 @@ class PersistentData(ABC):
 
     def get_avg_utility(self):
         return self._avg_utility
+
+
+def _to_float(value):
+    # Decimal values (also in dicts and lists) as floats, dicts are converted in place
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, list):
+        return [_to_float(item) for item in value]
+    if isinstance(value, dict):
+        for key in value:
+            value[key] = _to_float(value[key])
+    return value
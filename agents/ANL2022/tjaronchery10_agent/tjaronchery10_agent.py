@@ -1,4 +1,5 @@
 import json
+import os
 import random
 import logging
 from random import randint
@@ -30,6 +31,7 @@ from geniusweb.progress.ProgressTime import ProgressTime
 from geniusweb.references.Parameters import Parameters
 from tudelft_utilities_logging.ReportToLogger import ReportToLogger
 
+from agents.common.agent_storage import AgentStorage
 from .utils.opponent_model import OpponentModel
 
 
@@ -50,6 +52,7 @@ class Tjaronchery10Agent(DefaultParty):
         self.other: str = None
         self.settings: Settings = None
         self.storage_dir: str = None
+        self.storage: AgentStorage = None
         self.datii = ""
         self.last_received_bid: Bid = None
         self.counter = 0
@@ -79,6 +82,8 @@ class Tjaronchery10Agent(DefaultParty):
 
             self.parameters = self.settings.getParameters()
             self.storage_dir = self.parameters.get("storage_dir")
+            if self.storage_dir is not None:
+                self.storage = AgentStorage(self.storage_dir, "tjaronchery10_agent")
 
             # the profile contains the preferences of the agent over the domain
             profile_connection = ProfileConnectionFactory.create(
@@ -100,24 +105,19 @@ class Tjaronchery10Agent(DefaultParty):
                 self.other = str(actor).rsplit("_", 1)[0]
 
                 if self.counter > 3:
-                    with open(f"{self.storage_dir}/{self.other}datatactic.txt", "r") as t:
-                        shura = t.readline()
-                        if shura.__contains__("tac2"):
+                    self.import_files(self.other)
+                    shura = self.storage.get("datatactic", self.other, "")
+                    if shura.__contains__("tac2"):
+                        self.tatic = 2
+                    else:
+                        # only the last three results are read from the log
+                        last_lines = self.storage.records("data", self.other, last=3)
+                        if last_lines[0] == '0' and last_lines[1] == '0' and last_lines[2] == '0':
+                            # print("THIS IS MACABBIIIIIIIIIIIIIIIIIIIIIII")
                             self.tatic = 2
-                            t.close()
+                            self.storage.put("datatactic", self.other, "tac2")
                         else:
-                            with open(f"{self.storage_dir}/{self.other}data.txt", "r") as f:
-                                lines = f.readlines()
-                                last_lines = lines[-3:]
-                                if last_lines[0] == '0\n' and last_lines[1] == '0\n' and last_lines[2] == '0\n':
-                                    # print("THIS IS MACABBIIIIIIIIIIIIIIIIIIIIIII")
-                                    self.tatic = 2
-                                    with open(f"{self.storage_dir}/{self.other}datatactic.txt", "a") as x:
-                                        x.write("tac2")
-                                        x.close()
-                                else:
-                                    self.tatic = 1
-                                f.close()
+                            self.tatic = 1
                 self.flag = 1
                 # process action done by opponent
                 self.opponent_action(action)
@@ -129,6 +129,8 @@ class Tjaronchery10Agent(DefaultParty):
         # Finished will be send if the negotiation has ended (through agreement or deadline)
         elif isinstance(data, Finished):
             self.save_data()
+            if self.storage is not None:
+                self.storage.close()
             # terminate the agent MUST BE CALLED
             self.logger.log(logging.INFO, "party is terminating:")
             super().terminate()
@@ -191,28 +193,24 @@ class Tjaronchery10Agent(DefaultParty):
         """
         # check if the last received offer is good enough
         if self.minicount == 0:
-            try:
-                with open(f"{self.storage_dir}/{self.other}counter.txt", "r") as tt:
-                    a = 1
-                    content = tt.readlines()
-                    tt.close()
-                    for line in content:
-                        for i in line:
-                            # Checking for the digit in
-                            # the string
-                            if i.isdigit() == True:
-                                a += int(i)
-                    num = a
-                    self.counter = num
-                    print("this is macabiiiiiiiiiiiiiii")
-                    print(num)
-                try:
-                    with open(f"{self.storage_dir}/{self.other}counter.txt", "w") as ttt:
-                        ttt.write(num.__str__())
-                        ttt.close()
-                except FileNotFoundError:
-                    print("file does not exist1 :(")
-            except FileNotFoundError:
+            content = None
+            if self.storage is not None:
+                self.import_files(str(self.other))
+                content = self.storage.get("counter", str(self.other))
+            if content is not None:
+                a = 1
+                for line in content.splitlines():
+                    for i in line:
+                        # Checking for the digit in
+                        # the string
+                        if i.isdigit() == True:
+                            a += int(i)
+                num = a
+                self.counter = num
+                print("this is macabiiiiiiiiiiiiiii")
+                print(num)
+                self.storage.put("counter", str(self.other), num.__str__())
+            else:
                 print("file does not exist counter :(")
         self.minicount = 1
 
@@ -240,24 +238,31 @@ class Tjaronchery10Agent(DefaultParty):
         s = self.datii
         t = self.me.__str__()
         r = self.settings.getID().__str__()
-        y = self.other
-        # path = self.storage_dir
-        # path = f"{self.storage_dir}/{y}"
-        # print(path)
+        y = str(self.other)
 
         if progress == 1:
             s = 0
-        with open(f"{self.storage_dir}/{y}data.txt", "a") as f:
-            f.write(f"{s}\n")
-            f.close()
-        with open(f"{self.storage_dir}/{y}datatactic.txt", "a") as t:
-            t.close()
-        if self.counter == 0:
-            print("OPEN FILEEEEEEEEE")
-            with open(f"{self.storage_dir}/{y}counter.txt", "a") as x:
-                x.write("1\n")
-                x.close()
-
+        if self.storage is None:
+            return
+        with self.storage.transaction():
+            self.storage.append("data", y, f"{s}")
+            if self.counter == 0:
+                print("OPEN FILEEEEEEEEE")
+                self.storage.update("counter", y, lambda content: content + "1\n", "")
+
+    def import_files(self, other: str):
+        # the txt files of earlier versions of this agent are imported once
+        def read_text(path):
+            with open(path, "r") as f:
+                return f.read()
+
+        def read_lines(path):
+            with open(path, "r") as f:
+                return f.read().splitlines()
+
+        self.storage.import_file("data", other, os.path.join(self.storage_dir, f"{other}data.txt"), read_lines, log=True)
+        self.storage.import_file("datatactic", other, os.path.join(self.storage_dir, f"{other}datatactic.txt"), read_text)
+        self.storage.import_file("counter", other, os.path.join(self.storage_dir, f"{other}counter.txt"), read_text)
 
     ###########################################################################################
     ################################## Example methods below ##################################
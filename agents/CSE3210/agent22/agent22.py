@@ -42,6 +42,7 @@ class Agent22(DefaultParty):
         self._last_received_bid: Bid = None
         self._progress: Progress = None  # type:ignore
         self._extendedspace: ExtendedUtilSpace = None
+        self._utilspace: LinearAdditive = None
         self.issue_names = []
         self.bidList: list[Bid] = []
         self.bidListOpp: list[Bid] = []
@@ -153,7 +154,10 @@ class Agent22(DefaultParty):
 
     def _updateExtUtilSpace(self):  # throws IOException
         new_utilspace: LinearAdditive = self._profile.getProfile()
-        self._extendedspace = ExtendedUtilSpace(new_utilspace)
+        # the profile is hashed and indexed again only when it changed
+        if self._extendedspace is None or not new_utilspace == self._utilspace:
+            self._utilspace = new_utilspace
+            self._extendedspace = ExtendedUtilSpace(new_utilspace)
 
     def _findBid(self) -> Bid:
         beta = self._checkStrategyOpp()
@@ -141,7 +141,9 @@ class Bidding():
         newutilspace = self._profileint.getProfile()
         if not newutilspace == self._utilspace:
             self._utilspace = cast(LinearAdditive, newutilspace)
-            self._extendedspace = ExtendedUtilSpace(self._utilspace)
+            self._extendedspace = ExtendedUtilSpace(
+                self._utilspace, self._settings.getProfile().getURI()
+            )
         return self._utilspace
 
     """Method to select bids to make. Works with stateful stack- _bids_to_make_stack. 
@@ -0,0 +1,278 @@
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from threading import RLock
+from typing import Any, Callable, List, Tuple
+
+DATABASE_FILE = "agent_storage.db"
+# reads are served from a memory map of the database file up to this size (bytes)
+MMAP_SIZE = 256 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    agent TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    opponent TEXT NOT NULL,
+    value,
+    PRIMARY KEY (agent, kind, opponent)
+);
+CREATE TABLE IF NOT EXISTS log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    agent TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    opponent TEXT NOT NULL,
+    value
+);
+CREATE INDEX IF NOT EXISTS log_opponent ON log (agent, kind, opponent, id);
+"""
+
+
+class AgentStorage:
+    """Learning data of an agent, kept in one SQLite database per storage_dir that is
+    shared by all agents and all sessions (also parallel ones) that use the
+    storage_dir. The database is in WAL mode, so readers do not block the writer,
+    and every write is a transaction, so data is never half written.
+
+    Data is keyed by the kind of data and the opponent, within the namespace of the
+    agent. There are two types of data:
+        - records: one value per key, that is replaced (`put`) or read-modify-
+          written in one transaction (`update`)
+        - logs: values that are appended per key (`append`) and read back in the
+          order they were appended (`records`), without rewriting earlier values.
+          Every value has an increasing ID, so that a log can be processed
+          incrementally (`new_records`)
+
+    Values are stored as JSON, except bytes (e.g. pickles) which are stored as is.
+    Data that an agent kept in its own files before can be imported with
+    `import_file`.
+
+    Args:
+        storage_dir (str): storage directory of the agent (the "storage_dir"
+            parameter), created if it does not exist
+        agent (str): namespace of the agent, e.g. its module name
+        timeout (float, optional): seconds to wait for a lock of another process.
+            Defaults to 30.
+    """
+
+    def __init__(self, storage_dir: str, agent: str, timeout: float = 30.0):
+        os.makedirs(storage_dir, exist_ok=True)
+        self.path = os.path.join(storage_dir, DATABASE_FILE)
+        self.agent = agent
+
+        # transactions are started explicitly (isolation_level=None), a lock makes
+        # the connection safe to use from the threads of the agent
+        self._connection = sqlite3.connect(
+            self.path, timeout=timeout, isolation_level=None, check_same_thread=False
+        )
+        self._lock = RLock()
+        self._depth = 0
+
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+            with self.transaction():
+                for statement in _SCHEMA.split(";"):
+                    if statement.strip():
+                        self._connection.execute(statement)
+
+    @contextmanager
+    def transaction(self):
+        """Group reads and writes in one transaction. The write lock of the database
+        is taken at the start, so that a read-modify-write is not interleaved with
+        the writes of other sessions. Transactions can be nested.
+        """
+        with self._lock:
+            if self._depth == 0:
+                self._connection.execute("BEGIN IMMEDIATE")
+            self._depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._connection.execute("ROLLBACK")
+                raise
+            self._depth -= 1
+            if self._depth == 0:
+                self._connection.execute("COMMIT")
+
+    def get(self, kind: str, opponent: str, default: Any = None) -> Any:
+        """Value of a record, or the default if it does not exist"""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value FROM records WHERE agent = ? AND kind = ? AND opponent = ?",
+                (self.agent, kind, opponent),
+            ).fetchone()
+        return default if row is None else _decode(row[0])
+
+    def put(self, kind: str, opponent: str, value: Any, json_default: Callable = None):
+        """Set the value of a record.
+
+        Args:
+            kind (str): kind of data
+            opponent (str): name of the opponent
+            value (Any): JSON serialisable value or bytes
+            json_default (Callable, optional): converts objects that are not JSON
+                serialisable, see the "default" of `json.dumps`. Defaults to None.
+        """
+        with self.transaction():
+            self._connection.execute(
+                "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?)",
+                (self.agent, kind, opponent, _encode(value, json_default)),
+            )
+
+    def update(
+        self,
+        kind: str,
+        opponent: str,
+        update: Callable[[Any], Any],
+        default: Any = None,
+    ) -> Any:
+        """Read-modify-write a record in one transaction, so that concurrent updates
+        of other sessions are not lost.
+
+        Args:
+            kind (str): kind of data
+            opponent (str): name of the opponent
+            update (Callable[[Any], Any]): returns the new value from the current
+                value (or the default if the record does not exist)
+            default (Any, optional): value of a record that does not exist.
+                Defaults to None.
+
+        Returns:
+            Any: the new value
+        """
+        with self.transaction():
+            value = update(self.get(kind, opponent, default))
+            self.put(kind, opponent, value)
+        return value
+
+    def append(self, kind: str, opponent: str, value: Any):
+        """Append a value to a log"""
+        with self.transaction():
+            self._connection.execute(
+                "INSERT INTO log (agent, kind, opponent, value) VALUES (?, ?, ?, ?)",
+                (self.agent, kind, opponent, _encode(value)),
+            )
+
+    def records(self, kind: str, opponent: str, last: int = None) -> List[Any]:
+        """Values of a log, in the order they were appended.
+
+        Args:
+            kind (str): kind of data
+            opponent (str): name of the opponent
+            last (int, optional): only the last number of values. Defaults to all.
+
+        Returns:
+            List[Any]: the values
+        """
+        query = (
+            "SELECT id, value FROM log WHERE agent = ? AND kind = ? AND opponent = ?"
+        )
+        parameters = (self.agent, kind, opponent)
+        if last is not None:
+            # newest first with the index, then back to the order of appending
+            query = (
+                f"SELECT id, value FROM ({query} ORDER BY id DESC LIMIT ?) ORDER BY id"
+            )
+            parameters += (last,)
+        else:
+            query += " ORDER BY id"
+
+        with self._lock:
+            rows = self._connection.execute(query, parameters).fetchall()
+        return [_decode(value) for _, value in rows]
+
+    def new_records(
+        self, kind: str, opponent: str, after: int = 0
+    ) -> List[Tuple[int, Any]]:
+        """Values of a log that were appended after the value with the given ID, to
+        process a log incrementally. Only the new values are read, using the index
+        on the opponent.
+
+        Args:
+            kind (str): kind of data
+            opponent (str): name of the opponent
+            after (int, optional): ID of the last value that was processed.
+                Defaults to 0 (all values).
+
+        Returns:
+            List[Tuple[int, Any]]: IDs and values, in the order they were appended
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id, value FROM log "
+                "WHERE agent = ? AND kind = ? AND opponent = ? AND id > ? ORDER BY id",
+                (self.agent, kind, opponent, after),
+            ).fetchall()
+        return [(record_id, _decode(value)) for record_id, value in rows]
+
+    def import_file(
+        self,
+        kind: str,
+        opponent: str,
+        path: str,
+        read: Callable[[str], Any],
+        log: bool = False,
+    ) -> bool:
+        """Import data that the agent kept in its own file before it used the storage,
+        such that earlier learning is not lost. The file is only imported if it
+        exists and there is no data of this kind for the opponent yet, so it is
+        imported once. The file itself is left as is.
+
+        Args:
+            kind (str): kind of data
+            opponent (str): name of the opponent
+            path (str): the file
+            read (Callable[[str], Any]): reads the file (given its path) and returns
+                the value of the record, or the values of the log
+            log (bool, optional): import the values of a log instead of a record.
+                Defaults to False.
+
+        Returns:
+            bool: True if the file was imported
+        """
+        if not os.path.exists(path):
+            return False
+
+        table = "log" if log else "records"
+        with self.transaction():
+            row = self._connection.execute(
+                f"SELECT 1 FROM {table} WHERE agent = ? AND kind = ? AND opponent = ? "
+                "LIMIT 1",
+                (self.agent, kind, opponent),
+            ).fetchone()
+            if row is not None:
+                return False
+
+            value = read(path)
+            if log:
+                for log_value in value:
+                    self.append(kind, opponent, log_value)
+            else:
+                self.put(kind, opponent, value)
+        return True
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _encode(value: Any, json_default: Callable = None):
+    if isinstance(value, bytes):
+        return value
+    return json.dumps(value, default=json_default)
+
+
+def _decode(value):
+    if isinstance(value, bytes):
+        return value
+    return json.loads(value)
@@ -0,0 +1,134 @@
+import logging
+import traceback
+from collections import deque
+from threading import Condition, Thread
+from time import perf_counter
+from typing import Any, Callable, Deque, Tuple
+
+from tudelft_utilities_logging.Reporter import Reporter
+
+
+class BackgroundTrainer:
+    """Trains models in a background thread, so that fitting a model does not stall
+    the turn of an agent. Agents submit training data and keep using the last good
+    model until a new one is ready, which is then swapped in atomically.
+
+    Submitting never blocks: at most `max_pending` submissions wait to be trained,
+    and the oldest waiting submission is dropped when a new one arrives (a model is
+    only useful when it is trained on the latest data). Submitted data must not be
+    modified afterwards, pass copies.
+
+    Args:
+        fit (Callable[..., Any]): trains a model on the submitted arguments and
+            returns it
+        max_pending (int, optional): maximum number of waiting submissions.
+            Defaults to 1.
+        synchronous (bool, optional): train within `submit` instead, e.g. for
+            reproducible runs. Defaults to False.
+        reporter (Reporter, optional): reporter for failed fits. Defaults to
+            printing the traceback.
+    """
+
+    def __init__(
+        self,
+        fit: Callable[..., Any],
+        max_pending: int = 1,
+        synchronous: bool = False,
+        reporter: Reporter = None,
+    ):
+        self.fit = fit
+        self.synchronous = synchronous
+        self.reporter = reporter
+
+        self.model = None
+        # number of models that were swapped in, to detect a new model
+        self.version = 0
+        self.last_fit_ms = 0.0
+        self.dropped = 0
+
+        self._pending: Deque[Tuple[tuple, dict]] = deque(maxlen=max_pending)
+        self._training = False
+        self._closed = False
+        self._condition = Condition()
+        self._thread: Thread = None
+
+    def submit(self, *args, **kwargs):
+        """Train a new model on the given arguments of `fit`, without waiting for it"""
+        if self.synchronous:
+            self._train(args, kwargs)
+            return
+
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("the trainer is closed")
+            if len(self._pending) == self._pending.maxlen:
+                self.dropped += 1
+            self._pending.append((args, kwargs))
+            if self._thread is None:
+                self._thread = Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+
+    def latest(self) -> Tuple[Any, int]:
+        """The last good model and its version, read together"""
+        with self._condition:
+            return self.model, self.version
+
+    def wait(self, timeout: float = None) -> bool:
+        """Wait until all submitted data is trained on.
+
+        Args:
+            timeout (float, optional): maximum time to wait in seconds. Defaults to
+                waiting without limit.
+
+        Returns:
+            bool: False if the timeout expired first
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not self._pending and not self._training, timeout
+            )
+
+    def close(self):
+        """Stop the background thread, waiting submissions are dropped"""
+        with self._condition:
+            self._closed = True
+            self._pending.clear()
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._closed)
+                if self._closed:
+                    return
+                args, kwargs = self._pending.popleft()
+                self._training = True
+
+            try:
+                self._train(args, kwargs)
+            finally:
+                with self._condition:
+                    self._training = False
+                    self._condition.notify_all()
+
+    def _train(self, args: tuple, kwargs: dict):
+        start = perf_counter()
+        try:
+            model = self.fit(*args, **kwargs)
+        except Exception:
+            # keep the last good model
+            if self.reporter is not None:
+                self.reporter.log(
+                    logging.WARNING, f"training failed: {traceback.format_exc()}"
+                )
+            else:
+                traceback.print_exc()
+            return
+
+        with self._condition:
+            self.model = model
+            self.version += 1
+            self.last_fit_ms = (perf_counter() - start) * 1000
@@ -0,0 +1,75 @@
+from typing import Optional
+
+import numpy as np
+from geniusweb.issuevalue.Bid import Bid
+
+from .bidspace import BidSpace
+from .opponent_model import OpponentModel
+
+
+def score_bids(
+    our_utilities: np.ndarray,
+    opponent_utilities: Optional[np.ndarray],
+    progress: float,
+    alpha: float = 0.95,
+    eps: float = 0.1,
+) -> np.ndarray:
+    """Calculate the heuristic score of the template agent for many bids at once
+
+    Args:
+        our_utilities (np.ndarray): our utility per bid
+        opponent_utilities (np.ndarray, optional): predicted opponent utility per bid,
+            None if there is no opponent model yet.
+        progress (float): progress of the negotiation session between 0 and 1
+        alpha (float, optional): Trade-off factor between self interested and
+            altruistic behaviour. Defaults to 0.95.
+        eps (float, optional): Time pressure factor, balances between conceding
+            and Boulware behaviour over time. Defaults to 0.1.
+
+    Returns:
+        np.ndarray: score per bid
+    """
+    time_pressure = 1.0 - progress ** (1 / eps)
+    scores = alpha * time_pressure * our_utilities
+
+    if opponent_utilities is not None:
+        scores = scores + (1.0 - alpha * time_pressure) * opponent_utilities
+
+    return scores
+
+
+def find_best_random_bid(
+    bidspace: BidSpace,
+    our_utilities: np.ndarray,
+    opponent_model: Optional[OpponentModel],
+    progress: float,
+    num_candidates: int = 500,
+    alpha: float = 0.95,
+    eps: float = 0.1,
+) -> Bid:
+    """Draw random bids and return the one with the highest heuristic score. All
+    candidates are scored at once, with a single progress value.
+
+    Args:
+        bidspace (BidSpace): bid space to draw the bids from
+        our_utilities (np.ndarray): our utility of every bid of the bid space
+        opponent_model (OpponentModel, optional): model to predict the opponent utility
+        progress (float): progress of the negotiation session between 0 and 1
+        num_candidates (int, optional): number of random bids. Defaults to 500.
+        alpha (float, optional): see `score_bids`. Defaults to 0.95.
+        eps (float, optional): see `score_bids`. Defaults to 0.1.
+
+    Returns:
+        Bid: best scoring candidate
+    """
+    candidates = np.random.randint(0, bidspace.size, num_candidates)
+
+    opponent_utilities = None
+    if opponent_model is not None:
+        opponent_utilities = opponent_model.predict_many(bidspace.matrix[candidates])
+
+    scores = score_bids(
+        our_utilities[candidates], opponent_utilities, progress, alpha, eps
+    )
+
+    return bidspace.bid(candidates[np.argmax(scores)])
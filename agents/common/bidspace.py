@@ -0,0 +1,204 @@
+from random import randint
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from geniusweb.issuevalue.Bid import Bid
+from geniusweb.issuevalue.DiscreteValueSet import DiscreteValueSet
+from geniusweb.issuevalue.Domain import Domain
+from geniusweb.issuevalue.Value import Value
+from geniusweb.profile.utilityspace.LinearAdditive import LinearAdditive
+
+
+class BidSpace:
+    """Compiled representation of all bids of a discrete domain. Every bid is a row
+    of value indices (one column per issue), and is identified by its row number in
+    the `matrix`. Bid objects are only created for the bids that are asked for.
+    """
+
+    def __init__(self, domain: Domain):
+        self.domain = domain
+        self.issues: List[str] = sorted(domain.getIssues())
+
+        self.values: List[List[Value]] = []
+        for issue in self.issues:
+            value_set = domain.getValues(issue)
+            if not isinstance(value_set, DiscreteValueSet):
+                raise TypeError(
+                    "The bid space only supports issues with discrete values"
+                )
+            self.values.append([value_set.get(i) for i in range(value_set.size())])
+
+        self.value_index: List[Dict[Value, int]] = [
+            {value: i for i, value in enumerate(values)} for values in self.values
+        ]
+        self.shape = tuple(len(values) for values in self.values)
+        self.size = int(np.prod(self.shape, dtype=np.int64))
+        # row number of a bid is its value indices in a mixed radix system
+        self.strides = np.cumprod((self.shape[1:] + (1,))[::-1])[::-1]
+
+        self._matrix: np.ndarray = None
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """(size x issues) matrix with the value indices of all bids, built on first use"""
+        if self._matrix is None:
+            dtype = np.min_scalar_type(max(self.shape) - 1)
+            columns = np.unravel_index(np.arange(self.size), self.shape)
+            self._matrix = np.stack(columns, axis=1).astype(dtype)
+        return self._matrix
+
+    def bid(self, index: int) -> Bid:
+        """Convert a bid index to a Bid object"""
+        value_indices = np.unravel_index(int(index), self.shape)
+        return Bid(
+            {
+                issue: values[i]
+                for issue, values, i in zip(self.issues, self.values, value_indices)
+            }
+        )
+
+    def index(self, bid: Bid) -> int:
+        """Convert a Bid object to its bid index"""
+        return int(np.dot(self.encode_bid(bid), self.strides))
+
+    def encode_bid(self, bid: Bid) -> np.ndarray:
+        """Convert a Bid object to its row of value indices"""
+        return np.array(
+            [
+                value_index[bid.getValue(issue)]
+                for issue, value_index in zip(self.issues, self.value_index)
+            ]
+        )
+
+    def encode(self, bids: Iterable[Bid]) -> np.ndarray:
+        """Convert Bid objects to a (bids x issues) matrix of value indices"""
+        issue_indices = list(zip(self.issues, self.value_index))
+        rows = [
+            [value_index[bid.getValue(issue)] for issue, value_index in issue_indices]
+            for bid in bids
+        ]
+        return np.array(rows, dtype=np.int64).reshape(len(rows), len(self.issues))
+
+    def value_utilities(self, profile: LinearAdditive) -> List[np.ndarray]:
+        """Weighted utility of every value per issue, such that the utility of a bid
+        is the sum of the weighted utilities of its values.
+        """
+        utilities = profile.getUtilities()
+        return [
+            float(profile.getWeight(issue))
+            * np.array([float(utilities[issue].getUtility(v)) for v in values])
+            for issue, values in zip(self.issues, self.values)
+        ]
+
+    def utilities(
+        self, profile: LinearAdditive, matrix: np.ndarray = None
+    ) -> np.ndarray:
+        """Utilities of bids according to a profile, as floats.
+
+        Args:
+            profile (LinearAdditive): profile to evaluate the bids with
+            matrix (np.ndarray, optional): value indices of the bids to evaluate.
+                Defaults to all bids of the domain.
+
+        Returns:
+            np.ndarray: utility per bid
+        """
+        if matrix is None:
+            matrix = self.matrix
+
+        # concatenate the per issue tables, so that one lookup and one sum evaluate
+        # the bids (equal to a dot product with a one-hot encoding of the bids)
+        value_utilities = self.value_utilities(profile)
+        offsets = np.cumsum([0] + [len(u) for u in value_utilities[:-1]])
+        table = np.concatenate(value_utilities)
+
+        return table[matrix + offsets].sum(axis=1)
+
+
+class UtilityIndex:
+    """Bids of a BidSpace sorted by their utility for a profile. Supports fast
+    queries for the best bid and for (random) bids within a utility range.
+    """
+
+    def __init__(self, bidspace: BidSpace, profile: LinearAdditive):
+        self.bidspace = bidspace
+        self.profile = profile
+        self.utilities = bidspace.utilities(profile)
+
+        # ascending order, ties are kept in order of the bid index
+        self.order = np.argsort(self.utilities, kind="stable")
+        self.sorted_utilities = self.utilities[self.order]
+
+    def best(self) -> int:
+        """Index of the bid with the highest utility, the lowest bid index if tied.
+
+        Note that the bid index follows the sorted issues of the bid space, so among
+        tied bids this is not necessarily the first bid of geniusweb's `AllBidsList`.
+        """
+        first = np.searchsorted(self.sorted_utilities, self.sorted_utilities[-1])
+        return int(self.order[first])
+
+    def worst(self) -> int:
+        """Index of the bid with the lowest utility"""
+        return int(self.order[0])
+
+    def max_utility(self) -> float:
+        return float(self.sorted_utilities[-1])
+
+    def min_utility(self) -> float:
+        return float(self.sorted_utilities[0])
+
+    def _bounds(self, low: float, high: float):
+        start = np.searchsorted(self.sorted_utilities, low, side="left")
+        stop = np.searchsorted(self.sorted_utilities, high, side="right")
+        return start, max(start, stop)
+
+    def count(self, low: float = -np.inf, high: float = np.inf) -> int:
+        """Number of bids with a utility in [low, high]"""
+        start, stop = self._bounds(low, high)
+        return int(stop - start)
+
+    def range(self, low: float = -np.inf, high: float = np.inf) -> np.ndarray:
+        """Indices of the bids with a utility in [low, high], sorted by utility"""
+        start, stop = self._bounds(low, high)
+        return self.order[start:stop]
+
+    def at_least(self, threshold: float, margin: float = 1e-9) -> np.ndarray:
+        """Indices of the bids with an exact (Decimal) utility of at least `threshold`,
+        sorted by utility. Only the bids with a float utility within `margin` of the
+        threshold are evaluated with the profile, to correct for float rounding.
+        """
+        low, high = float(threshold) - margin, float(threshold) + margin
+        candidates = self.range(low=low)
+        num_close = self.count(low, high)
+        close = candidates[:num_close]
+        keep = [self.profile.getUtility(self.bid(i)) >= threshold for i in close]
+        return np.concatenate(
+            [close[np.array(keep, dtype=bool)], candidates[num_close:]]
+        )
+
+    def sample(self, low: float = -np.inf, high: float = np.inf) -> Optional[int]:
+        """Index of a random bid with a utility in [low, high], or None if there is
+        no such bid.
+        """
+        start, stop = self._bounds(low, high)
+        if stop == start:
+            return None
+        return int(self.order[randint(start, stop - 1)])
+
+    def sample_many(
+        self,
+        num: int,
+        low: float = -np.inf,
+        high: float = np.inf,
+        rng: np.random.Generator = None,
+    ) -> np.ndarray:
+        """Indices of `num` random bids (with replacement) with a utility in [low, high]"""
+        start, stop = self._bounds(low, high)
+        if stop == start:
+            return np.empty(0, dtype=self.order.dtype)
+        rng = rng if rng is not None else np.random.default_rng()
+        return self.order[rng.integers(start, stop, size=num)]
+
+    def bid(self, index: int) -> Bid:
+        return self.bidspace.bid(index)
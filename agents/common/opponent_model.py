@@ -0,0 +1,141 @@
+import numpy as np
+from geniusweb.issuevalue.Bid import Bid
+from geniusweb.issuevalue.Domain import Domain
+
+from .bidspace import BidSpace
+
+
+class OpponentModel:
+    """Frequency based opponent model. Counts how often the opponent offered every
+    value of every issue. Issues on which the opponent rarely changes its value are
+    predicted to be important, and frequently offered values to be preferred.
+
+    The counts are stored in one (issues x values) array, so an update costs
+    O(issues) and the whole bid space can be scored at once with `predict_many`.
+    An issue that is missing from a partial bid is counted as one more value of that
+    issue.
+    """
+
+    def __init__(self, domain: Domain, bidspace: BidSpace = None):
+        self.offers = []
+        self.domain = domain
+        self.bidspace = bidspace if bidspace is not None else BidSpace(domain)
+
+        self.num_values = np.array(self.bidspace.shape)
+        self._issue_range = np.arange(len(self.num_values))
+
+        # rows are issues, columns are values (padded up to the largest issue), and
+        # the column after the values of an issue counts the bids without that issue
+        self.value_counts = np.zeros(
+            (len(self.num_values), max(self.num_values) + 1), dtype=np.int64
+        )
+        self.max_value_counts = np.zeros(len(self.num_values), dtype=np.int64)
+
+        # predictions are only recalculated when they are needed after an update
+        self._issue_weights = None
+        self._value_utilities = None
+
+    def update(self, bid: Bid):
+        # keep track of all bids received
+        self.offers.append(bid)
+
+        # register the offered value of every issue
+        value_indices = self._encode_bid(bid)
+        self.value_counts[self._issue_range, value_indices] += 1
+        self.max_value_counts = np.maximum(
+            self.max_value_counts, self.value_counts[self._issue_range, value_indices]
+        )
+
+        self._issue_weights = None
+        self._value_utilities = None
+
+    def get_issue_weights(self) -> np.ndarray:
+        """Predicted issue weights (normalised to sum to 1.0), in the issue order of
+        the bid space.
+
+        The intuition here is that if the values of the received offers spread out
+        over all possible values, then this issue is likely not important to the
+        opponent (weight == 0.0). If all received offers proposed the same value for
+        this issue, then the predicted issue weight == 1.0 (before normalisation).
+        """
+        if self._issue_weights is None:
+            self._issue_weights, self._value_utilities = self._predict()
+        return self._issue_weights
+
+    def get_value_utilities(self) -> np.ndarray:
+        """Predicted utility of every value, as (issues x values) array. The column
+        after the values of an issue is the utility of a bid without that issue.
+        """
+        if self._value_utilities is None:
+            self._issue_weights, self._value_utilities = self._predict()
+        return self._value_utilities
+
+    def _predict(self):
+        bids_received = len(self.offers)
+        max_counts = self.max_value_counts.astype(float)
+
+        # predicted issue weight, see get_issue_weights
+        equal_shares = bids_received / self.num_values
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weights = (max_counts - equal_shares) / (bids_received - equal_shares)
+        # an issue with a single value tells nothing about the opponent
+        weights = np.where(self.num_values > 1, weights, 0.0)
+
+        # value utility relative to the most offered value, counts are compressed
+        # more the less important the issue is
+        exponent = (1 - np.minimum(weights, 1.0))[:, None]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            value_utilities = ((self.value_counts + 1) ** exponent - 1) / (
+                (max_counts[:, None] + 1) ** exponent - 1
+            )
+        offered = (self.value_counts > 0).astype(float)
+        value_utilities = np.where(weights[:, None] < 1, value_utilities, offered)
+        value_utilities = np.nan_to_num(value_utilities)
+
+        # normalise the issue weights such that the sum is 1.0
+        total_issue_weight = weights.sum()
+        if total_issue_weight == 0.0:
+            issue_weights = np.full(len(weights), 1 / len(weights))
+        else:
+            issue_weights = weights / total_issue_weight
+
+        return issue_weights, value_utilities
+
+    def predict_many(self, bid_index_matrix: np.ndarray) -> np.ndarray:
+        """Predicted utility of many bids at once.
+
+        Args:
+            bid_index_matrix (np.ndarray): value indices of the bids (one row per bid,
+                one column per issue), e.g. `BidSpace.matrix` to score all bids.
+
+        Returns:
+            np.ndarray: predicted utility per bid
+        """
+        if len(self.offers) == 0:
+            return np.zeros(len(bid_index_matrix))
+
+        value_utilities = self.get_value_utilities()[
+            self._issue_range, bid_index_matrix
+        ]
+        return value_utilities @ self.get_issue_weights()
+
+    def get_predicted_utility(self, bid: Bid):
+        if len(self.offers) == 0 or bid is None:
+            return 0
+
+        bid_index_matrix = self._encode_bid(bid)[None, :]
+        return float(self.predict_many(bid_index_matrix)[0])
+
+    def _encode_bid(self, bid: Bid) -> np.ndarray:
+        # like BidSpace.encode_bid, but an issue that is missing from a partial bid
+        # gets the index after the values of that issue
+        return np.array(
+            [
+                num_values if value is None else value_index[value]
+                for value, value_index, num_values in zip(
+                    map(bid.getValue, self.bidspace.issues),
+                    self.bidspace.value_index,
+                    self.num_values,
+                )
+            ]
+        )
@@ -0,0 +1,74 @@
+import os
+from threading import Lock
+from typing import Dict, Tuple
+from urllib.parse import urlparse
+
+from geniusweb.profile.Profile import Profile
+from geniusweb.profileconnection.ProfileConnectionFactory import (
+    ProfileConnectionFactory,
+)
+from tudelft_utilities_logging.Reporter import Reporter
+from uri.uri import URI
+
+# parsed profiles by URI, together with the modification time of the profile file
+_profiles: Dict[str, Tuple[int, Profile]] = {}
+_lock = Lock()
+
+
+def get_profile(profile_uri, reporter: Reporter) -> Profile:
+    """Obtain the profile behind a profile URI. Profiles that are read from a file
+    ("file:" URI) are parsed only once per process and shared between all sessions
+    and agents, until the file is modified. Profiles are immutable, so sharing them
+    is safe. Other URIs (e.g. websockets) are not cached.
+
+    Args:
+        profile_uri (str | URI): URI of the profile, e.g. "file:domains/domain00/profileA.json"
+        reporter (Reporter): reporter that is passed to the profile connection
+
+    Returns:
+        Profile: the parsed profile
+    """
+    profile_uri = str(profile_uri)
+    path = _file_path(profile_uri)
+    if path is None:
+        return _load_profile(profile_uri, reporter)
+
+    mtime = os.stat(path).st_mtime_ns
+    with _lock:
+        cached = _profiles.get(profile_uri)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    profile = _load_profile(profile_uri, reporter)
+    with _lock:
+        _profiles[profile_uri] = (mtime, profile)
+
+    return profile
+
+
+def invalidate_profile(profile_uri=None):
+    """Remove a profile from the cache, or all profiles if no URI is given.
+
+    Args:
+        profile_uri (str | URI, optional): URI of the profile. Defaults to None.
+    """
+    with _lock:
+        if profile_uri is None:
+            _profiles.clear()
+        else:
+            _profiles.pop(str(profile_uri), None)
+
+
+def _file_path(profile_uri: str):
+    parsed = urlparse(profile_uri)
+    if parsed.scheme != "file":
+        return None
+    return parsed.path
+
+
+def _load_profile(profile_uri: str, reporter: Reporter) -> Profile:
+    profile_connection = ProfileConnectionFactory.create(URI(profile_uri), reporter)
+    profile = profile_connection.getProfile()
+    profile_connection.close()
+
+    return profile
@@ -0,0 +1,98 @@
+import hashlib
+import json
+from collections import OrderedDict
+from decimal import Decimal
+from threading import Lock
+from typing import Tuple
+
+from geniusweb.bidspace.BidsWithUtility import BidsWithUtility
+from geniusweb.bidspace.Interval import Interval
+from geniusweb.profile.utilityspace.LinearAdditive import LinearAdditive
+from pyson.ObjectMapper import ObjectMapper
+
+# maximum number of profiles kept in the cache, least recently used are evicted
+MAX_ENTRIES = 32
+
+
+class UtilSpaceData:
+    """Data derived from a linear additive profile that is expensive to compute, but
+    never changes for the same profile. Shared by all ExtendedUtilSpace instances
+    (and copies of it) of a process, so it must be treated as read-only.
+    """
+
+    def __init__(self, space: LinearAdditive):
+        # BidsWithUtility also holds the structure to search bids by utility
+        self.bidutils = BidsWithUtility.create(space)
+        self.range: Interval = self.bidutils.getRange()
+        self.tolerance = compute_tolerance(self.bidutils)
+
+
+_cache: "OrderedDict[Tuple[str, str], UtilSpaceData]" = OrderedDict()
+_lock = Lock()
+
+
+def get_util_space_data(space: LinearAdditive, profile_uri=None) -> UtilSpaceData:
+    """Obtain the BidsWithUtility, utility range and tolerance of a profile. The
+    result is cached by profile URI and a hash of the profile content, such that
+    all sessions in a process that use the same profile share one copy.
+
+    Args:
+        space (LinearAdditive): the profile
+        profile_uri (str | URI, optional): URI of the profile. Defaults to None, in
+            which case the profile name is used.
+
+    Returns:
+        UtilSpaceData: the (possibly shared) data of the profile
+    """
+    uri = str(profile_uri) if profile_uri is not None else space.getName()
+    # the agents parse their own profile, so every session has a new profile object
+    # and its content is hashed once per lookup
+    key = (uri, content_hash(space))
+
+    with _lock:
+        data = _cache.get(key)
+        if data is not None:
+            _cache.move_to_end(key)
+            return data
+
+    # computed outside of the lock, in the worst case a profile is processed twice
+    data = UtilSpaceData(space)
+    with _lock:
+        _cache[key] = data
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+    return data
+
+
+def clear_util_space_cache():
+    with _lock:
+        _cache.clear()
+
+
+def content_hash(space: LinearAdditive) -> str:
+    """Hash of the serialised profile, equal for profiles with equal content"""
+    serialised = json.dumps(ObjectMapper().toJson(space), sort_keys=True, default=str)
+    return hashlib.sha1(serialised.encode()).hexdigest()
+
+
+def compute_tolerance(bidutils: BidsWithUtility) -> Decimal:
+    """
+    Tolerance is the Interval we need when searching bids. When we are close
+    to the maximum utility, this value has to be the distance between the
+    best and one-but-best utility.
+
+    @return the minimum tolerance required, which is the minimum difference
+            between the weighted utility of the best and one-but-best issue
+            value.
+    """
+    tolerance = Decimal(1)
+    for iss in bidutils.getInfo():
+        if iss.getValues().size() > 1:
+            # we have at least 2 values.
+            values = sorted(
+                (iss.getWeightedUtil(val) for val in iss.getValues()), reverse=True
+            )
+            tolerance = min(tolerance, values[0] - values[1])
+    return tolerance
@@ -1,13 +1,12 @@
 import logging
-from random import randint
 from time import time
 from typing import cast
 
+import numpy as np
 from geniusweb.actions.Accept import Accept
 from geniusweb.actions.Action import Action
 from geniusweb.actions.Offer import Offer
 from geniusweb.actions.PartyId import PartyId
-from geniusweb.bidspace.AllBidsList import AllBidsList
 from geniusweb.inform.ActionDone import ActionDone
 from geniusweb.inform.Finished import Finished
 from geniusweb.inform.Inform import Inform
@@ -20,13 +19,14 @@ from geniusweb.party.DefaultParty import DefaultParty
 from geniusweb.profile.utilityspace.LinearAdditiveUtilitySpace import (
     LinearAdditiveUtilitySpace,
 )
-from geniusweb.profileconnection.ProfileConnectionFactory import (
-    ProfileConnectionFactory,
-)
 from geniusweb.progress.ProgressTime import ProgressTime
 from geniusweb.references.Parameters import Parameters
 from tudelft_utilities_logging.ReportToLogger import ReportToLogger
 
+from agents.common.bid_scoring import find_best_random_bid
+from agents.common.bidspace import BidSpace
+from agents.common.profile_cache import get_profile
+
 from .utils.opponent_model import OpponentModel
 
 
@@ -48,6 +48,9 @@ class TemplateAgent(DefaultParty):
         self.settings: Settings = None
         self.storage_dir: str = None
 
+        self.bidspace: BidSpace = None
+        self.utilities: np.ndarray = None
+
         self.last_received_bid: Bid = None
         self.opponent_model: OpponentModel = None
         self.logger.log(logging.INFO, "party is initialized")
@@ -73,13 +76,14 @@ class TemplateAgent(DefaultParty):
             self.parameters = self.settings.getParameters()
             self.storage_dir = self.parameters.get("storage_dir")
 
-            # the profile contains the preferences of the agent over the domain
-            profile_connection = ProfileConnectionFactory.create(
-                data.getProfile().getURI(), self.getReporter()
-            )
-            self.profile = profile_connection.getProfile()
+            # the profile contains the preferences of the agent over the domain,
+            # it is parsed only once per process and shared between sessions
+            self.profile = get_profile(data.getProfile().getURI(), self.getReporter())
             self.domain = self.profile.getDomain()
-            profile_connection.close()
+
+            # encode all bids of the domain and compute their utility once
+            self.bidspace = BidSpace(self.domain)
+            self.utilities = self.bidspace.utilities(self.profile)
 
         # ActionDone informs you of an action (an offer or an accept)
         # that is performed by one of the agents (including yourself).
@@ -149,7 +153,7 @@ class TemplateAgent(DefaultParty):
         if isinstance(action, Offer):
             # create opponent model if it was not yet initialised
             if self.opponent_model is None:
-                self.opponent_model = OpponentModel(self.domain)
+                self.opponent_model = OpponentModel(self.domain, self.bidspace)
 
             bid = cast(Offer, action).getBid()
 
@@ -203,21 +207,14 @@ class TemplateAgent(DefaultParty):
         return all(conditions)
 
     def find_bid(self) -> Bid:
-        # compose a list of all possible bids
-        domain = self.profile.getDomain()
-        all_bids = AllBidsList(domain)
-
-        best_bid_score = 0.0
-        best_bid = None
-
-        # take 500 attempts to find a bid according to a heuristic score
-        for _ in range(500):
-            bid = all_bids.get(randint(0, all_bids.size() - 1))
-            bid_score = self.score_bid(bid)
-            if bid_score > best_bid_score:
-                best_bid_score, best_bid = bid_score, bid
+        # progress of the negotiation session between 0 and 1 (1 is deadline)
+        progress = self.progress.get(time() * 1000)
 
-        return best_bid
+        # take 500 random bids and pick the best according to a heuristic score,
+        # see score_bid. The candidates are scored all at once.
+        return find_best_random_bid(
+            self.bidspace, self.utilities, self.opponent_model, progress
+        )
 
     def score_bid(self, bid: Bid, alpha: float = 0.95, eps: float = 0.1) -> float:
         """Calculate heuristic score for a bid
@@ -0,0 +1,74 @@
+from random import randint
+from typing import Optional
+
+import numpy as np
+from geniusweb.issuevalue.Bid import Bid
+from geniusweb.profile.utilityspace.LinearAdditive import LinearAdditive
+
+from agents.common.bidspace import BidSpace, UtilityIndex
+
+
+class FloatUtilSpace:
+    """
+    Float counterpart of ExtendedUtilSpace, used by TimeDependentParty when the
+    "fast_utility" parameter is set. Utilities of all bids are computed once as
+    floats and sorted, so a bid search is a binary search instead of a Decimal
+    interval query.
+
+    Float utilities differ slightly from the exact Decimal utilities, so the
+    search intervals are widened by a small tolerance on both sides.
+    """
+
+    def __init__(self, space: LinearAdditive, tolerance: float = 1e-9):
+        self._utilspace = space
+        self._bidspace = BidSpace(space.getDomain())
+        self._index = UtilityIndex(self._bidspace, space)
+        self._epsilon = tolerance
+
+        self._minUtil = self._index.min_utility()
+        self._maxUtil = self._index.max_utility()
+        rvbid = space.getReservationBid()
+        if rvbid != None:
+            self._minUtil = max(self._minUtil, float(space.getUtility(rvbid)))
+
+        self._tolerance = self._computeTolerance()
+
+    def _computeTolerance(self) -> float:
+        """
+        @return the minimum difference between the weighted utility of the best
+                and one-but-best issue value, see ExtendedUtilSpace.
+        """
+        tolerance = 1.0
+        for values in self._bidspace.value_utilities(self._utilspace):
+            if len(values) > 1:
+                best, one_but_best = np.sort(values)[-1:-3:-1]
+                tolerance = min(tolerance, best - one_but_best)
+        return float(tolerance)
+
+    def getMin(self) -> float:
+        return self._minUtil
+
+    def getMax(self) -> float:
+        return self._maxUtil
+
+    def getUtility(self, bid: Bid) -> float:
+        try:
+            index = self._bidspace.index(bid)
+        except KeyError:
+            # not a complete bid of the domain (e.g. a partial bid of the opponent)
+            return float(self._utilspace.getUtility(bid))
+        return float(self._index.utilities[index])
+
+    def getRandomBid(self, utilityGoal: float) -> Optional[Bid]:
+        """
+        @param utilityGoal the requested utility
+        @return random bid with utility inside [utilitygoal-tolerance,
+                utilitygoal], or None if there is no such bid
+        """
+        indices = self._index.range(
+            utilityGoal - self._tolerance - self._epsilon,
+            utilityGoal + self._epsilon,
+        )
+        if len(indices) == 0:
+            return None
+        return self._bidspace.bid(indices[randint(0, len(indices) - 1)])
@@ -38,6 +38,7 @@ from time import sleep, time as clock
 from decimal import Decimal
 import sys
 from agents.time_dependent_agent.extended_util_space import ExtendedUtilSpace
+from agents.time_dependent_agent.float_util_space import FloatUtilSpace
 from tudelft_utilities_logging.Reporter import Reporter
 
 
@@ -74,6 +75,19 @@ class TimeDependentAgent(DefaultParty):
     to simulate human users that take thinking time.</td>
     </tr>
 
+    <tr>
+    <td>fast_utility</td>
+    <td>If true, utilities are computed with floats instead of Decimals and bids
+    are searched in a sorted array of all bids, see {@link FloatUtilSpace}.
+    Default value is false.</td>
+    </tr>
+
+    <tr>
+    <td>fast_utility_tolerance</td>
+    <td>The float utilities may differ this much from the exact utilities when
+    searching bids. Default value is 1e-9.</td>
+    </tr>
+
     </table>
     <p>
     TimeDependentParty requires a {@link UtilitySpace}
@@ -87,6 +101,9 @@ class TimeDependentAgent(DefaultParty):
         self._progress: Progress = None  # type:ignore
         self._lastReceivedBid: Bid = None  # type:ignore
         self._extendedspace: ExtendedUtilSpace = None  # type:ignore
+        self._floatspace: FloatUtilSpace = None  # type:ignore
+        self._fastUtility: bool = False
+        self._fastUtilityTolerance: float = 1e-9
         self._e: float = 1.2
         self._lastvotes: Votes = None  # type:ignore
         self._settings: Settings = None  # type:ignore
@@ -115,6 +132,12 @@ class TimeDependentAgent(DefaultParty):
                             logging.WARNING,
                             "parameter e should be Double but found " + str(newe),
                         )
+                self._fastUtility = (
+                    self._settings.getParameters().get("fast_utility") == True
+                )
+                self._fastUtilityTolerance = self._settings.getParameters().getDouble(
+                    "fast_utility_tolerance", 1e-9, 0, 1
+                )
                 protocol: str = str(self._settings.getProtocol().getURI())
                 if "Learn" == protocol:
                     val(self.getConnection()).send(LearningDone(self._me))
@@ -211,8 +234,7 @@ class TimeDependentAgent(DefaultParty):
         myAction: Action
         if bid == None or (
             self._lastReceivedBid != None
-            and self._utilspace.getUtility(self._lastReceivedBid)
-            >= self._utilspace.getUtility(bid)
+            and self._getUtility(self._lastReceivedBid) >= self._getUtility(bid)
         ):
             # if bid==null we failed to suggest next bid.
             myAction = Accept(self._me, self._lastReceivedBid)
@@ -224,9 +246,21 @@ class TimeDependentAgent(DefaultParty):
         newutilspace = self._profileint.getProfile()
         if not newutilspace == self._utilspace:
             self._utilspace = cast(LinearAdditive, newutilspace)
-            self._extendedspace = ExtendedUtilSpace(self._utilspace)
+            if self._fastUtility:
+                self._floatspace = FloatUtilSpace(
+                    self._utilspace, self._fastUtilityTolerance
+                )
+            else:
+                self._extendedspace = ExtendedUtilSpace(
+                    self._utilspace, self._settings.getProfile().getURI()
+                )
         return self._utilspace
 
+    def _getUtility(self, bid: Bid):
+        if self._floatspace != None:
+            return self._floatspace.getUtility(bid)
+        return self._utilspace.getUtility(bid)
+
     def _makeBid(self) -> Bid:
         """
         @return next possible bid with current target utility, or null if no such
@@ -234,6 +268,9 @@ class TimeDependentAgent(DefaultParty):
         """
         time = self._progress.get(round(clock() * 1000))
 
+        if self._floatspace != None:
+            return self._makeBidFloat(time)
+
         utilityGoal = self._getUtilityGoal(
             time,
             self.getE(),
@@ -247,6 +284,22 @@ class TimeDependentAgent(DefaultParty):
         # pick a random one.
         return options.get(randint(0, options.size() - 1))
 
+    def _makeBidFloat(self, time: float) -> Bid:
+        """
+        Float version of {@link #_makeBid}, used if fast_utility is set.
+        """
+        utilityGoal = self._getUtilityGoalFloat(
+            time,
+            self.getE(),
+            self._floatspace.getMin(),
+            self._floatspace.getMax(),
+        )
+        bid = self._floatspace.getRandomBid(utilityGoal)
+        if bid == None:
+            # if we can't find good bid, get max util bid....
+            bid = self._floatspace.getRandomBid(self._floatspace.getMax())
+        return bid
+
     def _getUtilityGoal(
         self, t: float, e: float, minUtil: Decimal, maxUtil: Decimal
     ) -> Decimal:
@@ -267,6 +320,17 @@ class TimeDependentAgent(DefaultParty):
             ft1 = round(Decimal(1 - pow(t, 1 / e)), 6)  # defaults ROUND_HALF_UP
         return max(min((minUtil + (maxUtil - minUtil) * ft1), maxUtil), minUtil)
 
+    def _getUtilityGoalFloat(
+        self, t: float, e: float, minUtil: float, maxUtil: float
+    ) -> float:
+        """
+        Float version of {@link #_getUtilityGoal}, used if fast_utility is set.
+        """
+        ft1 = 1.0
+        if e != 0:
+            ft1 = round(1 - pow(t, 1 / e), 6)
+        return max(min((minUtil + (maxUtil - minUtil) * ft1), maxUtil), minUtil)
+
     def _vote(self, voting: Voting) -> Votes:  # throws IOException
         """
         @param voting the {@link Voting} object containing the options
@@ -297,6 +361,17 @@ class TimeDependentAgent(DefaultParty):
         profile = cast(LinearAdditive, self._profileint.getProfile())
         # the profile MUST contain UtilitySpace
         time = self._progress.get(round(clock() * 1000))
+        if self._floatspace != None:
+            utilityGoal = self._getUtilityGoalFloat(
+                time,
+                self.getE(),
+                self._floatspace.getMin(),
+                self._floatspace.getMax(),
+            )
+            return (
+                self._floatspace.getUtility(bid)
+                >= utilityGoal - self._fastUtilityTolerance
+            )
         return profile.getUtility(bid) >= self._getUtilityGoal(
             time,
             self.getE(),
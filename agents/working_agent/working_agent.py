@@ -7,7 +7,6 @@ from geniusweb.actions.Accept import Accept
 from geniusweb.actions.Action import Action
 from geniusweb.actions.Offer import Offer
 from geniusweb.actions.PartyId import PartyId
-from geniusweb.bidspace.AllBidsList import AllBidsList
 from geniusweb.inform.ActionDone import ActionDone
 from geniusweb.inform.Finished import Finished
 from geniusweb.inform.Inform import Inform
@@ -20,13 +19,13 @@ from geniusweb.party.DefaultParty import DefaultParty
 from geniusweb.profile.utilityspace.LinearAdditiveUtilitySpace import (
     LinearAdditiveUtilitySpace,
 )
-from geniusweb.profileconnection.ProfileConnectionFactory import (
-    ProfileConnectionFactory,
-)
 from geniusweb.progress.ProgressTime import ProgressTime
 from geniusweb.references.Parameters import Parameters
 from tudelft_utilities_logging.ReportToLogger import ReportToLogger
 
+from agents.common.bidspace import BidSpace, UtilityIndex
+from agents.common.profile_cache import get_profile
+
 
 class WorkingAgent(DefaultParty):
     def __init__(self):
@@ -39,6 +38,9 @@ class WorkingAgent(DefaultParty):
         self.progress: ProgressTime = None
         self.me: PartyId = None
         self.last_received_bid: Bid = None
+        self.bidspace: BidSpace = None
+        self.utility_index: UtilityIndex = None
+        self.good_bids = None
 
         self.logger.log(logging.INFO, "WorkingAgent initialized")
 
@@ -46,12 +48,12 @@ class WorkingAgent(DefaultParty):
         if isinstance(data, Settings):
             self.progress = data.getProgress()
             self.me = data.getID()
-            profile_conn = ProfileConnectionFactory.create(
-                data.getProfile().getURI(), self.getReporter()
-            )
-            self.profile = profile_conn.getProfile()
+            self.profile = get_profile(data.getProfile().getURI(), self.getReporter())
             self.domain = self.profile.getDomain()
-            profile_conn.close()
+            # sort all bids on utility once, so that bids can be looked up quickly every turn
+            self.bidspace = BidSpace(self.domain)
+            self.utility_index = UtilityIndex(self.bidspace, self.profile)
+            self.good_bids = self.utility_index.at_least(0.9)
 
         elif isinstance(data, ActionDone):
             action = cast(ActionDone, data).getAction()
@@ -94,10 +96,10 @@ class WorkingAgent(DefaultParty):
         self.send_action(Offer(self.me, bid))
         
     def find_high_utility_bid(self) -> Bid:
-        all_bids = AllBidsList(self.domain)
-        good_bids = [b for b in all_bids if self.profile.getUtility(b) >= 0.9]
-
-        if good_bids:
-            return good_bids[randint(0, len(good_bids) - 1)]
+        # random bid with a utility of at least 0.9, otherwise the best bid there is
+        if len(self.good_bids) > 0:
+            index = self.good_bids[randint(0, len(self.good_bids) - 1)]
         else:
-            return max(all_bids, key=lambda b: self.profile.getUtility(b))
+            index = self.utility_index.best()
+
+        return self.bidspace.bid(index)
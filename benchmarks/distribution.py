@@ -0,0 +1,43 @@
+"""Compare the vectorized distribution metric of utils.create_domains with the
+original bid-by-bid implementation.
+
+    python -m benchmarks.distribution [domain directory]
+"""
+
+import sys
+from time import perf_counter
+
+from utils.create_domains import Domain
+
+
+def distribution_per_bid(domain: Domain) -> float:
+    # original implementation: distance_to_pareto for every bid of the domain
+    min_distance_sum = 0.0
+    for i, bid in enumerate(domain.iter_bids()):
+        min_distance_sum += domain.distance_to_pareto(bid)
+    return min_distance_sum / (i + 1)
+
+
+def main(directory: str = "domains/domain01"):
+    domain = Domain.from_directory(directory)
+    domain.pareto_front = domain.get_pareto()
+
+    start = perf_counter()
+    distribution_old = distribution_per_bid(domain)
+    time_old = perf_counter() - start
+
+    start = perf_counter()
+    distribution_new = domain.get_distribution()
+    time_new = perf_counter() - start
+
+    print(
+        f"domain:           {domain.get_name()} ({len(domain.get_utility_arrays()[0])} bids, {len(domain.pareto_front)} Pareto bids)"
+    )
+    print(f"per bid:          {distribution_old:.12f} in {time_old:.3f}s")
+    print(f"vectorized:       {distribution_new:.12f} in {time_new:.4f}s")
+    print(f"speedup:          {time_old / time_new:.0f}x")
+    print(f"difference:       {abs(distribution_old - distribution_new):.2e}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
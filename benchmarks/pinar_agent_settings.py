@@ -0,0 +1,128 @@
+"""Compare the time that Pinar_Agent_Brain spends at Settings with the features built
+by growing DataFrames one row at a time (original) and with the features of the bid
+space encoded once, and check that both produce the same training data.
+
+    python -m benchmarks.pinar_agent_settings [profile file] [repeats]
+"""
+
+import sys
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+from geniusweb.bidspace.AllBidsList import AllBidsList
+from geniusweb.simplerunner.NegoRunner import StdOutReporter
+
+from agents.ANL2022.Pinar_Agent.utils.Pinar_Agent_Brain import Pinar_Agent_Brain
+from agents.common.profile_cache import get_profile
+
+
+class ConcatBrain(Pinar_Agent_Brain):
+    # original implementation: one DataFrame per bid, concatenated to the features
+    def fill_domain_and_profile(self, domain, profile):
+        self.domain = domain
+        self.profile = profile
+        self.issue_name_list = list(self.domain.getIssues())
+        self.X = pd.DataFrame()
+        self.Y = pd.DataFrame()
+        self.temEnumDict = self.enumerate_enum_dict()
+        self.all_bid_list = AllBidsList(domain)
+
+        self.sorted_bids_agent = sorted(
+            self.all_bid_list, key=lambda x: self.profile.getUtility(x), reverse=True
+        )
+        self.calculate_percantage_and_number()
+        self.add_agent_first_n_bid_to_machine_learning_with_low_utility(
+            self.sorted_bids_agent
+        )
+
+    def calculate_percantage_and_number(self):
+        numb_95 = 0
+        numb_85 = 0
+        for i in self.sorted_bids_agent:
+            utility = float(self.profile.getUtility(i))
+            if utility > 0.95:
+                numb_95 = numb_95 + 1
+            if utility > 0.85:
+                numb_85 = numb_85 + 1
+            else:
+                break
+        self.number_of_bid_greater_than95 = numb_95
+        self.number_of_bid_greater_than85 = numb_85
+        self.percentage_of_greater_than85 = numb_85 / len(self.sorted_bids_agent)
+        self.goal_of_utility = (
+            self.get_goal_of_negoation_utility(self.percentage_of_greater_than85) + 0.01
+        )
+
+        numb_goal_util = 0
+        self.sorted_bids_agent_df = pd.DataFrame()
+        self.sorted_bids_agent_that_greater_than_065_df = pd.DataFrame()
+        for i in self.sorted_bids_agent:
+            utility = float(self.profile.getUtility(i))
+            if utility > self.goal_of_utility:
+                numb_goal_util = numb_goal_util + 1
+            if utility > self.goal_of_utility - 0.1:
+                df_temp = self._bid_for_model_prediction_to_df(i)
+                self.sorted_bids_agent_df = pd.concat(
+                    [self.sorted_bids_agent_df, df_temp]
+                )
+            if utility > 0.65:
+                df_temp = self._bid_for_model_prediction_to_df(i)
+                self.sorted_bids_agent_that_greater_than_065_df = pd.concat(
+                    [self.sorted_bids_agent_that_greater_than_065_df, df_temp]
+                )
+            else:
+                break
+        self.number_of_goal_of_utility = numb_goal_util
+
+    def util_add_agent_first_n_bid_to_machine_learning_with_low_utility(
+        self, bid, ratio
+    ):
+        self.X = pd.concat([self.X, self._bid_for_model_prediction_to_df(bid)])
+        util = float(float(0.2) + (float(ratio) * float(0.35)))
+        self.Y = pd.concat([self.Y, pd.DataFrame([util])])
+
+
+def time_settings(brain_class, profile, repeats: int):
+    start = perf_counter()
+    for _ in range(repeats):
+        brain = brain_class()
+        brain.fill_domain_and_profile(profile.getDomain(), profile)
+    return brain, (perf_counter() - start) / repeats
+
+
+def main(profile_file: str = "domains/domain01/profileA.json", repeats: str = "3"):
+    repeats = int(repeats)
+    profile = get_profile(f"file:{profile_file}", StdOutReporter())
+
+    concat_brain, time_concat = time_settings(ConcatBrain, profile, repeats)
+    brain, time_buffer = time_settings(Pinar_Agent_Brain, profile, repeats)
+
+    columns = brain.issue_name_list
+    same_features = all(
+        np.array_equal(df.to_numpy(), concat_df[columns].to_numpy())
+        for df, concat_df in [
+            (brain.sorted_bids_agent_df, concat_brain.sorted_bids_agent_df),
+            (
+                brain.sorted_bids_agent_that_greater_than_065_df,
+                concat_brain.sorted_bids_agent_that_greater_than_065_df,
+            ),
+        ]
+    )
+    same_training_data = np.array_equal(
+        brain.X.array, concat_brain.X[columns].to_numpy()
+    ) and np.array_equal(brain.Y.array, concat_brain.Y.to_numpy())
+
+    print(f"profile:              {profile_file} ({brain.bidspace.size} bids)")
+    print(f"concat at Settings:   {time_concat * 1000:.1f} ms")
+    print(f"buffer at Settings:   {time_buffer * 1000:.1f} ms")
+    print(f"speedup at Settings:  {time_concat / time_buffer:.1f}x")
+    print(
+        f"bids above 0.65:      {len(brain.sorted_bids_agent_that_greater_than_065_df)}"
+    )
+    print(f"same features:        {same_features}")
+    print(f"same training data:   {same_training_data}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
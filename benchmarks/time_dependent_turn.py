@@ -0,0 +1,78 @@
+"""Compare the per-turn latency of the time-dependent agents with Decimal utilities
+(default) and with the float fast path ("fast_utility" parameter), and check that
+both modes offer bids of the same utility.
+
+    python -m benchmarks.time_dependent_turn [profile file] [turns] [e]
+"""
+
+import sys
+from decimal import Decimal
+from time import perf_counter
+
+from geniusweb.simplerunner.NegoRunner import StdOutReporter
+
+from agents.common.profile_cache import get_profile
+from agents.time_dependent_agent.extended_util_space import ExtendedUtilSpace
+from agents.time_dependent_agent.float_util_space import FloatUtilSpace
+from agents.time_dependent_agent.time_dependent_agent import TimeDependentAgent
+
+
+class FixedProgress:
+    # progress that is set by the benchmark instead of the clock
+    def __init__(self):
+        self.time = 0.0
+
+    def get(self, currentTimeMs: int) -> float:
+        return self.time
+
+
+def run_turns(agent: TimeDependentAgent, turns: int):
+    bids = []
+    start = perf_counter()
+    for turn in range(turns):
+        agent._progress.time = turn / turns
+        bids.append(agent._makeBid())
+    return bids, (perf_counter() - start) / turns
+
+
+def main(
+    profile_file: str = "domains/domain01/profileA.json",
+    turns: str = "1000",
+    e: str = "0.2",
+):
+    turns, e = int(turns), float(e)
+    profile = get_profile(f"file:{profile_file}", StdOutReporter())
+
+    agent = TimeDependentAgent()
+    agent._e = e
+    agent._progress = FixedProgress()
+
+    start = perf_counter()
+    agent._extendedspace = ExtendedUtilSpace(profile)
+    time_settings_decimal = perf_counter() - start
+    bids_decimal, time_decimal = run_turns(agent, turns)
+
+    start = perf_counter()
+    agent._floatspace = FloatUtilSpace(profile)
+    time_settings_float = perf_counter() - start
+    bids_float, time_float = run_turns(agent, turns)
+
+    # bids of both modes should lie in the same search interval of the Decimal mode
+    tolerance = agent._extendedspace._tolerance
+    max_difference = max(
+        abs(profile.getUtility(b1) - profile.getUtility(b2))
+        for b1, b2 in zip(bids_decimal, bids_float)
+    )
+
+    print(f"profile:               {profile_file} (e={e}, {turns} turns)")
+    print(f"Decimal at Settings:   {time_settings_decimal * 1000:.3f} ms (once)")
+    print(f"Decimal per turn:      {time_decimal * 1000:.3f} ms")
+    print(f"float at Settings:     {time_settings_float * 1000:.3f} ms (once)")
+    print(f"float per turn:        {time_float * 1000:.3f} ms")
+    print(f"speedup per turn:      {time_decimal / time_float:.1f}x")
+    print(f"max utility difference {max_difference:.2e} (search tolerance {tolerance:.2e})")
+    print(f"within tolerance:      {max_difference <= tolerance + Decimal('1e-9')}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
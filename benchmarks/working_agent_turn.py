@@ -0,0 +1,78 @@
+"""Compare the per-turn latency of WorkingAgent.find_high_utility_bid before and
+after the sorted utility index.
+
+    python -m benchmarks.working_agent_turn [profile file] [turns]
+"""
+
+import sys
+from random import randint
+from time import perf_counter
+
+from geniusweb.bidspace.AllBidsList import AllBidsList
+from geniusweb.simplerunner.NegoRunner import StdOutReporter
+
+from agents.common.bidspace import BidSpace, UtilityIndex
+from agents.common.profile_cache import get_profile
+
+
+def find_high_utility_bid_scan(profile, domain):
+    # original implementation: evaluate every bid of the domain every turn
+    all_bids = AllBidsList(domain)
+    good_bids = [b for b in all_bids if profile.getUtility(b) >= 0.9]
+
+    if good_bids:
+        return good_bids[randint(0, len(good_bids) - 1)]
+    else:
+        return max(all_bids, key=lambda b: profile.getUtility(b))
+
+
+def find_high_utility_bid_index(bidspace, utility_index, good_bids):
+    if len(good_bids) > 0:
+        index = good_bids[randint(0, len(good_bids) - 1)]
+    else:
+        index = utility_index.best()
+    return bidspace.bid(index)
+
+
+def main(profile_file: str = "domains/domain01/profileA.json", turns: str = "20"):
+    turns = int(turns)
+    profile = get_profile(f"file:{profile_file}", StdOutReporter())
+    domain = profile.getDomain()
+
+    start = perf_counter()
+    for _ in range(turns):
+        find_high_utility_bid_scan(profile, domain)
+    time_scan = (perf_counter() - start) / turns
+
+    start = perf_counter()
+    bidspace = BidSpace(domain)
+    utility_index = UtilityIndex(bidspace, profile)
+    good_bids = utility_index.at_least(0.9)
+    time_settings = perf_counter() - start
+
+    start = perf_counter()
+    for _ in range(turns * 100):
+        bid = find_high_utility_bid_index(bidspace, utility_index, good_bids)
+    time_index = (perf_counter() - start) / (turns * 100)
+
+    # both choose from the same bids, and fall back to a best bid (tied best bids
+    # can be ordered differently by AllBidsList and the bid space)
+    all_bids = AllBidsList(domain)
+    good_bids_scan = {
+        bidspace.index(b) for b in all_bids if profile.getUtility(b) >= 0.9
+    }
+    best_scan = max(all_bids, key=lambda b: profile.getUtility(b))
+
+    print(f"profile:              {profile_file} ({bidspace.size} bids)")
+    print(f"scan per turn:        {time_scan * 1000:.3f} ms")
+    print(f"index at Settings:    {time_settings * 1000:.3f} ms (once)")
+    print(f"index per turn:       {time_index * 1000:.3f} ms")
+    print(f"speedup per turn:     {time_scan / time_index:.0f}x")
+    print(f"utility of last bid:  {float(profile.getUtility(bid)):.3f}")
+    print(f"same good bids:       {good_bids_scan == set(good_bids.tolist())}")
+    best_utility = profile.getUtility(bidspace.bid(utility_index.best()))
+    print(f"same best utility:    {best_utility == profile.getUtility(best_scan)}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -2,11 +2,15 @@ import json
 import time
 from pathlib import Path
 
+from utils.compact_trace import write_compact_trace
 from utils.plot_trace import plot_trace
 from utils.runners import run_session
 
 RESULTS_DIR = Path("results", time.strftime('%Y%m%d-%H%M%S'))
 
+# write the trace in a compact binary format (.npz) instead of JSON, it can be read with utils.compact_trace.read_trace
+COMPACT_TRACE = False
+
 # create results directory if it does not exist
 if not RESULTS_DIR.exists():
     RESULTS_DIR.mkdir(parents=True)
@@ -15,6 +19,11 @@ if not RESULTS_DIR.exists():
 #   You need to specify the classpath of 2 agents to start a negotiation. Parameters for the agent can be added as a dict (see example)
 #   You need to specify the preference profiles for both agents. The first profile will be assigned to the first agent.
 #   You need to specify a time deadline (is milliseconds (ms)) we are allowed to negotiate before we end without agreement
+#   Optionally, set "virtual_time" to True to let the deadline run on a simulated clock that only advances with the
+#   compute time of the agents plus "turn_cost_ms" per turn (default 1.0), this finishes sessions much faster.
+#   Instead of (or next to) a time deadline, a round deadline can be set with "deadline_rounds".
+#   Set "latency" to True to record how long every agent takes to handle each message (e.g. time at Settings and
+#   p50/p95/max time per turn), this is added to the results.
 settings = {
     "agents": [
         {
@@ -38,7 +47,10 @@ if not session_results_trace["error"]:
     plot_trace(session_results_trace, RESULTS_DIR.joinpath("trace_plot.html"))
 
 # write results to file
-with open(RESULTS_DIR.joinpath("session_results_trace.json"), "w", encoding="utf-8") as f:
-    f.write(json.dumps(session_results_trace, indent=2))
+if COMPACT_TRACE:
+    write_compact_trace(session_results_trace, RESULTS_DIR.joinpath("session_results_trace.npz"))
+else:
+    with open(RESULTS_DIR.joinpath("session_results_trace.json"), "w", encoding="utf-8") as f:
+        f.write(json.dumps(session_results_trace, indent=2))
 with open(RESULTS_DIR.joinpath("session_results_summary.json"), "w", encoding="utf-8") as f:
     f.write(json.dumps(session_results_summary, indent=2))
@@ -1,3 +1,4 @@
+import argparse
 import json
 import os
 from pathlib import Path
@@ -5,7 +6,20 @@ import time
 
 from utils.runners import run_tournament
 
-RESULTS_DIR = Path("results", time.strftime('%Y%m%d-%H%M%S'))
+# every run writes to a new results directory, unless an interrupted tournament is resumed:
+#   python run_tournament.py --resume results/<timestamp>
+parser = argparse.ArgumentParser(description="Run a negotiation tournament")
+parser.add_argument(
+    "--resume",
+    metavar="RESULTS_DIR",
+    help="continue the interrupted tournament in this results directory (with the same settings)",
+)
+args = parser.parse_args()
+
+if args.resume is not None:
+    RESULTS_DIR = Path(args.resume)
+else:
+    RESULTS_DIR = Path("results", time.strftime('%Y%m%d-%H%M%S'))
 
 # create results directory if it does not exist
 if not RESULTS_DIR.exists():
@@ -15,6 +29,23 @@ if not RESULTS_DIR.exists():
 #   You need to specify the classpath of 2 agents to start a negotiation. Parameters for the agent can be added as a dict (see example)
 #   You need to specify the preference profiles for both agents. The first profile will be assigned to the first agent.
 #   You need to specify a time deadline (is milliseconds (ms)) we are allowed to negotiate before we end without agreement.
+#   Optionally, set "virtual_time" to True to let the deadline run on a simulated clock that only advances with the
+#   compute time of the agents plus "turn_cost_ms" per turn (default 1.0), this finishes sessions much faster.
+#   Instead of (or next to) a time deadline, a round deadline can be set with "deadline_rounds".
+#   Set "latency" to True to record how long every agent takes to handle each message (e.g. time at Settings and
+#   p50/p95/max time per turn), this is added to the results.
+#   Optionally, the sessions can be spread over multiple worker processes (defaults to 1, which runs them one by one).
+#   Every finished session is appended to the "journal" file. To continue an interrupted tournament, run this script
+#   with "--resume" and the results directory of that tournament (or point "journal" to its journal and set "resume"
+#   to True), sessions that are already in the journal are skipped. Without resuming, an existing journal or result
+#   store is refused, so that the sessions of two runs are never mixed.
+#   Sessions that ended in an error are run again, unless "retry_errors" is set to False.
+#   The results of all sessions are written to a columnar "result_store" (a new directory) while the tournament runs.
+#   It can be read with utils.result_store.read_results and summarised with utils.result_store.summarise_store.
+#   When the tournament is done, the results are also saved to tournament_results.json.
+#   To keep the traces of the sessions, set "traces" to a directory (e.g. RESULTS_DIR.joinpath("traces")), they are
+#   stored in the compact format. Set "plot_traces" to True to plot all of them (or a list of session indices to plot
+#   a selection), an index.html in the traces directory links to all plots.
 tournament_settings = {
     "agents": [
         {
@@ -120,6 +151,12 @@ tournament_settings = {
         ["domains/domain01/profileA.json", "domains/domain01/profileB.json"],
     ],
     "deadline_time_ms": 10000,
+    "workers": 1,
+    "journal": RESULTS_DIR.joinpath("tournament_journal.jsonl"),
+    "resume": args.resume is not None,
+    "result_store": RESULTS_DIR.joinpath("tournament_results"),
+    "traces": None,
+    "plot_traces": False,
 }
 
 # run a session and obtain results in dictionaries
@@ -0,0 +1,17 @@
+from pathlib import Path
+
+import pytest
+
+DOMAINS_DIR = Path(__file__).parents[1].joinpath("domains")
+
+
+@pytest.fixture(scope="session")
+def profile():
+    """Profile A of domain00, parsed with geniusweb"""
+    pytest.importorskip("geniusweb")
+    from geniusweb.simplerunner.NegoRunner import StdOutReporter
+
+    from agents.common.profile_cache import get_profile
+
+    profile_file = DOMAINS_DIR.joinpath("domain00", "profileA.json")
+    return get_profile(f"file:{profile_file}", StdOutReporter())
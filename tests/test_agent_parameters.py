@@ -0,0 +1,59 @@
+import importlib
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("geniusweb")
+# the ANL2022 package imports all of its agents
+pytest.importorskip("lightgbm")
+pytest.importorskip("sklearn")
+
+from geniusweb.actions.PartyId import PartyId
+from geniusweb.inform.Settings import Settings
+from geniusweb.progress.ProgressTime import ProgressTime
+from geniusweb.references.Parameters import Parameters
+from geniusweb.references.ProfileRef import ProfileRef
+from geniusweb.references.ProtocolRef import ProtocolRef
+from uri.uri import URI
+
+from tests.conftest import DOMAINS_DIR
+
+# agents with a background trainer: module, class and the path of the trainer
+TRAINING_AGENTS = [
+    ("agents.ANL2022.gea_agent.gea_agent", "GEAAgent", "trainer"),
+    ("agents.ANL2022.Pinar_Agent.Pinar_Agent", "Pinar_Agent", "agent_brain.trainer"),
+]
+
+
+def make_settings(parameters: dict) -> Settings:
+    # parameters are passed as geniusweb Parameters, like the runner does
+    profile_file = DOMAINS_DIR.joinpath("domain00", "profileA.json")
+    return Settings(
+        PartyId("party_1"),
+        ProfileRef(URI(f"file:{profile_file}")),
+        ProtocolRef(URI("SAOP")),
+        ProgressTime(10000, datetime.now()),
+        Parameters(parameters),
+    )
+
+
+@pytest.mark.parametrize("module, name, trainer", TRAINING_AGENTS)
+@pytest.mark.parametrize(
+    "parameters, synchronous",
+    [
+        ({}, False),
+        ({"background_training": True}, False),
+        ({"background_training": False}, True),
+    ],
+)
+def test_background_training_parameter(module, name, trainer, parameters, synchronous):
+    agent = getattr(importlib.import_module(module), name)()
+
+    agent.notifyChange(make_settings(parameters))
+    try:
+        background_trainer = agent
+        for attribute in trainer.split("."):
+            background_trainer = getattr(background_trainer, attribute)
+        assert background_trainer.synchronous == synchronous
+    finally:
+        agent.terminate()
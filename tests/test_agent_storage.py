@@ -0,0 +1,154 @@
+import json
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+
+import pytest
+
+from agents.common.agent_storage import AgentStorage
+
+
+@pytest.fixture
+def storage(tmp_path):
+    with AgentStorage(str(tmp_path), "agent") as storage:
+        yield storage
+
+
+def increment(storage_dir: str, num_updates: int):
+    with AgentStorage(storage_dir, "agent") as storage:
+        for _ in range(num_updates):
+            storage.update("count", "opponent", lambda count: count + 1, default=0)
+            storage.append("sessions", "opponent", 1)
+
+
+def test_records(storage):
+    assert storage.get("data", "opponent") is None
+    assert storage.get("data", "opponent", default={}) == {}
+
+    storage.put("data", "opponent", {"utilities": [0.5, 0.75]})
+    assert storage.get("data", "opponent") == {"utilities": [0.5, 0.75]}
+    storage.put("data", "opponent", [1, 2])
+    assert storage.get("data", "opponent") == [1, 2]
+
+    model = pickle.dumps({"weights": [1.0, 2.0]})
+    storage.put("model", "opponent", model)
+    assert storage.get("model", "opponent") == model
+
+    storage.put("decimal", "opponent", Decimal("0.5"), json_default=float)
+    assert storage.get("decimal", "opponent") == 0.5
+    with pytest.raises(TypeError):
+        storage.put("decimal", "opponent", Decimal("0.5"))
+
+    assert storage.update("count", "opponent", lambda c: c + 1, default=10) == 11
+    assert storage.update("count", "opponent", lambda c: c + 1, default=10) == 12
+
+
+def test_transactions(storage):
+    storage.put("data", "opponent", 1)
+
+    with pytest.raises(ValueError):
+        with storage.transaction():
+            storage.put("data", "opponent", 2)
+            storage.append("sessions", "opponent", 2)
+            raise ValueError
+    assert storage.get("data", "opponent") == 1
+    assert storage.records("sessions", "opponent") == []
+
+    # nested transactions commit or roll back with the outermost one
+    with pytest.raises(ValueError):
+        with storage.transaction():
+            with storage.transaction():
+                storage.put("data", "opponent", 3)
+            assert storage.get("data", "opponent") == 3
+            raise ValueError
+    assert storage.get("data", "opponent") == 1
+
+    with storage.transaction():
+        with storage.transaction():
+            storage.put("data", "opponent", 4)
+    assert storage.get("data", "opponent") == 4
+
+
+def test_logs(storage):
+    for i in range(10):
+        storage.append("sessions", "opponent", {"session": i})
+    storage.append("sessions", "other", {"session": -1})
+
+    assert storage.records("sessions", "opponent") == [
+        {"session": i} for i in range(10)
+    ]
+    assert storage.records("sessions", "opponent", last=3) == [
+        {"session": i} for i in range(7, 10)
+    ]
+    assert storage.records("sessions", "opponent", last=20) == storage.records(
+        "sessions", "opponent"
+    )
+
+    # process the log incrementally
+    new_records = storage.new_records("sessions", "opponent")
+    assert [value for _, value in new_records] == storage.records(
+        "sessions", "opponent"
+    )
+    last_id = new_records[-1][0]
+    assert storage.new_records("sessions", "opponent", after=last_id) == []
+    storage.append("sessions", "opponent", {"session": 10})
+    assert [
+        value for _, value in storage.new_records("sessions", "opponent", last_id)
+    ] == [{"session": 10}]
+
+
+def test_namespaces(tmp_path, storage):
+    storage.put("data", "opponent", "agent")
+    storage.append("sessions", "opponent", "agent")
+
+    with AgentStorage(str(tmp_path), "other_agent") as other_storage:
+        assert other_storage.get("data", "opponent") is None
+        assert other_storage.records("sessions", "opponent") == []
+        other_storage.put("data", "opponent", "other_agent")
+
+    assert storage.get("data", "opponent") == "agent"
+    assert storage.get("data", "other_opponent") is None
+
+
+def test_concurrent_updates(tmp_path):
+    num_processes, num_updates = 4, 25
+    with ProcessPoolExecutor(max_workers=num_processes) as executor:
+        futures = [
+            executor.submit(increment, str(tmp_path), num_updates)
+            for _ in range(num_processes)
+        ]
+        for future in futures:
+            future.result()
+
+    with AgentStorage(str(tmp_path), "agent") as storage:
+        assert storage.get("count", "opponent") == num_processes * num_updates
+        assert len(storage.records("sessions", "opponent")) == (
+            num_processes * num_updates
+        )
+
+
+def test_import_file(tmp_path, storage):
+    def read_json(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    record_file = tmp_path.joinpath("opponent.json")
+    assert not storage.import_file("data", "opponent", str(record_file), read_json)
+
+    record_file.write_text(json.dumps({"utilities": [0.5]}))
+    assert storage.import_file("data", "opponent", str(record_file), read_json)
+    assert storage.get("data", "opponent") == {"utilities": [0.5]}
+
+    # data in the storage is never replaced by the file
+    storage.put("data", "opponent", {"utilities": [0.75]})
+    assert not storage.import_file("data", "opponent", str(record_file), read_json)
+    assert storage.get("data", "opponent") == {"utilities": [0.75]}
+    assert record_file.exists()
+
+    log_file = tmp_path.joinpath("sessions.json")
+    log_file.write_text(json.dumps([1, 2, 3]))
+    assert storage.import_file("sessions", "opponent", str(log_file), read_json, True)
+    assert not storage.import_file(
+        "sessions", "opponent", str(log_file), read_json, True
+    )
+    assert storage.records("sessions", "opponent") == [1, 2, 3]
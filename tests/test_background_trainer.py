@@ -0,0 +1,98 @@
+from threading import Event
+
+import pytest
+
+pytest.importorskip("tudelft_utilities_logging")
+
+from agents.common.background_trainer import BackgroundTrainer
+
+
+class RecordingReporter:
+    def __init__(self):
+        self.messages = []
+
+    def log(self, level, message):
+        self.messages.append(message)
+
+
+def test_synchronous():
+    trainer = BackgroundTrainer(sum, synchronous=True)
+    assert trainer.latest() == (None, 0)
+
+    trainer.submit([1, 2, 3])
+    assert trainer.latest() == (6, 1)
+    trainer.submit([4])
+    assert trainer.latest() == (4, 2)
+    assert trainer.dropped == 0
+
+
+def test_background():
+    trainer = BackgroundTrainer(sum)
+    try:
+        trainer.submit([1, 2, 3])
+        assert trainer.wait(timeout=10)
+        assert trainer.latest() == (6, 1)
+        assert trainer.last_fit_ms >= 0
+    finally:
+        trainer.close()
+
+
+def test_oldest_waiting_submission_is_dropped():
+    started, release = Event(), Event()
+
+    def fit(value):
+        started.set()
+        assert release.wait(timeout=10)
+        return value
+
+    trainer = BackgroundTrainer(fit)
+    try:
+        # the first submission is being trained, the second waits and is replaced
+        # by the third
+        trainer.submit(1)
+        assert started.wait(timeout=10)
+        trainer.submit(2)
+        trainer.submit(3)
+        assert trainer.dropped == 1
+        assert trainer.latest() == (None, 0)
+
+        release.set()
+        assert trainer.wait(timeout=10)
+        assert trainer.latest() == (3, 2)
+    finally:
+        release.set()
+        trainer.close()
+
+
+def test_failed_fit_keeps_last_good_model():
+    def fit(value):
+        if value is None:
+            raise ValueError("no data")
+        return value
+
+    reporter = RecordingReporter()
+    trainer = BackgroundTrainer(fit, reporter=reporter)
+    try:
+        trainer.submit(1)
+        assert trainer.wait(timeout=10)
+        trainer.submit(None)
+        assert trainer.wait(timeout=10)
+        assert trainer.latest() == (1, 1)
+        assert len(reporter.messages) == 1 and "no data" in reporter.messages[0]
+    finally:
+        trainer.close()
+
+
+def test_close_stops_thread():
+    trainer = BackgroundTrainer(sum)
+    trainer.close()
+    assert trainer._thread is None
+
+    trainer = BackgroundTrainer(sum)
+    trainer.submit([1])
+    assert trainer.wait(timeout=10)
+    thread = trainer._thread
+    trainer.close()
+    assert not thread.is_alive()
+    with pytest.raises(RuntimeError):
+        trainer.submit([2])
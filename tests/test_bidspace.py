@@ -0,0 +1,116 @@
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+pytest.importorskip("geniusweb")
+
+from agents.common.bidspace import BidSpace, UtilityIndex
+
+
+class ZeroWeightProfile:
+    # the profile with the weight of one issue set to zero, such that bids tie
+    def __init__(self, profile, issue: str):
+        self.profile = profile
+        self.issue = issue
+
+    def getWeight(self, issue):
+        return Decimal(0) if issue == self.issue else self.profile.getWeight(issue)
+
+    def getUtilities(self):
+        return self.profile.getUtilities()
+
+    def getUtility(self, bid):
+        utilities = self.getUtilities()
+        return sum(
+            (
+                self.getWeight(issue) * utilities[issue].getUtility(bid.getValue(issue))
+                for issue in utilities
+            ),
+            Decimal(0),
+        )
+
+
+@pytest.fixture(scope="module")
+def bidspace(profile):
+    return BidSpace(profile.getDomain())
+
+
+@pytest.fixture(scope="module")
+def exact_utilities(profile, bidspace):
+    return [profile.getUtility(bidspace.bid(i)) for i in range(bidspace.size)]
+
+
+def test_matrix_enumerates_all_bids(bidspace):
+    matrix = bidspace.matrix.astype(np.int64)
+
+    assert matrix.shape == (bidspace.size, len(bidspace.issues))
+    assert np.array_equal(matrix @ bidspace.strides, np.arange(bidspace.size))
+
+
+def test_bid_index_round_trip(bidspace):
+    indices = [0, 1, bidspace.size // 2, bidspace.size - 1]
+    bids = [bidspace.bid(i) for i in indices]
+
+    assert [bidspace.index(bid) for bid in bids] == indices
+    assert np.array_equal(bidspace.encode(bids), bidspace.matrix[indices])
+
+
+def test_partial_bid_cannot_be_encoded(bidspace):
+    issue_values = dict(bidspace.bid(0).getIssueValues())
+    issue_values.pop(bidspace.issues[0])
+    partial_bid = type(bidspace.bid(0))(issue_values)
+
+    with pytest.raises(KeyError):
+        bidspace.encode_bid(partial_bid)
+
+
+def test_utilities_equal_profile(profile, bidspace, exact_utilities):
+    utilities = bidspace.utilities(profile)
+
+    np.testing.assert_allclose(
+        utilities, [float(u) for u in exact_utilities], rtol=0, atol=1e-12
+    )
+
+
+def test_utility_index_ranges(profile, bidspace):
+    index = UtilityIndex(bidspace, profile)
+    utilities = bidspace.utilities(profile)
+
+    assert np.all(np.diff(index.sorted_utilities) >= 0)
+    assert index.max_utility() == utilities.max()
+    assert index.min_utility() == utilities.min()
+
+    low, high = 0.4, 0.6
+    in_range = (utilities >= low) & (utilities <= high)
+    assert index.count(low, high) == in_range.sum()
+    assert set(index.range(low, high).tolist()) == set(np.flatnonzero(in_range))
+    assert in_range[index.sample(low, high)]
+    assert index.sample(2.0, 3.0) is None
+    assert np.all(in_range[index.sample_many(50, low, high)])
+
+
+def test_at_least_uses_exact_utility(profile, bidspace, exact_utilities):
+    index = UtilityIndex(bidspace, profile)
+
+    # thresholds that are exactly the utility of a bid are the hardest case
+    for threshold in sorted(set(exact_utilities))[::97] + [Decimal("0.9")]:
+        expected = {i for i, u in enumerate(exact_utilities) if u >= threshold}
+        assert set(index.at_least(threshold).tolist()) == expected
+
+
+def test_best_is_lowest_index_of_tied_bids(profile, bidspace, exact_utilities):
+    def lowest_best_index(utilities):
+        best_utility = max(utilities)
+        return min(i for i, u in enumerate(utilities) if u == best_utility)
+
+    best = lowest_best_index(exact_utilities)
+    assert UtilityIndex(bidspace, profile).best() == best
+
+    tied_profile = ZeroWeightProfile(profile, bidspace.issues[-1])
+    tied_utilities = [
+        tied_profile.getUtility(bidspace.bid(i)) for i in range(bidspace.size)
+    ]
+    first_best = lowest_best_index(tied_utilities)
+    assert tied_utilities.count(tied_utilities[first_best]) > 1
+    assert UtilityIndex(bidspace, tied_profile).best() == first_best
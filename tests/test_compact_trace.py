@@ -0,0 +1,110 @@
+import json
+
+import numpy as np
+import pytest
+
+from tests.conftest import DOMAINS_DIR
+from utils.compact_trace import read_compact_trace, read_trace, write_compact_trace
+
+PROFILE_A = DOMAINS_DIR.joinpath("domain00", "profileA.json")
+PROFILE_B = DOMAINS_DIR.joinpath("domain00", "profileB.json")
+
+
+@pytest.fixture(scope="module")
+def issues_values():
+    with open(PROFILE_A, "r", encoding="utf-8") as f:
+        ((_, utility_space),) = json.load(f).items()
+    return {
+        issue: value_set["values"]
+        for issue, value_set in utility_space["domain"]["issuesValues"].items()
+    }
+
+
+def make_trace(issues_values, num_offers: int = 50) -> dict:
+    # a session results trace in the shape of `run_session`, with utilities that are
+    # exact in float32 such that the round trip is exact
+    rng = np.random.default_rng(0)
+    parties = ["party_1", "party_2"]
+
+    def random_bid():
+        return {
+            "issuevalues": {
+                issue: values[rng.integers(len(values))]
+                for issue, values in issues_values.items()
+            }
+        }
+
+    def utilities():
+        return {party: float(np.float32(rng.random())) for party in parties}
+
+    actions = []
+    for i in range(num_offers):
+        content = {"actor": parties[i % 2], "bid": random_bid()}
+        content["utilities"] = utilities()
+        actions.append({"Offer": content})
+
+    # a partial bid, a bid with a value that is not in the domain and an action
+    # without a bid are kept as they are
+    partial_bid = random_bid()
+    partial_bid["issuevalues"].pop(next(iter(issues_values)))
+    actions.append({"Offer": {"actor": "party_1", "bid": partial_bid}})
+    unknown_bid = random_bid()
+    unknown_bid["issuevalues"][next(iter(issues_values))] = "unknownValue"
+    actions.append({"Offer": {"actor": "party_2", "bid": unknown_bid}})
+    actions.append({"EndNegotiation": {"actor": "party_1"}})
+    last_bid = actions[num_offers - 1]["Offer"]
+    actions.append({"Accept": {"actor": "party_2", "bid": last_bid["bid"]}})
+    actions[-1]["Accept"]["utilities"] = last_bid["utilities"]
+
+    return {
+        "actions": actions,
+        "connections": parties,
+        "partyprofiles": {
+            "party_1": {
+                "party": {"partyref": "pythonpath:agents.AgentA", "parameters": {}},
+                "profile": f"file:{PROFILE_A}",
+            },
+            "party_2": {
+                "party": {"partyref": "pythonpath:agents.AgentB", "parameters": {}},
+                "profile": f"file:{PROFILE_B}",
+            },
+        },
+        "progress": {"ProgressRounds": {"duration": 200, "currentRound": 26}},
+        "error": None,
+    }
+
+
+def test_round_trip(tmp_path, issues_values):
+    trace = make_trace(issues_values)
+    trace_file = tmp_path.joinpath("trace.npz")
+    write_compact_trace(trace, trace_file, issues_values)
+
+    assert read_compact_trace(trace_file) == trace
+
+
+def test_issues_values_from_profile(tmp_path, issues_values):
+    trace = make_trace(issues_values)
+    write_compact_trace(trace, tmp_path.joinpath("explicit.npz"), issues_values)
+    write_compact_trace(trace, tmp_path.joinpath("profile.npz"))
+
+    with np.load(tmp_path.joinpath("explicit.npz")) as explicit, np.load(
+        tmp_path.joinpath("profile.npz")
+    ) as profile:
+        assert explicit["actions"].tobytes() == profile["actions"].tobytes()
+    assert read_compact_trace(tmp_path.joinpath("profile.npz")) == trace
+
+    trace["partyprofiles"]["party_1"]["profile"] = "http://localhost/profileA"
+    with pytest.raises(ValueError):
+        write_compact_trace(trace, tmp_path.joinpath("remote.npz"))
+
+
+def test_compact_trace_is_smaller(tmp_path, issues_values):
+    trace = make_trace(issues_values, num_offers=2000)
+    json_file = tmp_path.joinpath("trace.json")
+    with open(json_file, "w", encoding="utf-8") as f:
+        json.dump(trace, f)
+    write_compact_trace(trace, tmp_path.joinpath("trace"), issues_values)
+    compact_file = tmp_path.joinpath("trace.npz")
+
+    assert compact_file.stat().st_size < json_file.stat().st_size / 4
+    assert read_trace(compact_file) == read_trace(json_file) == trace
@@ -0,0 +1,143 @@
+from collections import defaultdict
+
+import numpy as np
+import pytest
+
+pytest.importorskip("geniusweb")
+
+from geniusweb.issuevalue.Bid import Bid
+
+from agents.common.bidspace import BidSpace
+from agents.common.opponent_model import OpponentModel
+
+
+class ReferenceOpponentModel:
+    # the per issue and per value estimators that the shared model replaced
+    def __init__(self, domain):
+        self.offers = []
+        self.issue_estimators = {
+            issue: ReferenceIssueEstimator(value_set.size())
+            for issue, value_set in domain.getIssuesValues().items()
+        }
+
+    def update(self, bid):
+        self.offers.append(bid)
+        for issue, issue_estimator in self.issue_estimators.items():
+            issue_estimator.update(bid.getValue(issue))
+
+    def get_predicted_utility(self, bid):
+        if len(self.offers) == 0 or bid is None:
+            return 0
+
+        value_utilities, issue_weights = [], []
+        for issue, issue_estimator in self.issue_estimators.items():
+            value_utilities.append(
+                issue_estimator.get_value_utility(bid.getValue(issue))
+            )
+            issue_weights.append(issue_estimator.weight)
+
+        total_issue_weight = sum(issue_weights)
+        if total_issue_weight == 0.0:
+            issue_weights = [1 / len(issue_weights) for _ in issue_weights]
+        else:
+            issue_weights = [iw / total_issue_weight for iw in issue_weights]
+
+        return sum(iw * vu for iw, vu in zip(issue_weights, value_utilities))
+
+
+class ReferenceIssueEstimator:
+    def __init__(self, num_values: int):
+        self.bids_received = 0
+        self.max_value_count = 0
+        self.num_values = num_values
+        self.value_counts = defaultdict(int)
+        self.value_utilities = {}
+        self.weight = 0
+
+    def update(self, value):
+        self.bids_received += 1
+        self.value_counts[value] += 1
+        self.max_value_count = max(self.value_counts[value], self.max_value_count)
+
+        equal_shares = self.bids_received / self.num_values
+        self.weight = (self.max_value_count - equal_shares) / (
+            self.bids_received - equal_shares
+        )
+
+        for tracked_value, count in self.value_counts.items():
+            if self.weight < 1:
+                self.value_utilities[tracked_value] = (
+                    (count + 1) ** (1 - self.weight) - 1
+                ) / ((self.max_value_count + 1) ** (1 - self.weight) - 1)
+            else:
+                self.value_utilities[tracked_value] = 1
+
+    def get_value_utility(self, value):
+        return self.value_utilities.get(value, 0)
+
+
+@pytest.fixture(scope="module")
+def bidspace(profile):
+    return BidSpace(profile.getDomain())
+
+
+def offered_bids(bidspace, stubborn: int, random: int):
+    # an opponent that repeats its first bid a few times and then concedes randomly
+    rng = np.random.default_rng(0)
+    indices = [0] * stubborn + rng.integers(0, bidspace.size, random).tolist()
+    return [bidspace.bid(i) for i in indices]
+
+
+@pytest.mark.parametrize("stubborn, random", [(1, 0), (5, 0), (3, 20), (0, 200)])
+def test_predictions_equal_reference(profile, bidspace, stubborn, random):
+    model = OpponentModel(profile.getDomain(), bidspace)
+    reference = ReferenceOpponentModel(profile.getDomain())
+    for bid in offered_bids(bidspace, stubborn, random):
+        model.update(bid)
+        reference.update(bid)
+
+    rng = np.random.default_rng(1)
+    for index in rng.integers(0, bidspace.size, 100).tolist() + [0]:
+        bid = bidspace.bid(index)
+        assert model.get_predicted_utility(bid) == pytest.approx(
+            reference.get_predicted_utility(bid), abs=1e-12
+        )
+
+
+def test_predict_many_equals_predicted_utility(profile, bidspace):
+    model = OpponentModel(profile.getDomain(), bidspace)
+    assert np.array_equal(model.predict_many(bidspace.matrix[:10]), np.zeros(10))
+    assert model.get_predicted_utility(bidspace.bid(0)) == 0
+
+    for bid in offered_bids(bidspace, 3, 30):
+        model.update(bid)
+
+    predictions = model.predict_many(bidspace.matrix)
+    assert predictions.shape == (bidspace.size,)
+    for index in [0, 1, bidspace.size - 1]:
+        assert predictions[index] == pytest.approx(
+            model.get_predicted_utility(bidspace.bid(index)), abs=1e-15
+        )
+    assert model.get_issue_weights().sum() == pytest.approx(1.0)
+
+
+def test_partial_bids_equal_reference(profile, bidspace):
+    # issues missing from a partial bid are counted as one more value of the issue
+    def partial(bid, num_issues):
+        issues = bidspace.issues[:num_issues]
+        return Bid({issue: bid.getValue(issue) for issue in issues})
+
+    model = OpponentModel(profile.getDomain(), bidspace)
+    reference = ReferenceOpponentModel(profile.getDomain())
+    for i, bid in enumerate(offered_bids(bidspace, 3, 20)):
+        if i % 3 == 0:
+            bid = partial(bid, 1 + i % (len(bidspace.issues) - 1))
+        model.update(bid)
+        reference.update(bid)
+
+    rng = np.random.default_rng(1)
+    for index in rng.integers(0, bidspace.size, 20).tolist():
+        for bid in [bidspace.bid(index), partial(bidspace.bid(index), 1)]:
+            assert model.get_predicted_utility(bid) == pytest.approx(
+                reference.get_predicted_utility(bid), abs=1e-12
+            )
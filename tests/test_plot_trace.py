@@ -0,0 +1,89 @@
+import math
+
+import numpy as np
+import pytest
+
+from utils.compact_trace import write_compact_trace
+from utils.plot_tournament import plot_tournament, session_trace_file
+from utils.plot_trace import lttb_indices
+
+
+def reference_lttb(x, y, num_points):
+    # the classic loop based Largest Triangle Three Buckets
+    n = len(x)
+    every = (n - 2) / (num_points - 2)
+    keep = [0]
+    for i in range(num_points - 2):
+        next_start = math.floor((i + 1) * every) + 1
+        next_stop = min(math.floor((i + 2) * every) + 1, n)
+        next_x = sum(x[next_start:next_stop]) / (next_stop - next_start)
+        next_y = sum(y[next_start:next_stop]) / (next_stop - next_start)
+
+        previous = keep[-1]
+        best, best_area = None, -1.0
+        for j in range(math.floor(i * every) + 1, next_start):
+            area = abs(
+                (x[previous] - next_x) * (y[j] - y[previous])
+                - (x[previous] - x[j]) * (next_y - y[previous])
+            )
+            if area > best_area:
+                best, best_area = j, area
+        keep.append(best)
+    keep.append(n - 1)
+    return keep
+
+
+@pytest.mark.parametrize("n, num_points", [(10, 3), (100, 10), (1000, 37), (5001, 500)])
+def test_equals_reference(n, num_points):
+    rng = np.random.default_rng(n)
+    x = np.sort(rng.random(n)) * 100
+    y = rng.random(n)
+
+    indices = lttb_indices(x, y, num_points)
+    assert indices.tolist() == reference_lttb(x.tolist(), y.tolist(), num_points)
+
+
+def test_keeps_first_last_and_order():
+    rng = np.random.default_rng(0)
+    x = np.arange(10000)
+    y = np.cumsum(rng.normal(size=10000))
+
+    indices = lttb_indices(x, y, 250)
+    assert len(indices) == 250
+    assert indices[0] == 0 and indices[-1] == 9999
+    assert np.all(np.diff(indices) > 0)
+
+
+@pytest.mark.parametrize("num_points", [0, 2, 10, 11])
+def test_short_lines_are_kept(num_points):
+    x = np.arange(10)
+    assert lttb_indices(x, x**2, num_points).tolist() == list(range(10))
+
+
+def test_plots_share_plotlyjs(tmp_path):
+    parties = ["party_1", "party_2"]
+    actions = [
+        {
+            "Offer": {
+                "actor": parties[i % 2],
+                "bid": {"issuevalues": {"issue": f"value{i % 3}"}},
+                "utilities": {party: 0.5 for party in parties},
+            }
+        }
+        for i in range(20)
+    ]
+    trace = {"actions": actions, "partyprofiles": {party: {} for party in parties}}
+    issues_values = {"issue": ["value0", "value1", "value2"]}
+    for index in range(2):
+        write_compact_trace(trace, session_trace_file(tmp_path, index), issues_values)
+
+    index_file = plot_tournament(
+        tmp_path, [{"profiles": ["profileA", "profileB"]}] * 2, [{}, {}]
+    )
+
+    plotlyjs_size = tmp_path.joinpath("plotly.min.js").stat().st_size
+    for index in range(2):
+        plot_file = session_trace_file(tmp_path, index).with_suffix(".html")
+        assert plot_file.stat().st_size < plotlyjs_size / 10
+        assert 'src="plotly.min.js"' in plot_file.read_text(encoding="utf-8")
+        assert plot_file.name in index_file.read_text(encoding="utf-8")
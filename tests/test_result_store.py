@@ -0,0 +1,252 @@
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("geniusweb")
+
+from utils.journal import SessionJournal, load_finished_sessions
+from utils.result_store import (
+    ResultStore,
+    columns_from_summaries,
+    read_results,
+    summarise_results,
+    summarise_store,
+)
+
+AGENTS = ["AgentA", "AgentB", "AgentC"]
+
+
+def reference_summary(tournament_results):
+    # the dict based summary that the columnar summary replaced
+    agent_result_raw = defaultdict(lambda: defaultdict(list))
+    tournament_results_summary = defaultdict(lambda: defaultdict(int))
+    for session_results in tournament_results:
+        agents = {k: v for k, v in session_results.items() if k.startswith("agent")}
+        for agent_id, agent_class in agents.items():
+            agent_result_raw[agent_class]["utility"].append(
+                session_results[f"utility_{agent_id.split('_')[1]}"]
+            )
+            agent_result_raw[agent_class]["nash_product"].append(
+                session_results["nash_product"]
+            )
+            agent_result_raw[agent_class]["social_welfare"].append(
+                session_results["social_welfare"]
+            )
+            if "num_offers" in session_results:
+                agent_result_raw[agent_class]["num_offers"].append(
+                    session_results["num_offers"]
+                )
+            tournament_results_summary[agent_class][session_results["result"]] += 1
+
+    for agent, stats in agent_result_raw.items():
+        num_session = len(stats["utility"])
+        for desc, stat in stats.items():
+            tournament_results_summary[agent][f"avg_{desc}"] = sum(stat) / num_session
+        tournament_results_summary[agent]["count"] = num_session
+
+    column_order = [
+        "avg_utility",
+        "avg_nash_product",
+        "avg_social_welfare",
+        "avg_num_offers",
+        "count",
+        "agreement",
+        "failed",
+        "ERROR",
+    ]
+    column_type = {"count": int, "agreement": int, "failed": int, "ERROR": int}
+
+    tournament_results_summary = pd.DataFrame(tournament_results_summary).T
+    tournament_results_summary = tournament_results_summary.fillna(0)
+    for column in column_order:
+        if column not in tournament_results_summary:
+            tournament_results_summary[column] = 0
+    tournament_results_summary = tournament_results_summary.astype(column_type)
+    tournament_results_summary.sort_values("avg_utility", ascending=False, inplace=True)
+    return tournament_results_summary[column_order]
+
+
+def session_summary(agent_1: str, agent_2: str, seed: int, result: str = None):
+    rng = np.random.default_rng(seed)
+    if result is None:
+        result = ["agreement", "failed"][seed % 2]
+    results_summary = {
+        "agent_1": agent_1,
+        "agent_2": agent_2,
+        "utility_1": rng.random(),
+        "utility_2": rng.random(),
+        "nash_product": rng.random(),
+        "social_welfare": rng.random(),
+        "result": result,
+    }
+    # sessions that failed early do not record the number of offers
+    if seed % 3:
+        results_summary["num_offers"] = int(rng.integers(1, 1000))
+    return results_summary
+
+
+@pytest.fixture
+def summaries():
+    return [
+        session_summary(agent_1, agent_2, seed)
+        for seed, (agent_1, agent_2) in enumerate(
+            (a, b) for a in AGENTS for b in AGENTS if a != b
+        )
+    ] + [session_summary("AgentA", "AgentC", 100, "ERROR")]
+
+
+def test_round_trip(tmp_path, summaries):
+    with ResultStore(tmp_path, chunk_size=3) as store:
+        for step, results_summary in enumerate(summaries):
+            store.append(results_summary, step)
+        assert store.steps() == set(range(len(summaries)))
+
+    columns, vocabularies = read_results(tmp_path)
+    assert len(list(tmp_path.glob("chunk_*.npz"))) == 3
+    assert sorted(vocabularies["agent"]) == AGENTS
+    assert columns["step"].tolist() == list(range(len(summaries)))
+    for column in ["agent_1", "agent_2", "result"]:
+        vocabulary = vocabularies["agent" if column != "result" else "result"]
+        assert [vocabulary[c] for c in columns[column]] == [
+            s[column] for s in summaries
+        ]
+    for column in ["utility_1", "utility_2", "nash_product", "social_welfare"]:
+        assert columns[column].tolist() == [s[column] for s in summaries]
+    num_offers = [s.get("num_offers", np.nan) for s in summaries]
+    np.testing.assert_array_equal(columns["num_offers"], num_offers)
+
+    # a store that is opened again continues with the same vocabularies
+    with ResultStore(tmp_path, chunk_size=3) as store:
+        assert store.vocabularies == vocabularies
+        store.append(session_summary("AgentD", "AgentA", 200), len(summaries))
+    columns, vocabularies = read_results(tmp_path)
+    assert vocabularies["agent"][-1] == "AgentD"
+    assert len(columns["step"]) == len(summaries) + 1
+
+
+def test_rows_are_flushed_after_interval(tmp_path, summaries, monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("utils.result_store.time.monotonic", lambda: now[0])
+
+    store = ResultStore(tmp_path, flush_interval_s=10.0)
+    store.append(summaries[0], 0)
+    now[0] = 5.0
+    store.append(summaries[1], 1)
+    assert list(tmp_path.glob("chunk_*.npz")) == []
+
+    # the oldest buffered row is written with the row that comes after the interval
+    now[0] = 10.0
+    store.append(summaries[2], 2)
+    assert read_results(tmp_path)[0]["step"].tolist() == [0, 1, 2]
+
+    now[0] = 15.0
+    store.append(summaries[3], 3)
+    now[0] = 24.0
+    store.append(summaries[4], 4)
+    assert len(list(tmp_path.glob("chunk_*.npz"))) == 1
+    store.close()
+    assert read_results(tmp_path)[0]["step"].tolist() == [0, 1, 2, 3, 4]
+
+
+def test_summary_equals_reference(tmp_path, summaries):
+    expected = reference_summary(summaries)
+
+    summary = summarise_results(*columns_from_summaries(summaries))
+    pd.testing.assert_frame_equal(summary, expected, check_dtype=False)
+
+    with ResultStore(tmp_path, chunk_size=4) as store:
+        for step, results_summary in enumerate(summaries):
+            store.append(results_summary, step)
+    pd.testing.assert_frame_equal(summarise_store(tmp_path), summary)
+
+
+def test_last_row_per_step_is_kept(tmp_path, summaries):
+    with ResultStore(tmp_path, chunk_size=2) as store:
+        store.append(session_summary("AgentA", "AgentB", 0, "ERROR"), 0)
+        store.append(summaries[1])
+        store.append(summaries[1])
+        store.append(summaries[0], 0)
+
+    columns, vocabularies = read_results(tmp_path)
+    assert columns["step"].tolist() == [-1, -1, 0]
+    assert vocabularies["result"][columns["result"][-1]] == summaries[0]["result"]
+
+
+def test_load_finished_sessions_retries_errors(tmp_path):
+    journal_file = tmp_path.joinpath("journal.jsonl")
+    settings = {"agents": [{"class": "AgentA"}, {"class": "AgentB"}]}
+    with SessionJournal(journal_file) as journal:
+        journal.append(settings, session_summary("AgentA", "AgentB", 0))
+        journal.append(settings, session_summary("AgentA", "AgentB", 1, "ERROR"))
+
+    assert sum(map(len, load_finished_sessions(journal_file).values())) == 1
+    assert sum(map(len, load_finished_sessions(journal_file, False).values())) == 2
+
+
+def num_stored_rows(directory) -> int:
+    # read_results keeps the last row per step, the chunks show the duplicates
+    num_rows = 0
+    for chunk_file in directory.glob("chunk_*.npz"):
+        with np.load(chunk_file) as chunk:
+            num_rows += len(chunk["step"])
+    return num_rows
+
+
+def test_resume_does_not_duplicate_rows(tmp_path, monkeypatch):
+    runners = pytest.importorskip("utils.runners")
+    tournament_settings = {
+        "agents": [{"class": f"agents.{agent}"} for agent in AGENTS],
+        "profile_sets": [["profileA", "profileB"], ["profileC", "profileD"]],
+        "deadline_rounds": 10,
+        "journal": tmp_path.joinpath("journal.jsonl"),
+        "result_store": tmp_path.joinpath("results"),
+    }
+    num_sessions = 12
+
+    calls = []
+    interrupt = [True]
+
+    def run_session_summary(settings, trace_file=None):
+        # the first run is interrupted after 5 sessions, of which the last failed
+        if interrupt[0] and len(calls) == 5:
+            raise KeyboardInterrupt
+        calls.append(settings)
+        agent_1, agent_2 = [agent["class"] for agent in settings["agents"]]
+        result = "ERROR" if len(calls) == 5 else None
+        return session_summary(agent_1, agent_2, len(calls), result)
+
+    monkeypatch.setattr(runners, "_run_session_summary", run_session_summary)
+    with pytest.raises(KeyboardInterrupt):
+        runners.run_tournament(tournament_settings)
+    assert len(calls) == 5
+    columns, _ = read_results(tournament_settings["result_store"])
+    assert columns["step"].tolist() == [0, 1, 2, 3, 4]
+
+    # the resumed run only runs the session with the error and the remaining ones
+    interrupt[0] = False
+    _, tournament_results, _ = runners.run_tournament(
+        dict(tournament_settings, resume=True)
+    )
+    assert len(calls) == 5 + num_sessions - 4
+
+    columns, vocabularies = read_results(tournament_settings["result_store"])
+    assert sorted(columns["step"].tolist()) == list(range(num_sessions))
+    assert "ERROR" not in [vocabularies["result"][c] for c in columns["result"]]
+    assert "ERROR" not in [r["result"] for r in tournament_results]
+    # only the session with the error is stored twice
+    assert num_stored_rows(tournament_settings["result_store"]) == num_sessions + 1
+
+    # resuming a finished tournament runs nothing and adds no rows
+    runners.run_tournament(dict(tournament_settings, resume=True))
+    assert len(calls) == 5 + num_sessions - 4
+    assert num_stored_rows(tournament_settings["result_store"]) == num_sessions + 1
+
+    # a new tournament does not append to the journal or store of an earlier one
+    for output in ["journal", "result_store"]:
+        settings = dict(tournament_settings, journal=None, result_store=None)
+        settings[output] = tournament_settings[output]
+        with pytest.raises(AssertionError, match="resume"):
+            runners.run_tournament(settings)
+    assert len(calls) == 5 + num_sessions - 4
@@ -0,0 +1,32 @@
+import pytest
+
+pytest.importorskip("geniusweb")
+
+from geniusweb.progress.Progress import Progress
+from geniusweb.progress.ProgressTime import ProgressTime
+from pyson.ObjectMapper import ObjectMapper
+
+from tests.conftest import DOMAINS_DIR
+from utils.runners import run_session
+
+
+def test_virtual_time_session_is_serialised_with_plain_progress():
+    settings = {
+        "agents": [
+            {"class": "agents.boulware_agent.boulware_agent.BoulwareAgent"},
+            {"class": "agents.conceder_agent.conceder_agent.ConcederAgent"},
+        ],
+        "profiles": [
+            str(DOMAINS_DIR.joinpath("domain00", "profileA.json")),
+            str(DOMAINS_DIR.joinpath("domain00", "profileB.json")),
+        ],
+        "deadline_time_ms": 1000,
+        "virtual_time": True,
+    }
+    results_trace, results_summary = run_session(settings)
+
+    assert results_summary["result"] != "ERROR"
+    assert list(results_trace["progress"]) == ["ProgressTime"]
+    progress = ObjectMapper().parse(results_trace["progress"], Progress)
+    assert isinstance(progress, ProgressTime)
+    assert progress.getDuration() == 1000
@@ -0,0 +1,177 @@
+import json
+from pathlib import Path
+from typing import Dict, List
+from urllib.parse import urlparse
+
+import numpy as np
+
+ACTION_TYPES = ["Offer", "Accept", "EndNegotiation"]
+
+# bid index of an action without a bid, and of a bid that is not a complete bid of
+# the domain (e.g. a partial bid), which is kept in the header instead
+NO_BID = -1
+OTHER_BID = -2
+
+# one row per action, the bid is stored as its index in the domain, utilities are
+# in the order of the "parties" in the header
+ACTION_DTYPE = np.dtype(
+    [
+        ("actor", np.uint8),
+        ("type", np.uint8),
+        ("bid", np.int64),
+        ("utilities", np.float32, (2,)),
+    ]
+)
+
+
+def write_compact_trace(results_trace: dict, trace_file, issues_values=None):
+    """Write a session results trace (see `run_session`) in a compact binary format.
+    Every action is stored as a fixed size row of actor, action type, bid index and
+    the utilities (float32) of both parties. Everything else of the trace is small
+    and is stored as a JSON header, as are the (rare) bids that are not a complete
+    bid of the domain. Use `read_compact_trace` to read it back.
+
+    Args:
+        results_trace (dict): session results trace
+        trace_file (str | Path): file to write to, ".npz" is appended if missing
+        issues_values (Dict[str, list], optional): values per issue of the domain, in
+            domain order. Defaults to the domain in the profile file of the first party.
+    """
+    if issues_values is None:
+        issues_values = _read_issues_values(results_trace)
+
+    issues = sorted(issues_values)
+    values = [issues_values[issue] for issue in issues]
+    value_index = [{value: i for i, value in enumerate(vals)} for vals in values]
+    strides = np.cumprod([1] + [len(vals) for vals in values[:0:-1]])[::-1].tolist()
+
+    parties = list(results_trace["partyprofiles"])
+    party_index = {party: i for i, party in enumerate(parties)}
+    action_types = list(ACTION_TYPES)
+
+    actions = results_trace["actions"]
+    actors, types, bids, utilities = [], [], [], []
+    other_bids = {}
+    for action in actions:
+        ((action_type, content),) = action.items()
+        if action_type not in action_types:
+            action_types.append(action_type)
+        types.append(action_types.index(action_type))
+        actors.append(party_index[content["actor"]])
+
+        bid = NO_BID
+        if "bid" in content:
+            issuevalues = content["bid"]["issuevalues"]
+            try:
+                if len(issuevalues) != len(issues):
+                    raise KeyError("not a complete bid")
+                bid = sum(
+                    stride * index[issuevalues[issue]]
+                    for issue, index, stride in zip(issues, value_index, strides)
+                )
+            except (KeyError, TypeError):
+                bid = OTHER_BID
+                other_bids[str(len(bids))] = issuevalues
+        bids.append(bid)
+
+        if "utilities" in content:
+            utilities.append([content["utilities"][party] for party in parties])
+        else:
+            utilities.append([np.nan, np.nan])
+
+    rows = np.empty(len(actions), dtype=ACTION_DTYPE)
+    rows["actor"] = actors
+    rows["type"] = types
+    rows["bid"] = bids
+    rows["utilities"] = np.array(utilities, dtype=np.float32).reshape(-1, 2)
+
+    header = {key: value for key, value in results_trace.items() if key != "actions"}
+    header["compact_trace"] = {
+        "issues": issues,
+        "values": values,
+        "parties": parties,
+        "action_types": action_types,
+        "other_bids": other_bids,
+    }
+    header = np.frombuffer(json.dumps(header).encode(), dtype=np.uint8)
+
+    np.savez(trace_file, header=header, actions=rows)
+
+
+def read_compact_trace(trace_file) -> dict:
+    """Read a trace written by `write_compact_trace` back into the dict shape of a
+    session results trace, as accepted by `plot_trace`. Utilities are float32
+    precision.
+
+    Args:
+        trace_file (str | Path): compact trace file
+
+    Returns:
+        dict: session results trace
+    """
+    with np.load(trace_file) as data:
+        header = json.loads(data["header"].tobytes().decode())
+        rows = data["actions"]
+
+    compact = header.pop("compact_trace")
+    issues, values = compact["issues"], compact["values"]
+    parties, action_types = compact["parties"], compact["action_types"]
+    other_bids = compact.get("other_bids", {})
+
+    # decode all bid indices at once into value indices per issue
+    has_bid = rows["bid"] >= 0
+    shape = [len(vals) for vals in values]
+    value_indices = np.zeros((len(rows), len(issues)), dtype=np.int64)
+    if has_bid.any():
+        value_indices[has_bid] = np.stack(
+            np.unravel_index(rows["bid"][has_bid], shape), axis=1
+        )
+    value_indices = value_indices.tolist()
+    bid_indices = rows["bid"].tolist()
+    actors = rows["actor"].tolist()
+    types = rows["type"].tolist()
+    utilities = rows["utilities"].astype(float).tolist()
+
+    actions = []
+    for i, actor in enumerate(actors):
+        content = {"actor": parties[actor]}
+        if bid_indices[i] == OTHER_BID:
+            content["bid"] = {"issuevalues": other_bids[str(i)]}
+        elif has_bid[i]:
+            content["bid"] = {
+                "issuevalues": {
+                    issue: vals[index]
+                    for issue, vals, index in zip(issues, values, value_indices[i])
+                }
+            }
+        if not np.isnan(utilities[i][0]):
+            content["utilities"] = dict(zip(parties, utilities[i]))
+        actions.append({action_types[types[i]]: content})
+
+    header["actions"] = actions
+    return header
+
+
+def read_trace(trace_file) -> dict:
+    """Read a session results trace, either JSON or compact (".npz")"""
+    if Path(trace_file).suffix == ".npz":
+        return read_compact_trace(trace_file)
+    with open(trace_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _read_issues_values(results_trace: dict) -> Dict[str, List]:
+    # domain of the profile file of the first party
+    party_profile = next(iter(results_trace["partyprofiles"].values()))
+    profile_uri = urlparse(str(party_profile["profile"]))
+    if profile_uri.scheme != "file":
+        raise ValueError(
+            f"cannot read the domain of {profile_uri.geturl()}, pass issues_values"
+        )
+
+    with open(profile_uri.path, "r", encoding="utf-8") as f:
+        profile = json.load(f)
+    ((_, utility_space),) = profile.items()
+    issues_values = utility_space["domain"]["issuesValues"]
+
+    return {issue: value_set["values"] for issue, value_set in issues_values.items()}
@@ -1,6 +1,9 @@
+import argparse
 import json
 import math
 import os
+import random
+from concurrent.futures import ProcessPoolExecutor
 from itertools import product
 from math import sqrt
 from random import randint
@@ -15,12 +18,88 @@ from numpy.random import dirichlet
 NUM_DOMAINS_TO_GENERATE = 50
 
 
-def main():
-    for i in range(NUM_DOMAINS_TO_GENERATE):
-        domain = Domain.create_random(f"domain{i:03d}")
-        domain.calculate_specials()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate random negotiation domains.")
+    parser.add_argument(
+        "-n",
+        "--num-domains",
+        type=int,
+        default=NUM_DOMAINS_TO_GENERATE,
+        help="number of domains to generate",
+    )
+    parser.add_argument(
+        "--start",
+        type=int,
+        default=0,
+        help="number of the first domain, domains are named domainXXX",
+    )
+    parser.add_argument(
+        "-o", "--output", default="domains/", help="directory to write the domains to"
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, default=1, help="number of worker processes"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="base seed, every domain is seeded with (seed, domain number)",
+    )
+    parser.add_argument(
+        "--visualisation",
+        choices=["now", "defer", "skip"],
+        default="now",
+        help="render the visualisation with each domain, after all domains are generated, or not at all",
+    )
+    parser.add_argument(
+        "--only-visualise",
+        action="store_true",
+        help="only (re)render the visualisation of existing domains",
+    )
+    args = parser.parse_args(argv)
+
+    names = [f"domain{i:03d}" for i in range(args.start, args.start + args.num_domains)]
+    directories = [os.path.join(args.output, name) for name in names]
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        if not args.only_visualise:
+            jobs = [
+                (name, args.output, args.seed, args.visualisation == "now")
+                for name in names
+            ]
+            for name in executor.map(_generate_domain, *zip(*jobs)):
+                print(f"generated {name}")
+
+        if args.only_visualise or args.visualisation == "defer":
+            for directory in executor.map(_visualise_domain, directories):
+                print(f"rendered {directory}")
+
+
+def _generate_domain(name, parent_path, seed, visualise):
+    # seed per domain, so that results do not depend on the order of the workers.
+    # Without a seed, reseed from the OS as forked workers share their random state.
+    domain_seed = None
+    if seed is not None:
+        domain_seed = np.random.SeedSequence([seed, int(name[len("domain") :])])
+        domain_seed = int(domain_seed.generate_state(1)[0])
+    random.seed(domain_seed)
+    np.random.seed(domain_seed)
+
+    domain = Domain.create_random(name)
+    domain.calculate_specials()
+    if visualise:
         domain.generate_visualisation()
-        domain.to_file("domains/")
+    domain.to_file(parent_path)
+
+    return name
+
+
+def _visualise_domain(directory):
+    domain = Domain.from_directory(directory)
+    domain.generate_visualisation()
+    domain.write_visualisation(os.path.dirname(os.path.normpath(directory)))
+
+    return directory
 
 
 class Profile:
@@ -103,6 +182,28 @@ class Profile:
             self.issue_weights[i] * self.value_weights[i][v] for i, v in bid.items()
         )
 
+    def get_utilities(self, issues_values: dict, bid_matrix: np.ndarray) -> np.ndarray:
+        """calculate the utility of many bids at once.
+
+        Args:
+            issues_values (dict): issues and their values as in the domain dictionary
+            bid_matrix (np.ndarray): value indices of the bids (one row per bid, one column per issue)
+
+        Returns:
+            np.ndarray: utility per bid, equal to `get_utility` of the bid
+        """
+        utilities = np.zeros(len(bid_matrix))
+        for column, (issue, values) in enumerate(issues_values.items()):
+            value_utilities = np.array(
+                [
+                    self.issue_weights[issue] * self.value_weights[issue][v]
+                    for v in values["values"]
+                ]
+            )
+            # summing issue by issue keeps the floating point results equal to get_utility
+            utilities += value_utilities[bid_matrix[:, column]]
+        return utilities
+
 
 class Domain:
     def __init__(
@@ -128,6 +229,7 @@ class Domain:
         self.distribution = distribution
         self.opposition = opposition
         self.visualisation = visualisation
+        self._bid_utilities = None
 
     @classmethod
     def create_random(cls, name):
@@ -182,8 +284,8 @@ class Domain:
     def calculate_specials(self):
         if self.nash_bid:
             return False
-        self.pareto_front = self.get_pareto(list(self.iter_bids()))
-        self.distribution = self.get_distribution(self.iter_bids())
+        self.pareto_front = self.get_pareto()
+        self.distribution = self.get_distribution()
 
         SW_utility = 0
         nash_utility = 0
@@ -305,9 +407,13 @@ class Domain:
                 )
 
         if self.visualisation:
-            self.visualisation.write_image(
-                file=os.path.join(path, "visualisation.pdf"), scale=5
-            )
+            self.write_visualisation(parent_path)
+
+    def write_visualisation(self, parent_path):
+        path = os.path.join(parent_path, self.domain["name"])
+        self.visualisation.write_image(
+            file=os.path.join(path, "visualisation.pdf"), scale=5
+        )
 
     def iter_bids(self) -> Iterable:
         return iter(self)
@@ -315,66 +421,89 @@ class Domain:
     def get_utilities(self, bid):
         return self.profile_A.get_utility(bid), self.profile_B.get_utility(bid)
 
-    def get_pareto(self, all_bids: list):
-        pareto_front = []
-        # dominated_bids = set()
-        while True:
-            candidate_bid = all_bids.pop(0)
-            bid_nr = 0
-            dominated = False
-            while len(all_bids) != 0 and bid_nr < len(all_bids):
-                bid = all_bids[bid_nr]
-                if self._dominates(candidate_bid, bid):
-                    # If it is dominated remove the bid from all bids
-                    all_bids.pop(bid_nr)
-                    # dominated_bids.add(frozenset(bid.items()))
-                elif self._dominates(bid, candidate_bid):
-                    dominated = True
-                    # dominated_bids.add(frozenset(candidate_bid.items()))
-                    bid_nr += 1
-                else:
-                    bid_nr += 1
-
-            if not dominated:
-                # add the non-dominated bid to the Pareto frontier
-                pareto_front.append(
-                    {
-                        "bid": candidate_bid,
-                        "utility": [
-                            self.profile_A.get_utility(candidate_bid),
-                            self.profile_B.get_utility(candidate_bid),
-                        ],
-                    }
-                )
+    def get_bid_matrix(self) -> np.ndarray:
+        """value indices of all bids (one row per bid, one column per issue), in the
+        same order as iterating over the domain.
+        """
+        shape = [len(v["values"]) for v in self.domain["issuesValues"].values()]
+        columns = np.unravel_index(np.arange(np.prod(shape)), shape)
+        return np.stack(columns, axis=1)
+
+    def get_bid(self, bid_nr: int) -> dict:
+        """get the bid dictionary of a bid by its position in the bid iteration order"""
+        issues_values = self.domain["issuesValues"]
+        shape = [len(v["values"]) for v in issues_values.values()]
+        value_indices = np.unravel_index(bid_nr, shape)
+        return {
+            i: v["values"][value_index]
+            for (i, v), value_index in zip(issues_values.items(), value_indices)
+        }
 
-            if len(all_bids) == 0:
-                break
+    def get_utility_arrays(self):
+        """utilities of all bids for profile A and B, in bid iteration order"""
+        if self._bid_utilities is None:
+            issues_values = self.domain["issuesValues"]
+            bid_matrix = self.get_bid_matrix()
+            self._bid_utilities = (
+                self.profile_A.get_utilities(issues_values, bid_matrix),
+                self.profile_B.get_utilities(issues_values, bid_matrix),
+            )
+        return self._bid_utilities
 
-        pareto_front = sorted(pareto_front, key=lambda d: d["utility"][0])
+    def get_pareto(self):
+        utilities_A, utilities_B = self.get_utility_arrays()
+
+        # sort bids on utility A (descending), then utility B (descending), then bid order.
+        order = np.lexsort((np.arange(len(utilities_A)), -utilities_B, -utilities_A))
+        sorted_B = utilities_B[order]
+
+        # a bid is Pareto optimal if its utility B is higher than that of every bid
+        # before it. Of bids with identical utilities, only the first one is kept.
+        best_B_before = np.maximum.accumulate(
+            np.concatenate(([-np.inf], sorted_B[:-1]))
+        )
+        pareto_bid_nrs = order[sorted_B > best_B_before][::-1]
+
+        pareto_front = [
+            {
+                "bid": self.get_bid(bid_nr),
+                "utility": [float(utilities_A[bid_nr]), float(utilities_B[bid_nr])],
+            }
+            for bid_nr in pareto_bid_nrs
+        ]
 
         return pareto_front
 
-    def get_distribution(self, bids_iter) -> float:
-        min_distance_sum = 0.0
+    def get_distribution(self, max_chunk_elements: int = 2**20) -> float:
+        """calculate the average Euclidian distance in terms of utility between a bid and
+        its closest bid on the Pareto front, over all bids of the domain.
+
+        Args:
+            max_chunk_elements (int, optional): bounds the memory usage, at most this many
+                bid-to-Pareto distances are computed at once. Defaults to 2**20.
+
+        Returns:
+            float: distribution
+        """
+        if not self.pareto_front:
+            raise ValueError("Pareto front not calculated")
+
+        utilities_A, utilities_B = self.get_utility_arrays()
+        pareto_A, pareto_B = np.array([p["utility"] for p in self.pareto_front]).T
 
-        for i, bid in enumerate(bids_iter):
-            min_distance = self.distance_to_pareto(bid)
-            min_distance_sum += min_distance
+        chunk_size = max(1, max_chunk_elements // len(self.pareto_front))
+        min_distance_sum = 0.0
+        for start in range(0, len(utilities_A), chunk_size):
+            chunk_A = utilities_A[start : start + chunk_size, None]
+            chunk_B = utilities_B[start : start + chunk_size, None]
+            distances = np.sqrt((chunk_A - pareto_A) ** 2 + (chunk_B - pareto_B) ** 2)
+            min_distances = np.minimum(distances.min(axis=1), 5.0)
+            min_distance_sum += float(min_distances.sum())
 
-        distribution = min_distance_sum / (i + 1)
+        distribution = min_distance_sum / len(utilities_A)
 
         return distribution
 
-    def _dominates(self, bid, candidate_bid):
-        if self.profile_A.get_utility(bid) < self.profile_A.get_utility(candidate_bid):
-            return False
-        elif self.profile_B.get_utility(bid) < self.profile_B.get_utility(
-            candidate_bid
-        ):
-            return False
-        else:
-            return True
-
     def distance_to_pareto(self, bid):
         if not self.pareto_front:
             raise ValueError("Pareto front not calculated")
@@ -0,0 +1,91 @@
+import json
+import os
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Deque, Dict, Iterator, Tuple
+
+
+def session_key(settings: dict) -> str:
+    """Key that identifies a session of a tournament by its settings"""
+    return json.dumps(settings, sort_keys=True)
+
+
+def read_journal(journal_file) -> Iterator[Tuple[dict, dict]]:
+    """Read the sessions that were recorded in a tournament journal. A truncated last
+    line (e.g. because the tournament was killed while writing) is skipped.
+
+    Args:
+        journal_file (str | Path): JSON Lines file written by `SessionJournal`
+
+    Yields:
+        Tuple[dict, dict]: session settings and session results summary
+    """
+    journal_file = Path(journal_file)
+    if not journal_file.exists():
+        return
+
+    with open(journal_file, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            yield entry["settings"], entry["results_summary"]
+
+
+def load_finished_sessions(
+    journal_file, retry_errors: bool = True
+) -> Dict[str, Deque[dict]]:
+    """Collect the results summaries of a tournament journal by session key. The same
+    session can occur multiple times in a tournament, hence a queue per key.
+
+    Args:
+        journal_file (str | Path): JSON Lines file written by `SessionJournal`
+        retry_errors (bool, optional): leave out sessions that ended in an "ERROR"
+            result, such that they are run again. Defaults to True.
+
+    Returns:
+        Dict[str, Deque[dict]]: results summaries per session key, in journal order
+    """
+    finished_sessions = defaultdict(deque)
+    for settings, results_summary in read_journal(journal_file):
+        if retry_errors and results_summary.get("result") == "ERROR":
+            continue
+        finished_sessions[session_key(settings)].append(results_summary)
+
+    return finished_sessions
+
+
+class SessionJournal:
+    """Append-only JSON Lines journal of finished tournament sessions. Every line is
+    flushed to disk as soon as it is written, so that an interrupted tournament can
+    be resumed from it.
+    """
+
+    def __init__(self, journal_file):
+        self.journal_file = Path(journal_file)
+        if not self.journal_file.parent.exists():
+            self.journal_file.parent.mkdir(parents=True)
+        self._file = open(self.journal_file, "a", encoding="utf-8")
+
+        # terminate a line that was cut off when a previous run was interrupted
+        if self._file.tell() > 0:
+            with open(self.journal_file, "rb") as f:
+                f.seek(-1, 2)
+                if f.read(1) != b"\n":
+                    self._file.write("\n")
+
+    def append(self, settings: dict, results_summary: dict):
+        entry = {"settings": settings, "results_summary": results_summary}
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
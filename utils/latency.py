@@ -0,0 +1,113 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from threading import Lock
+from typing import Dict, Iterable, List
+
+import numpy as np
+from geniusweb.inform.Inform import Inform
+from geniusweb.inform.Settings import Settings
+from geniusweb.party.DefaultParty import DefaultParty
+
+from utils.party_hooks import hook_notify_change
+
+# upper edges (ms) of the latency histogram buckets, the last bucket is unbounded
+HISTOGRAM_EDGES_MS = [1, 10, 100, 1000, 10000]
+HISTOGRAM_LABELS = [f"<={edge}ms" for edge in HISTOGRAM_EDGES_MS] + [
+    f">{HISTOGRAM_EDGES_MS[-1]}ms"
+]
+
+# per agent latency statistics in the session results summary, see summarise_latency
+LATENCY_STATS = ("settings_ms", "turn_p50_ms", "turn_p95_ms", "turn_max_ms")
+
+
+class LatencyRecorder:
+    """Records how long every party spends in notifyChange, per type of Inform
+    (Settings, ActionDone, YourTurn, ...). Parties are identified by the party ID
+    that they receive in the Settings.
+    """
+
+    def __init__(self):
+        self._durations: Dict[str, Dict[str, List[float]]] = defaultdict(
+            lambda: defaultdict(list)
+        )
+        self._party_ids: Dict[int, str] = {}
+        self._lock = Lock()
+
+    def on_notify_change(self, party: DefaultParty, info: Inform, duration_ms: float):
+        with self._lock:
+            if isinstance(info, Settings):
+                self._party_ids[id(party)] = info.getID().getName()
+            party_id = self._party_ids.get(id(party), type(party).__name__)
+            self._durations[party_id][type(info).__name__].append(duration_ms)
+
+    def summary(self) -> Dict[str, Dict[str, dict]]:
+        """Latency statistics per party and per Inform type.
+
+        Returns:
+            Dict[str, Dict[str, dict]]: {party ID: {Inform type: statistics}}, where the
+                statistics contain count, total, p50, p95 and max (in ms) and a
+                histogram with counts per bucket of HISTOGRAM_EDGES_MS.
+        """
+        with self._lock:
+            return {
+                party_id: {
+                    inform_type: latency_statistics(durations)
+                    for inform_type, durations in informs.items()
+                }
+                for party_id, informs in self._durations.items()
+            }
+
+
+def latency_statistics(durations: List[float]) -> dict:
+    durations = np.asarray(durations, dtype=float)
+    bucket = np.searchsorted(HISTOGRAM_EDGES_MS, durations, side="left")
+    histogram = np.bincount(bucket, minlength=len(HISTOGRAM_EDGES_MS) + 1)
+
+    return {
+        "count": len(durations),
+        "total_ms": float(durations.sum()),
+        "p50_ms": float(np.percentile(durations, 50)),
+        "p95_ms": float(np.percentile(durations, 95)),
+        "max_ms": float(durations.max()),
+        "histogram": dict(zip(HISTOGRAM_LABELS, histogram.tolist())),
+    }
+
+
+def summarise_latency(latency: Dict[str, Dict[str, dict]]) -> dict:
+    """Flatten the latency statistics of a session into entries of the session
+    results summary, numbered by the position of the party (like "utility_1").
+
+    Args:
+        latency (Dict[str, Dict[str, dict]]): output of `LatencyRecorder.summary`
+
+    Returns:
+        dict: time at Settings and p50/p95/max time per turn (YourTurn) in ms
+    """
+    results_summary = {}
+    for party_id, informs in latency.items():
+        position = party_id.split("_")[-1]
+        if "Settings" in informs:
+            results_summary[f"settings_ms_{position}"] = informs["Settings"]["total_ms"]
+        if "YourTurn" in informs:
+            turns = informs["YourTurn"]
+            results_summary[f"turn_p50_ms_{position}"] = turns["p50_ms"]
+            results_summary[f"turn_p95_ms_{position}"] = turns["p95_ms"]
+            results_summary[f"turn_max_ms_{position}"] = turns["max_ms"]
+
+    return results_summary
+
+
+@contextmanager
+def record_latency(classpaths: Iterable[str]):
+    """Record the time that the given party classes spend in notifyChange during
+    the negotiation sessions that run within this context.
+
+    Args:
+        classpaths (Iterable[str]): classpaths of the participating agents
+
+    Yields:
+        LatencyRecorder: the recorded latencies
+    """
+    recorder = LatencyRecorder()
+    with hook_notify_change(classpaths, recorder.on_notify_change):
+        yield recorder
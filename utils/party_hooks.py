@@ -0,0 +1,71 @@
+import importlib
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Callable, Iterable
+
+from geniusweb.inform.Inform import Inform
+from geniusweb.party.DefaultParty import DefaultParty
+
+
+def load_party_class(classpath: str) -> type:
+    """Import a party class from its classpath (e.g. "agents.random_agent.random_agent.RandomAgent")"""
+    module_name, class_name = classpath.rsplit(".", 1)
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+@contextmanager
+def hook_notify_change(
+    classpaths: Iterable[str],
+    hook: Callable[[DefaultParty, Inform, float], None],
+):
+    """Temporarily wrap `notifyChange` of the given party classes, such that `hook` is
+    called with the party, the received Inform and the time (ms) the party spent
+    handling it. The agent code itself is left untouched, the original methods are
+    restored when the context exits.
+
+    Args:
+        classpaths (Iterable[str]): classpaths of the parties to hook
+        hook (Callable[[DefaultParty, Inform, float], None]): called after every notifyChange
+    """
+    party_classes = {load_party_class(classpath) for classpath in classpaths}
+
+    # look up the original methods before patching, so that a party class that
+    # inherits from another hooked class is not wrapped twice.
+    originals = {
+        party_class: (
+            party_class.__dict__.get("notifyChange"),
+            party_class.notifyChange,
+        )
+        for party_class in party_classes
+    }
+    # parties that are currently inside notifyChange, guards against double
+    # measurements when an agent calls super().notifyChange on a hooked class.
+    active = set()
+
+    def wrap(notify_change):
+        def timed_notify_change(self, info: Inform):
+            if id(self) in active:
+                return notify_change(self, info)
+
+            active.add(id(self))
+            start = perf_counter()
+            try:
+                return notify_change(self, info)
+            finally:
+                duration_ms = (perf_counter() - start) * 1000
+                active.discard(id(self))
+                hook(self, info, duration_ms)
+
+        return timed_notify_change
+
+    for party_class, (_, notify_change) in originals.items():
+        party_class.notifyChange = wrap(notify_change)
+
+    try:
+        yield
+    finally:
+        for party_class, (own_notify_change, _) in originals.items():
+            if own_notify_change is None:
+                del party_class.notifyChange
+            else:
+                party_class.notifyChange = own_notify_change
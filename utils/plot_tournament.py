@@ -0,0 +1,119 @@
+import html
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, List
+
+from plotly.offline import get_plotlyjs
+
+from utils.compact_trace import read_compact_trace
+from utils.plot_trace import plot_trace
+
+
+def session_trace_file(traces_dir, index: int) -> Path:
+    """File of the compact trace of a tournament session, by index of the step"""
+    return Path(traces_dir, f"session_{index:05d}.npz")
+
+
+def plot_tournament(
+    traces_dir,
+    tournament_steps: List[dict],
+    tournament_results: List[dict],
+    sessions: Iterable[int] = None,
+    workers: int = 1,
+) -> Path:
+    """Plot the compact traces of a tournament (see `run_tournament`) and write an
+    index.html that links to all plots. Plots are rendered in worker processes that
+    read the traces themselves, so the traces are never all in memory at once. The
+    plots share one copy of plotly.js ("plotly.min.js" next to them) instead of
+    embedding it in every file.
+
+    Args:
+        traces_dir (str | Path): directory with the compact traces
+        tournament_steps (List[dict]): session settings of the tournament
+        tournament_results (List[dict]): session results summaries of the tournament
+        sessions (Iterable[int], optional): indices of the steps to plot. Defaults
+            to all sessions that have a trace.
+        workers (int, optional): number of worker processes. Defaults to 1.
+
+    Returns:
+        Path: the index.html file
+    """
+    traces_dir = Path(traces_dir)
+    if sessions is None:
+        sessions = range(len(tournament_steps))
+    sessions = [i for i in sessions if session_trace_file(traces_dir, i).exists()]
+
+    # written once up front, such that the workers do not all copy it
+    plotlyjs_file = traces_dir.joinpath("plotly.min.js")
+    if sessions and not plotlyjs_file.exists():
+        plotlyjs_file.write_text(get_plotlyjs(), encoding="utf-8")
+
+    trace_files = [session_trace_file(traces_dir, i) for i in sessions]
+    plot_files = [trace_file.with_suffix(".html") for trace_file in trace_files]
+    if workers == 1:
+        plotted = list(map(_plot_session, trace_files, plot_files))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            plotted = list(executor.map(_plot_session, trace_files, plot_files))
+
+    plots = {
+        i: plot_file for i, plot_file, ok in zip(sessions, plot_files, plotted) if ok
+    }
+    index_file = traces_dir.joinpath("index.html")
+    with open(index_file, "w", encoding="utf-8") as f:
+        f.write(_index_html(tournament_steps, tournament_results, plots))
+
+    return index_file
+
+
+def _plot_session(trace_file: Path, plot_file: Path) -> bool:
+    try:
+        plot_trace(
+            read_compact_trace(trace_file),
+            str(plot_file),
+            fast=True,
+            include_plotlyjs="directory",
+        )
+    except Exception:
+        traceback.print_exc()
+        return False
+    return True
+
+
+def _index_html(tournament_steps: List[dict], tournament_results: List[dict], plots):
+    columns = ["session", "agent_1", "agent_2", "profiles", "result"]
+    columns += ["utility_1", "utility_2", "num_offers", "plot"]
+
+    rows = []
+    for index, (settings, results) in enumerate(
+        zip(tournament_steps, tournament_results)
+    ):
+        profiles = " / ".join(settings["profiles"])
+        plot = ""
+        if index in plots:
+            plot = f'<a href="{html.escape(plots[index].name)}">plot</a>'
+        cells = [
+            str(index),
+            html.escape(str(results.get("agent_1", ""))),
+            html.escape(str(results.get("agent_2", ""))),
+            html.escape(profiles),
+            html.escape(str(results.get("result", ""))),
+            f"{results.get('utility_1', 0):.3f}",
+            f"{results.get('utility_2', 0):.3f}",
+            str(results.get("num_offers", "")),
+            plot,
+        ]
+        rows.append("<tr>" + "".join(f"<td>{cell}</td>" for cell in cells) + "</tr>")
+
+    header = "<tr>" + "".join(f"<th>{column}</th>" for column in columns) + "</tr>"
+    return (
+        '<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n'
+        "<title>Tournament sessions</title>\n"
+        "<style>table {border-collapse: collapse} td, th {padding: 2px 8px}</style>\n"
+        "</head>\n<body>\n<table>\n"
+        + header
+        + "\n"
+        + "\n".join(rows)
+        + "\n</table>\n</body>\n</html>\n"
+    )
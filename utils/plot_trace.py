@@ -1,10 +1,31 @@
 import os
 from collections import defaultdict
+from typing import Union
 
+import numpy as np
 import plotly.graph_objects as go
 
 
-def plot_trace(results_trace: dict, plot_file: str):
+def plot_trace(
+    results_trace: dict,
+    plot_file: str,
+    fast: bool = False,
+    max_points: int = 5000,
+    include_plotlyjs: Union[bool, str] = True,
+):
+    """Plot the utilities of the offers in a session trace to an html file.
+
+    Args:
+        results_trace (dict): session results trace (see `run_session`)
+        plot_file (str): html file to write to
+        fast (bool, optional): render long sessions with WebGL (Scattergl) and
+            downsample every line to at most `max_points` points. Defaults to False.
+        max_points (int, optional): point budget per line in fast mode. Defaults to 5000.
+        include_plotlyjs (bool | str, optional): how the html file gets plotly.js,
+            see `include_plotlyjs` of plotly's `write_html`. Use "directory" to share
+            one plotly.min.js between the plots in a directory. Defaults to True
+            (embedded in the file).
+    """
     utilities = defaultdict(lambda: defaultdict(lambda: {"x": [], "y": [], "bids": []}))
     accept = {"x": [], "y": [], "bids": []}
     for index, action in enumerate(results_trace["actions"], 1):
@@ -36,11 +57,17 @@ def plot_trace(results_trace: dict, plot_file: str):
     )
 
     color = {0: "red", 1: "blue"}
+    scatter = go.Scattergl if fast else go.Scatter
     for i, (agent, data) in enumerate(utilities.items()):
         for actor, utility in data.items():
             name = "_".join(agent.split("_")[-2:])
+            x, y = np.asarray(utility["x"]), np.asarray(utility["y"], dtype=float)
+            keep = lttb_indices(x, y, max_points) if fast else np.arange(len(x))
+
+            # hover text is only created for the points that are drawn
             text = []
-            for bid, util in zip(utility["bids"], utility["y"]):
+            for k in keep:
+                bid, util = utility["bids"][k], utility["y"][k]
                 text.append(
                     "<br>".join(
                         [f"<b>utility: {util:.3f}</b><br>"]
@@ -48,10 +75,10 @@ def plot_trace(results_trace: dict, plot_file: str):
                     )
                 )
             fig.add_trace(
-                go.Scatter(
+                scatter(
                     mode="lines+markers" if agent == actor else "markers",
-                    x=utilities[agent][actor]["x"],
-                    y=utilities[agent][actor]["y"],
+                    x=x[keep],
+                    y=y[keep],
                     name=f"{name} offered" if agent == actor else f"{name} received",
                     legendgroup=agent,
                     marker={"color": color[i]},
@@ -72,4 +99,49 @@ def plot_trace(results_trace: dict, plot_file: str):
     )
     fig.update_xaxes(title_text="round", range=[0, index + 1], ticks="outside")
     fig.update_yaxes(title_text="utility", range=[0, 1], ticks="outside")
-    fig.write_html(f"{os.path.splitext(plot_file)[0]}.html")
+    fig.write_html(
+        f"{os.path.splitext(plot_file)[0]}.html", include_plotlyjs=include_plotlyjs
+    )
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, num_points: int) -> np.ndarray:
+    """Select the points of a line to keep when downsampling it, with the Largest
+    Triangle Three Buckets algorithm. The first and last point are always kept, from
+    every bucket in between the point that spans the largest triangle with the
+    previously kept point and the average of the next bucket.
+
+    Args:
+        x (np.ndarray): x coordinates, sorted ascending
+        y (np.ndarray): y coordinates
+        num_points (int): maximum number of points to keep
+
+    Returns:
+        np.ndarray: indices of the points to keep, sorted
+    """
+    n = len(x)
+    if num_points >= n or num_points < 3:
+        return np.arange(n)
+
+    x, y = x.astype(float), y.astype(float)
+    edges = np.linspace(1, n - 1, num_points - 1).astype(int)
+    keep = np.empty(num_points, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+
+    # average point of every bucket, the last point is the final "bucket"
+    starts = np.append(edges[:-1], n - 1)
+    sizes = np.diff(np.append(starts, n))
+    mean_x = np.add.reduceat(x, starts) / sizes
+    mean_y = np.add.reduceat(y, starts) / sizes
+
+    for bucket in range(num_points - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        next_x, next_y = mean_x[bucket + 1], mean_y[bucket + 1]
+
+        previous = keep[bucket]
+        area = np.abs(
+            (x[previous] - next_x) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (next_y - y[previous])
+        )
+        keep[bucket + 1] = start + np.argmax(area)
+
+    return keep
@@ -0,0 +1,331 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.latency import LATENCY_STATS
+
+# columns with text values, stored as integer codes into a vocabulary
+CATEGORICAL_COLUMNS = {"agent_1": "agent", "agent_2": "agent", "result": "result"}
+RESULTS = ["agreement", "failed", "ERROR"]
+
+Columns = Dict[str, np.ndarray]
+Vocabularies = Dict[str, List[str]]
+
+
+class ResultStore:
+    """Columnar store of tournament session results, with one row per session. Rows
+    are buffered and written in chunks (one NumPy .npz file per chunk), so memory use
+    does not grow with the number of sessions and an interrupted tournament keeps
+    all flushed chunks. A chunk is written when it is full, or when a row is added
+    `flush_interval_s` seconds after the oldest buffered row, so slow tournaments
+    reach the disk too. Text columns (agent names, result) are stored as integer
+    codes, the vocabularies are kept in "vocabularies.json".
+
+    Args:
+        directory (str | Path): directory of the store, created if it does not exist
+        chunk_size (int, optional): maximum number of rows per chunk. Defaults to 4096.
+        flush_interval_s (float, optional): maximum age in seconds of the buffered
+            rows when a row is added. Defaults to 60.0.
+    """
+
+    def __init__(
+        self, directory, chunk_size: int = 4096, flush_interval_s: float = 60.0
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.chunk_size = chunk_size
+        self.flush_interval_s = flush_interval_s
+
+        self._encoder = _RowEncoder(_read_vocabularies(self.directory))
+        self._num_chunks = len(_chunk_files(self.directory))
+        self._rows: List[dict] = []
+        self._oldest_row_time = None
+
+    @property
+    def vocabularies(self) -> Vocabularies:
+        return self._encoder.vocabularies
+
+    def steps(self) -> Set[int]:
+        """Indices of the sessions in the store (flushed or not), e.g. to not add the
+        sessions of a resumed tournament again.
+        """
+        steps = {row["step"] for row in self._rows}
+        for chunk_file in _chunk_files(self.directory):
+            with np.load(chunk_file) as chunk:
+                steps.update(chunk["step"].tolist())
+        return steps
+
+    def append(self, results_summary: dict, step: int = -1):
+        """Add the results summary of a session as a row.
+
+        Args:
+            results_summary (dict): session results summary (see `run_session`)
+            step (int, optional): index of the session in the tournament. Defaults to -1.
+        """
+        if not self._rows:
+            self._oldest_row_time = time.monotonic()
+        self._rows.append(self._encoder.encode(results_summary, step))
+
+        if (
+            len(self._rows) >= self.chunk_size
+            or time.monotonic() - self._oldest_row_time >= self.flush_interval_s
+        ):
+            self.flush()
+
+    def flush(self):
+        if not self._rows:
+            return
+
+        columns = _rows_to_columns(self._rows)
+
+        # vocabularies first, such that every chunk on disk can be decoded
+        _write_vocabularies(self.directory, self.vocabularies)
+        chunk_file = self.directory.joinpath(f"chunk_{self._num_chunks:06d}.npz")
+        np.savez(chunk_file, **columns)
+
+        self._num_chunks += 1
+        self._rows = []
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def read_results(directory) -> Tuple[Columns, Vocabularies]:
+    """Read all chunks of a ResultStore.
+
+    Args:
+        directory (str | Path): directory of the store
+
+    Returns:
+        Tuple[Columns, Vocabularies]: column arrays with one row per session (missing
+            values are NaN, or -1 for codes) and the vocabularies of the text columns.
+            A session that was stored more than once (e.g. an error that was run
+            again on resume) only keeps its last row.
+    """
+    directory = Path(directory)
+    chunks = []
+    for chunk_file in _chunk_files(directory):
+        with np.load(chunk_file) as chunk:
+            chunks.append({column: chunk[column] for column in chunk.files})
+
+    return _last_row_per_step(_concatenate(chunks)), _read_vocabularies(directory)
+
+
+def columns_from_summaries(
+    results_summaries: Iterable[dict],
+) -> Tuple[Columns, Vocabularies]:
+    """Convert session results summaries to columns, as stored by a ResultStore"""
+    encoder = _RowEncoder()
+    rows = [encoder.encode(results_summary) for results_summary in results_summaries]
+
+    return _rows_to_columns(rows), encoder.vocabularies
+
+
+def summarise_results(columns: Columns, vocabularies: Vocabularies) -> pd.DataFrame:
+    """Summarise tournament results per agent, with group-bys over the agent codes.
+
+    Args:
+        columns (Columns): session results as returned by `read_results`
+        vocabularies (Vocabularies): vocabularies of the text columns
+
+    Returns:
+        pd.DataFrame: averages and result counts per agent, sorted by average utility
+    """
+    agents = vocabularies.get("agent", [])
+    results = vocabularies.get("result", [])
+    num_agents = len(agents)
+    num_sessions = len(columns["agent_1"]) if "agent_1" in columns else 0
+
+    def per_agent(column_1, column_2=None):
+        # one entry per agent per session, agent 1 before agent 2 of the same session
+        column_2 = column_1 if column_2 is None else column_2
+        return np.stack([column_1, column_2], axis=1).ravel()
+
+    def get(column, fill=np.nan):
+        return columns.get(column, np.full(num_sessions, fill))
+
+    agent = per_agent(get("agent_1", -1), get("agent_2", -1))
+    valid = agent >= 0
+    agent = agent[valid]
+
+    def group_sum(values):
+        return np.bincount(agent, weights=values[valid], minlength=num_agents)
+
+    count = np.bincount(agent, minlength=num_agents)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        utility = per_agent(get("utility_1"), get("utility_2"))
+        num_offers = np.nan_to_num(per_agent(get("num_offers")))
+        summary = {
+            "avg_utility": group_sum(utility) / count,
+            "avg_nash_product": group_sum(per_agent(get("nash_product"))) / count,
+            "avg_social_welfare": group_sum(per_agent(get("social_welfare"))) / count,
+            "avg_num_offers": group_sum(num_offers) / count,
+            "count": count,
+        }
+
+        # number of sessions per agent and result
+        result = per_agent(get("result", -1))[valid]
+        counts = np.zeros((num_agents, len(results)), dtype=np.int64)
+        np.add.at(counts, (agent[result >= 0], result[result >= 0]), 1)
+        for code, name in enumerate(results):
+            summary[name] = counts[:, code]
+
+        # latency is averaged over the sessions it was recorded in, except for the
+        # worst turn of all sessions
+        for stat in LATENCY_STATS:
+            if f"{stat}_1" not in columns and f"{stat}_2" not in columns:
+                continue
+            values = per_agent(get(f"{stat}_1"), get(f"{stat}_2"))[valid]
+            recorded = ~np.isnan(values)
+            if stat == "turn_max_ms":
+                maximum = np.full(num_agents, -np.inf)
+                np.maximum.at(maximum, agent[recorded], values[recorded])
+                summary["max_turn_ms"] = np.where(np.isinf(maximum), np.nan, maximum)
+            else:
+                sums = np.bincount(
+                    agent[recorded], weights=values[recorded], minlength=num_agents
+                )
+                recorded_count = np.bincount(agent[recorded], minlength=num_agents)
+                summary[f"avg_{stat}"] = sums / recorded_count
+
+    column_order = [
+        "avg_utility",
+        "avg_nash_product",
+        "avg_social_welfare",
+        "avg_num_offers",
+        "count",
+    ] + RESULTS
+    column_type = {column: int for column in ["count"] + RESULTS}
+
+    # only agents that took part in a session
+    tournament_results_summary = pd.DataFrame(summary, index=agents, dtype=float)
+    tournament_results_summary = tournament_results_summary[count > 0]
+
+    # clean data and types
+    tournament_results_summary = tournament_results_summary.fillna(0)
+    for column in column_order:
+        if column not in tournament_results_summary:
+            tournament_results_summary[column] = 0
+    tournament_results_summary = tournament_results_summary.astype(column_type)
+
+    # latency columns are only present if latency was recorded
+    column_order += [
+        column
+        for column in tournament_results_summary
+        if column not in column_order and column not in results
+    ]
+
+    # structure dataframe
+    tournament_results_summary.sort_values("avg_utility", ascending=False, inplace=True)
+    tournament_results_summary = tournament_results_summary[column_order]
+
+    return tournament_results_summary
+
+
+def summarise_store(directory) -> pd.DataFrame:
+    """Summarise the tournament results in a ResultStore, see `summarise_results`"""
+    return summarise_results(*read_results(directory))
+
+
+class _RowEncoder:
+    # converts results summaries to rows of numbers, text is replaced by codes
+    def __init__(self, vocabularies: Vocabularies = None):
+        self.vocabularies = vocabularies if vocabularies is not None else {}
+        self._codes = {
+            name: {value: code for code, value in enumerate(vocabulary)}
+            for name, vocabulary in self.vocabularies.items()
+        }
+
+    def encode(self, results_summary: dict, step: int = -1) -> dict:
+        row = {"step": step}
+        for column, value in results_summary.items():
+            if column in CATEGORICAL_COLUMNS:
+                row[column] = self._code(CATEGORICAL_COLUMNS[column], value)
+            elif isinstance(value, (int, float)):
+                row[column] = value
+        return row
+
+    def _code(self, vocabulary_name: str, value: str) -> int:
+        codes = self._codes.setdefault(vocabulary_name, {})
+        if value not in codes:
+            codes[value] = len(codes)
+            self.vocabularies.setdefault(vocabulary_name, []).append(value)
+        return codes[value]
+
+
+def _is_code_column(column: str) -> bool:
+    return column == "step" or column in CATEGORICAL_COLUMNS
+
+
+def _rows_to_columns(rows: List[dict]) -> Columns:
+    column_names = {column for row in rows for column in row}
+    columns = {}
+    for column in column_names:
+        if _is_code_column(column):
+            values = [row.get(column, -1) for row in rows]
+            columns[column] = np.array(values, dtype=np.int64)
+        else:
+            values = [row.get(column, np.nan) for row in rows]
+            columns[column] = np.array(values, dtype=np.float64)
+    return columns
+
+
+def _concatenate(chunks: List[Columns]) -> Columns:
+    # chunks can have different columns (e.g. latency recorded in some sessions only)
+    column_names = {column for chunk in chunks for column in chunk}
+    columns = {}
+    for column in column_names:
+        fill = -1 if _is_code_column(column) else np.nan
+        parts = [
+            chunk[column] if column in chunk else np.full(len(chunk["step"]), fill)
+            for chunk in chunks
+        ]
+        columns[column] = np.concatenate(parts)
+    return columns
+
+
+def _last_row_per_step(columns: Columns) -> Columns:
+    # rows without a step (-1) are all kept
+    if "step" not in columns:
+        return columns
+    steps = columns["step"]
+    reversed_steps = steps[::-1]
+    _, last = np.unique(reversed_steps, return_index=True)
+    keep = np.zeros(len(steps), dtype=bool)
+    keep[len(steps) - 1 - last] = True
+    keep[steps < 0] = True
+    if keep.all():
+        return columns
+    return {column: values[keep] for column, values in columns.items()}
+
+
+def _chunk_files(directory: Path) -> List[Path]:
+    return sorted(directory.glob("chunk_*.npz"))
+
+
+def _read_vocabularies(directory: Path) -> Vocabularies:
+    vocabularies_file = directory.joinpath("vocabularies.json")
+    if not vocabularies_file.exists():
+        return {}
+    with open(vocabularies_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_vocabularies(directory: Path, vocabularies: Vocabularies):
+    # write to a temporary file first, so that the vocabularies are never half written
+    vocabularies_file = directory.joinpath("vocabularies.json")
+    temporary_file = directory.joinpath("vocabularies.json.tmp")
+    with open(temporary_file, "w", encoding="utf-8") as f:
+        json.dump(vocabularies, f)
+    os.replace(temporary_file, vocabularies_file)
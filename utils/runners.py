@@ -1,37 +1,67 @@
 import shutil
-from collections import defaultdict
+import traceback
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import ExitStack
+from decimal import Decimal
 from itertools import permutations
-from math import factorial, prod
+from math import prod
 from pathlib import Path
-from typing import Tuple
+from typing import Iterator, List, Tuple
 
+import numpy as np
 import pandas as pd
+from geniusweb.issuevalue.Bid import Bid
 from geniusweb.profile.utilityspace.LinearAdditiveUtilitySpace import (
     LinearAdditiveUtilitySpace,
 )
-from geniusweb.profileconnection.ProfileConnectionFactory import (
-    ProfileConnectionFactory,
-)
 from geniusweb.protocol.NegoSettings import NegoSettings
 from geniusweb.protocol.session.saop.SAOPState import SAOPState
 from geniusweb.simplerunner.ClassPathConnectionFactory import ClassPathConnectionFactory
 from geniusweb.simplerunner.NegoRunner import StdOutReporter
 from geniusweb.simplerunner.Runner import Runner
 from pyson.ObjectMapper import ObjectMapper
-from uri.uri import URI
 
+from agents.common.bidspace import BidSpace
+from agents.common.profile_cache import get_profile
 from utils.ask_proceed import ask_proceed
+from utils.compact_trace import write_compact_trace
+from utils.journal import SessionJournal, load_finished_sessions, session_key
+from utils.latency import record_latency, summarise_latency
+from utils.plot_tournament import plot_tournament, session_trace_file
+from utils.result_store import ResultStore, columns_from_summaries, summarise_results
+from utils.virtual_time import virtual_time, with_plain_progress
+
+# time limit (ms) of sessions with a round based deadline if no "deadline_time_ms" is set
+DEFAULT_ROUNDS_DURATION_MS = 60000
+
+# tournament settings that are passed on to every session
+SESSION_SETTINGS_KEYS = (
+    "deadline_time_ms",
+    "deadline_rounds",
+    "virtual_time",
+    "turn_cost_ms",
+    "latency",
+)
 
 
 def run_session(settings) -> Tuple[dict, dict]:
     agents = settings["agents"]
     profiles = settings["profiles"]
-    deadline_time_ms = settings["deadline_time_ms"]
+    deadline_time_ms = settings.get("deadline_time_ms")
+    deadline_rounds = settings.get("deadline_rounds")
+    use_virtual_time = settings.get("virtual_time", False)
+    turn_cost_ms = settings.get("turn_cost_ms", 1.0)
+    use_latency = settings.get("latency", False)
 
     # quick and dirty checks
     assert isinstance(agents, list) and len(agents) == 2
     assert isinstance(profiles, list) and len(profiles) == 2
-    assert isinstance(deadline_time_ms, int) and deadline_time_ms > 0
+    check_deadline(deadline_time_ms, deadline_rounds)
+    assert isinstance(use_virtual_time, bool)
+    assert isinstance(turn_cost_ms, (int, float)) and turn_cost_ms >= 0
+    assert isinstance(use_latency, bool)
     assert all(["class" in agent for agent in agents])
 
     for agent in agents:
@@ -39,11 +69,22 @@ def run_session(settings) -> Tuple[dict, dict]:
             if "storage_dir" in agent["parameters"]:
                 storage_dir = Path(agent["parameters"]["storage_dir"])
                 if not storage_dir.exists():
-                    storage_dir.mkdir(parents=True)
+                    storage_dir.mkdir(parents=True, exist_ok=True)
 
     # file path to uri
     profiles_uri = [f"file:{x}" for x in profiles]
 
+    # a round based deadline still has a time limit, so that a stuck agent cannot hang the session
+    if deadline_rounds is not None:
+        deadline = {
+            "DeadlineRounds": {
+                "rounds": deadline_rounds,
+                "durationms": deadline_time_ms or DEFAULT_ROUNDS_DURATION_MS,
+            }
+        }
+    else:
+        deadline = {"DeadlineTime": {"durationms": deadline_time_ms}}
+
     # create full settings dictionary that geniusweb requires
     settings_full = {
         "SAOPSettings": {
@@ -79,8 +120,7 @@ def run_session(settings) -> Tuple[dict, dict]:
                     }
                 },
             ],
-            # "deadline": {"DeadlineRounds": {"rounds": rounds, "durationms": 60000}},
-            "deadline": {"DeadlineTime": {"durationms": deadline_time_ms}},
+            "deadline": deadline,
         }
     }
 
@@ -90,37 +130,80 @@ def run_session(settings) -> Tuple[dict, dict]:
     # create the negotiation session runner object
     runner = Runner(settings_obj, ClassPathConnectionFactory(), StdOutReporter(), 0)
 
-    # run the negotiation session
-    runner.run()
+    # run the negotiation session, optionally on a simulated clock that only advances
+    # with the compute time of the agents (plus a fixed cost per turn), and optionally
+    # recording the time the agents spend handling every Inform
+    classpaths = [agent["class"] for agent in agents]
+    latency_recorder = None
+    with ExitStack() as stack:
+        if use_virtual_time:
+            stack.enter_context(virtual_time(classpaths, turn_cost_ms))
+        if use_latency:
+            latency_recorder = stack.enter_context(record_latency(classpaths))
+        runner.run()
 
     # get results from the session in class format and dict format
     results_class: SAOPState = runner.getProtocol().getState()
+    if use_virtual_time:
+        results_class = with_plain_progress(results_class)
     results_dict: dict = ObjectMapper().toJson(results_class)["SAOPState"]
 
     # add utilities to the results and create a summary
     results_trace, results_summary = process_results(results_class, results_dict)
 
+    if latency_recorder is not None:
+        results_trace["latency"] = latency_recorder.summary()
+        results_summary.update(summarise_latency(results_trace["latency"]))
+
     return results_trace, results_summary
 
 
-def run_tournament(tournament_settings: dict) -> Tuple[list, list]:
+def check_deadline(deadline_time_ms, deadline_rounds):
+    """Validate the deadline settings of a session or tournament. At least one of both
+    must be set. If both are set, the session ends after `deadline_rounds` rounds or
+    after `deadline_time_ms` milliseconds, whichever comes first.
+
+    Args:
+        deadline_time_ms (int): time limit of a session in ms, or None
+        deadline_rounds (int): round limit of a session, or None
+    """
+    assert (
+        deadline_time_ms is not None or deadline_rounds is not None
+    ), "either deadline_time_ms or deadline_rounds must be set"
+    if deadline_time_ms is not None:
+        assert isinstance(deadline_time_ms, int) and deadline_time_ms > 0
+    if deadline_rounds is not None:
+        assert isinstance(deadline_rounds, int) and deadline_rounds > 0
+
+
+def run_tournament(tournament_settings: dict) -> Tuple[list, list, pd.DataFrame]:
     # create agent permutations, ensures that every agent plays against every other agent on both sides of a profile set.
     agents = tournament_settings["agents"]
     profile_sets = tournament_settings["profile_sets"]
-    deadline_time_ms = tournament_settings["deadline_time_ms"]
+    workers = tournament_settings.get("workers", 1)
+    journal_file = tournament_settings.get("journal")
+    resume = tournament_settings.get("resume", False)
+    retry_errors = tournament_settings.get("retry_errors", True)
+    result_store_dir = tournament_settings.get("result_store")
+    traces_dir = tournament_settings.get("traces")
+    plot_traces = tournament_settings.get("plot_traces", False)
 
-    num_sessions = (factorial(len(agents)) // factorial(len(agents) - 2)) * len(
-        profile_sets
+    # quick and dirty checks
+    check_deadline(
+        tournament_settings.get("deadline_time_ms"),
+        tournament_settings.get("deadline_rounds"),
     )
-    if num_sessions > 100:
-        message = (
-            f"WARNING: this would run {num_sessions} negotiation sessions. Proceed?"
-        )
-        if not ask_proceed(message):
-            print("Exiting script")
-            exit()
+    assert isinstance(workers, int) and workers > 0
+    assert not resume or journal_file is not None, "resuming requires a journal"
+    # a new tournament must not mix its sessions with those of an earlier run
+    assert resume or journal_file is None or _is_empty(journal_file), (
+        f"journal {journal_file} already exists, set resume to continue it"
+    )
+    assert resume or result_store_dir is None or _is_empty(result_store_dir), (
+        f"result store {result_store_dir} already exists, set resume to continue it"
+    )
+    assert not plot_traces or traces_dir is not None, "plotting requires traces"
 
-    tournament_results = []
     tournament_steps = []
     for profiles in profile_sets:
         # quick an dirty check
@@ -130,21 +213,188 @@ def run_tournament(tournament_settings: dict) -> Tuple[list, list]:
             settings = {
                 "agents": list(agent_duo),
                 "profiles": profiles,
-                "deadline_time_ms": deadline_time_ms,
             }
+            for key in SESSION_SETTINGS_KEYS:
+                if key in tournament_settings:
+                    settings[key] = tournament_settings[key]
+            tournament_steps.append(settings)
 
-            # run a single negotiation session
-            _, session_results_summary = run_session(settings)
+    # collect the results of sessions that already finished in a previous run
+    tournament_results = [None] * len(tournament_steps)
+    if resume:
+        finished_sessions = load_finished_sessions(journal_file, retry_errors)
+        for index, settings in enumerate(tournament_steps):
+            finished = finished_sessions.get(session_key(settings))
+            if finished:
+                tournament_results[index] = finished.popleft()
+    pending = [i for i, result in enumerate(tournament_results) if result is None]
+
+    num_sessions = len(pending)
+    if num_sessions > 100:
+        message = (
+            f"WARNING: this would run {num_sessions} negotiation sessions. Proceed?"
+        )
+        if not ask_proceed(message):
+            print("Exiting script")
+            exit()
 
-            # assemble results
-            tournament_steps.append(settings)
-            tournament_results.append(session_results_summary)
+    # run the negotiation sessions, results are stored in the order of the steps and
+    # written to the journal and result store as soon as a session finishes
+    with ExitStack() as stack:
+        journal = None
+        if journal_file is not None:
+            journal = stack.enter_context(SessionJournal(journal_file))
+        result_store = None
+        if result_store_dir is not None:
+            result_store = stack.enter_context(ResultStore(result_store_dir))
+            # sessions of a resumed tournament that are already in the store are kept
+            stored_steps = result_store.steps()
+            for index, session_results_summary in enumerate(tournament_results):
+                if session_results_summary is not None and index not in stored_steps:
+                    result_store.append(session_results_summary, index)
+
+        # traces are written by the process that runs the session
+        trace_files = None
+        if traces_dir is not None:
+            Path(traces_dir).mkdir(parents=True, exist_ok=True)
+            trace_files = [session_trace_file(traces_dir, i) for i in pending]
+
+        pending_steps = [tournament_steps[i] for i in pending]
+        for index, session_results_summary in iter_session_results(
+            pending_steps, workers, trace_files
+        ):
+            index = pending[index]
+            tournament_results[index] = session_results_summary
+            if journal is not None:
+                journal.append(tournament_steps[index], session_results_summary)
+            if result_store is not None:
+                result_store.append(session_results_summary, index)
 
     tournament_results_summary = process_tournament_results(tournament_results)
 
+    # plot all sessions (True) or a selection of them (list of step indices)
+    if plot_traces:
+        sessions = None if plot_traces is True else plot_traces
+        plot_tournament(
+            traces_dir, tournament_steps, tournament_results, sessions, workers
+        )
+
     return tournament_steps, tournament_results, tournament_results_summary
 
 
+def iter_session_results(
+    tournament_steps: List[dict], workers: int = 1, trace_files: List[Path] = None
+) -> Iterator[Tuple[int, dict]]:
+    """Run the sessions of a tournament and yield their summaries as they finish.
+
+    With more than one worker the sessions are distributed over a process pool, so
+    summaries are yielded in order of completion together with the index of their
+    step. An agent that takes down its worker process only costs the sessions that
+    were running at that moment: these are rerun one by one in a fresh process and
+    recorded as "ERROR" if they crash again.
+
+    Args:
+        tournament_steps (List[dict]): session settings as accepted by `run_session`
+        workers (int, optional): number of worker processes. Defaults to 1.
+        trace_files (List[Path], optional): per step a file to write the session
+            trace to in the compact format, written by the process that runs the
+            session. Defaults to None (traces are discarded).
+
+    Yields:
+        Tuple[int, dict]: index of the step and its session results summary
+    """
+    if trace_files is None:
+        trace_files = [None] * len(tournament_steps)
+
+    if workers == 1:
+        for index, settings in enumerate(tournament_steps):
+            yield index, _run_session_summary(settings, trace_files[index])
+        return
+
+    queue = deque(range(len(tournament_steps)))
+    while queue:
+        crashed = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            running = {}
+            while queue or running:
+                # only keep as many sessions in flight as there are workers, so that we
+                # know which sessions were affected if a worker crashes
+                while queue and len(running) < workers:
+                    index = queue.popleft()
+                    future = executor.submit(
+                        _run_session_summary,
+                        tournament_steps[index],
+                        trace_files[index],
+                    )
+                    running[future] = index
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = running.pop(future)
+                    try:
+                        session_results_summary = future.result()
+                    except BrokenProcessPool:
+                        crashed.append(index)
+                    else:
+                        yield index, session_results_summary
+
+                if crashed:
+                    # the pool is unusable, every session still in flight is lost
+                    crashed.extend(running.values())
+                    break
+
+        for index in sorted(crashed):
+            yield index, _run_session_isolated(
+                tournament_steps[index], trace_files[index]
+            )
+
+
+def _run_session_summary(settings: dict, trace_file: Path = None) -> dict:
+    try:
+        session_results_trace, session_results_summary = run_session(settings)
+    except Exception:
+        traceback.print_exc()
+        return _error_summary(settings)
+
+    # the trace is kept in the compact format, such that it can be plotted later on
+    if trace_file is not None and not session_results_trace["error"]:
+        try:
+            write_compact_trace(session_results_trace, trace_file)
+        except Exception:
+            traceback.print_exc()
+
+    return session_results_summary
+
+
+def _run_session_isolated(settings: dict, trace_file: Path = None) -> dict:
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        try:
+            return executor.submit(_run_session_summary, settings, trace_file).result()
+        except BrokenProcessPool:
+            print(f"Worker crashed while running session: {settings['agents']}")
+            return _error_summary(settings)
+
+
+def _error_summary(settings: dict) -> dict:
+    results_summary = {"num_offers": 0}
+    for position, agent in enumerate(settings["agents"], 1):
+        results_summary[f"agent_{position}"] = agent["class"].split(".")[-1]
+        results_summary[f"utility_{position}"] = 0
+    results_summary["nash_product"] = 0
+    results_summary["social_welfare"] = 0
+    results_summary["result"] = "ERROR"
+
+    return results_summary
+
+
+def _is_empty(path) -> bool:
+    # a file or directory that does not exist or has no content
+    path = Path(path)
+    if path.is_dir():
+        return not any(path.iterdir())
+    return not path.exists() or path.stat().st_size == 0
+
+
 def process_results(results_class: SAOPState, results_dict: dict):
     # dict to translate geniusweb agent reference to Python class name
     agent_translate = {
@@ -165,6 +415,7 @@ def process_results(results_class: SAOPState, results_dict: dict):
         # iterate both action classes and dict entries
         actions_iter = zip(results_class.getActions(), results_dict["actions"])
 
+        offers, bids = [], []
         for action_class, action_dict in actions_iter:
             if "Offer" in action_dict:
                 offer = action_dict["Offer"]
@@ -173,19 +424,25 @@ def process_results(results_class: SAOPState, results_dict: dict):
             else:
                 continue
 
-            # add bid utility of both agents if bid is not None
+            # collect the bids to compute the utilities of all of them at once
             bid = action_class.getBid()
             if bid is None:
                 raise ValueError(
                     f"Found `None` value in sequence of actions: {action_class}"
                 )
-            else:
-                offer["utilities"] = {
-                    k: float(v.getUtility(bid)) for k, v in utility_funcs.items()
-                }
+            offers.append(offer)
+            bids.append(bid)
 
             results_summary["num_offers"] += 1
 
+        # add bid utility of both agents
+        bidspace = BidSpace(next(iter(utility_funcs.values())).getDomain())
+        bid_utilities = {
+            k: get_bid_utilities(v, bids, bidspace) for k, v in utility_funcs.items()
+        }
+        for i, offer in enumerate(offers):
+            offer["utilities"] = {k: v[i] for k, v in bid_utilities.items()}
+
         # gather a summary of results
         if "Accept" in action_dict:
             utilities_final = list(offer["utilities"].values())
@@ -209,72 +466,69 @@ def process_results(results_class: SAOPState, results_dict: dict):
 
 
 def get_utility_function(profile_uri) -> LinearAdditiveUtilitySpace:
-    profile_connection = ProfileConnectionFactory.create(
-        URI(profile_uri), StdOutReporter()
-    )
-    profile = profile_connection.getProfile()
+    # profiles are parsed once per process and shared with the agents
+    profile = get_profile(profile_uri, StdOutReporter())
     assert isinstance(profile, LinearAdditiveUtilitySpace)
 
     return profile
 
 
-def process_tournament_results(tournament_results):
-    agent_result_raw = defaultdict(lambda: defaultdict(list))
-    tournament_results_summary = defaultdict(lambda: defaultdict(int))
-    for session_results in tournament_results:
-        agents = {k: v for k, v in session_results.items() if k.startswith("agent")}
-        for agent_id, agent_class in agents.items():
-            agent_result_raw[agent_class]["utility"].append(
-                session_results[f"utility_{agent_id.split('_')[1]}"]
-            )
-            agent_result_raw[agent_class]["nash_product"].append(
-                session_results["nash_product"]
-            )
-            agent_result_raw[agent_class]["social_welfare"].append(
-                session_results["social_welfare"]
-            )
-            if "num_offers" in session_results:
-                agent_result_raw[agent_class]["num_offers"].append(
-                    session_results["num_offers"]
-                )
-            tournament_results_summary[agent_class][session_results["result"]] += 1
-
-    for agent, stats in agent_result_raw.items():
-        num_session = len(stats["utility"])
-        for desc, stat in stats.items():
-            stat_average = sum(stat) / num_session
-            tournament_results_summary[agent][f"avg_{desc}"] = stat_average
-        tournament_results_summary[agent]["count"] = num_session
-
-    column_order = [
-        "avg_utility",
-        "avg_nash_product",
-        "avg_social_welfare",
-        "avg_num_offers",
-        "count",
-        "agreement",
-        "failed",
-        "ERROR",
-    ]
-    column_type = {
-        "count": int,
-        "agreement": int,
-        "failed": int,
-        "ERROR": int,
-    }
-
-    # results dictionary to dataframe
-    tournament_results_summary = pd.DataFrame(tournament_results_summary).T
-
-    # clean data and types
-    tournament_results_summary = tournament_results_summary.fillna(0)
-    for column in column_order:
-        if column not in tournament_results_summary:
-            tournament_results_summary[column] = 0
-    tournament_results_summary = tournament_results_summary.astype(column_type)
+def get_bid_utilities(
+    profile: LinearAdditiveUtilitySpace, bids: List[Bid], bidspace: BidSpace = None
+) -> List[float]:
+    """Utilities of many bids, equal to `float(profile.getUtility(bid))` for every bid.
+
+    The bids are encoded as value indices once, after which the utility is a lookup
+    of the weighted value utilities per issue. These are kept as Decimals and added
+    in the same order as the profile does, so the results are identical. Bids that
+    are not a complete bid of the domain (e.g. partial bids) are evaluated by the
+    profile itself.
+
+    Args:
+        profile (LinearAdditiveUtilitySpace): profile to evaluate the bids with
+        bids (List[Bid]): bids to evaluate
+        bidspace (BidSpace, optional): bid space of the domain of the profile
+
+    Returns:
+        List[float]: utility per bid
+    """
+    if bidspace is None:
+        bidspace = BidSpace(profile.getDomain())
+
+    utilities_per_bid = [None] * len(bids)
+    encoded, rows = [], []
+    for i, bid in enumerate(bids):
+        try:
+            rows.append(bidspace.encode_bid(bid))
+        except KeyError:
+            utilities_per_bid[i] = float(profile.getUtility(bid))
+        else:
+            encoded.append(i)
+    if not rows:
+        return utilities_per_bid
+
+    # every distinct bid is evaluated once
+    bid_indices = np.array(rows, dtype=np.int64) @ bidspace.strides
+    unique_indices, inverse = np.unique(bid_indices, return_inverse=True)
+    matrix = np.stack(np.unravel_index(unique_indices, bidspace.shape), axis=1)
+
+    utilities = np.full(len(unique_indices), Decimal(0), dtype=object)
+    value_utilities = profile.getUtilities()
+    for issue, weight in profile.getWeights().items():
+        column = bidspace.issues.index(issue)
+        table = np.empty(len(bidspace.values[column]), dtype=object)
+        table[:] = [
+            weight * value_utilities[issue].getUtility(value)
+            for value in bidspace.values[column]
+        ]
+        utilities = utilities + table[matrix[:, column]]
+
+    unique_utilities = np.array([float(u) for u in utilities], dtype=float)
+    for i, utility in zip(encoded, unique_utilities[inverse.reshape(-1)].tolist()):
+        utilities_per_bid[i] = utility
+    return utilities_per_bid
 
-    # structure dataframe
-    tournament_results_summary.sort_values("avg_utility", ascending=False, inplace=True)
-    tournament_results_summary = tournament_results_summary[column_order]
 
-    return tournament_results_summary
+def process_tournament_results(tournament_results):
+    # one row per session, summarised with group-bys per agent
+    return summarise_results(*columns_from_summaries(tournament_results))
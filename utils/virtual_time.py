@@ -0,0 +1,126 @@
+from contextlib import contextmanager
+from datetime import datetime
+from threading import Lock
+from time import time
+from typing import Iterable
+
+from geniusweb.inform.Inform import Inform
+from geniusweb.inform.YourTurn import YourTurn
+from geniusweb.party.DefaultParty import DefaultParty
+from geniusweb.progress.ProgressFactory import ProgressFactory
+from geniusweb.progress.ProgressTime import ProgressTime
+
+from utils.party_hooks import hook_notify_change
+
+
+class VirtualClock:
+    """Simulated clock of a negotiation session. Time only advances by the time the
+    agents spend computing, plus a fixed cost for every turn that is taken.
+    """
+
+    def __init__(self, turn_cost_ms: float = 1.0):
+        self.turn_cost_ms = turn_cost_ms
+        self.start_ms = time() * 1000
+        self.elapsed_ms = 0.0
+        self._lock = Lock()
+
+    def reset(self, start_ms: float):
+        with self._lock:
+            self.start_ms = start_ms
+            self.elapsed_ms = 0.0
+
+    def advance(self, duration_ms: float):
+        with self._lock:
+            self.elapsed_ms += duration_ms
+
+    def now(self) -> float:
+        """Current virtual time in ms since epoch"""
+        return self.start_ms + self.elapsed_ms
+
+    def on_notify_change(self, party: DefaultParty, info: Inform, duration_ms: float):
+        self.advance(duration_ms)
+        if isinstance(info, YourTurn):
+            self.advance(self.turn_cost_ms)
+
+
+class VirtualProgressTime(ProgressTime):
+    """ProgressTime that ignores the (wall-clock) time it is called with and reports
+    the progress of a VirtualClock instead. The wall-clock deadline still applies as
+    a backstop, so a session never takes longer than it would in real time.
+    """
+
+    def __init__(self, duration: int, start: datetime, clock: VirtualClock):
+        super().__init__(duration, start)
+        self._clock = clock
+
+    def get(self, currentTimeMs: int = None) -> float:
+        return super().get(round(self._clock.now()))
+
+    def isPastDeadline(self, currentTimeMs: int = None) -> bool:
+        return super().isPastDeadline(
+            round(self._clock.now())
+        ) or super().isPastDeadline(round(time() * 1000))
+
+
+def with_plain_progress(state):
+    """Replace a VirtualProgressTime in a session state by a plain ProgressTime with
+    the same duration and start. The virtual progress (and its clock) cannot be
+    serialised, so this must be done before the state is converted to JSON.
+
+    Args:
+        state (SessionState): state of a session, e.g. a SAOPState
+
+    Returns:
+        SessionState: the state with a plain progress
+    """
+    progress = state.getProgress()
+    if not isinstance(progress, VirtualProgressTime):
+        return state
+
+    return state.with_(
+        state.getActions(),
+        state.getConnections(),
+        ProgressTime(progress.getDuration(), progress.getStart()),
+        state.getSettings(),
+        state.getPartyProfiles(),
+        state.getError(),
+    )
+
+
+@contextmanager
+def virtual_time(classpaths: Iterable[str], turn_cost_ms: float = 1.0):
+    """Run the negotiation sessions that are started within this context on a
+    VirtualClock. Time-based progress objects that the protocol creates are replaced
+    by a VirtualProgressTime, and the clock is advanced by the time that the given
+    party classes spend in notifyChange.
+
+    Note that agents that read the wall-clock themselves (e.g. through
+    `Progress.getTerminationTime()`) are not affected, and that the state of the
+    session must be passed through `with_plain_progress` before it is serialised.
+
+    Args:
+        classpaths (Iterable[str]): classpaths of the participating agents
+        turn_cost_ms (float, optional): virtual time added for every turn. Defaults to 1.0.
+
+    Yields:
+        VirtualClock: the clock of the session
+    """
+    clock = VirtualClock(turn_cost_ms)
+    create = ProgressFactory.__dict__["create"]
+    create_original = create.__get__(None, ProgressFactory)
+
+    def create_virtual(deadline, currentTimeMs):
+        progress = create_original(deadline, currentTimeMs)
+        if isinstance(progress, ProgressTime):
+            clock.reset(currentTimeMs)
+            progress = VirtualProgressTime(
+                progress.getDuration(), progress.getStart(), clock
+            )
+        return progress
+
+    ProgressFactory.create = staticmethod(create_virtual)
+    try:
+        with hook_notify_change(classpaths, clock.on_notify_change):
+            yield clock
+    finally:
+        ProgressFactory.create = create